@@ -0,0 +1,171 @@
+"""
+Atomic quantity changes: POST .../<id>/adjust/ {"delta": -1} for one item
+and POST .../adjust/ [{"id": 1, "delta": 2}, ...] for several.
+
+Each request is a single UPDATE ... SET quantity = quantity + <delta> ...
+RETURNING, built from F() expressions: the client does not read the item
+first, and concurrent adjustments add up instead of overwriting each
+other. The quantity floor of 1 (the model's MinValueValidator) and the
+ceiling of the integer column are part of the UPDATE's WHERE clause, so an
+adjustment that would cross either matches no row and is reported instead
+of written (rather than overflowing the column). Several adjustments are applied
+all together or not at all.
+
+UPDATE ... RETURNING needs PostgreSQL or SQLite 3.35+.
+"""
+from django.db import connections, router, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import summary
+from .batch import DUPLICATE_ID, MAX_BATCH_SIZE, NOT_FOUND
+from .changes import items_saved, list_changed
+from .models import GroceryItem
+from .returning import returned_item, update_returning
+from .serializers import serialize_item
+
+MAX_DELTA = 10000
+BELOW_FLOOR = 'Ensure the quantity stays greater than or equal to 1.'
+ABOVE_CEILING = 'Ensure the quantity stays less than or equal to {}.'
+
+
+class DeltaSerializer(serializers.Serializer):
+    delta = serializers.IntegerField(min_value=-MAX_DELTA, max_value=MAX_DELTA)
+
+    def validate_delta(self, value):
+        if value == 0:
+            raise serializers.ValidationError('Ensure this value is not 0.')
+        return value
+
+
+class AdjustmentSerializer(DeltaSerializer):
+    id = serializers.IntegerField()
+
+
+class AdjustmentRejected(Exception):
+    """Some adjustments matched no row; nothing was written."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors  # item id -> message
+
+
+def adjust_item(list_id, pk, data):
+    """
+    Add data["delta"] to the quantity of the list's item `pk`. Returns
+    (item data, None) or (None, errors); raises GroceryItem.DoesNotExist
+    for an unknown item.
+    """
+    serializer = DeltaSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    try:
+        [item] = _apply(list_id, {pk: serializer.validated_data['delta']})
+    except AdjustmentRejected as exc:
+        if exc.errors[pk] == NOT_FOUND:
+            raise GroceryItem.DoesNotExist(NOT_FOUND)
+        return None, {'delta': [exc.errors[pk]]}
+    return serialize_item(item), None
+
+
+def adjust_items(list_id, data):
+    """
+    Apply [{"id": ..., "delta": ...}, ...] to the list's items. Returns
+    (items data, None) or (None, errors), where errors is either
+    {"error": ...} or one dict per adjustment, empty for the valid ones.
+    """
+    if not isinstance(data, list) or not data:
+        return None, {'error': 'Expected a non-empty list of {"id": ..., "delta": ...} objects.'}
+    if len(data) > MAX_BATCH_SIZE:
+        return None, {'error': f'At most {MAX_BATCH_SIZE} adjustments are allowed.'}
+    deltas = {}
+    errors = []
+    for entry in data:
+        serializer = AdjustmentSerializer(data=entry)
+        if not serializer.is_valid():
+            errors.append(serializer.errors)
+        elif serializer.validated_data['id'] in deltas:
+            errors.append({'id': [DUPLICATE_ID]})
+        else:
+            deltas[serializer.validated_data['id']] = serializer.validated_data['delta']
+            errors.append({})
+    if any(errors):
+        return None, errors
+    try:
+        items = _apply(list_id, deltas)
+    except AdjustmentRejected as exc:
+        return None, [_rejection(exc.errors.get(pk)) for pk in deltas]
+    return [serialize_item(item) for item in items], None
+
+
+def _rejection(message):
+    if message is None:
+        return {}
+    return {'id' if message == NOT_FOUND else 'delta': [message]}
+
+
+@transaction.atomic
+def _apply(list_id, deltas):
+    """
+    Add deltas ({item id: delta}) to the quantities in one UPDATE. Returns
+    the updated items in the order of `deltas`; raises AdjustmentRejected,
+    rolling everything back, if any item is missing or would drop below 1.
+    """
+    revision = list_changed(list_id)
+    if len(deltas) == 1:
+        change = Value(next(iter(deltas.values())))
+    else:
+        change = Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+            output_field=IntegerField(),
+        )
+    # Compared as quantity against the bounds minus the change, so the
+    # check itself cannot overflow the column's integer type.
+    ceiling = _max_quantity()
+    rows = GroceryItem.objects.filter(
+        list_id=list_id, pk__in=list(deltas),
+        quantity__gte=Value(1) - change, quantity__lte=Value(ceiling) - change,
+    )
+    now = timezone.now()
+    returned = update_returning(rows, {
+        'quantity': F('quantity') + change,
+        'version': F('version') + 1,
+        'revision': revision,
+        'updated_at': now,
+    })
+    items = {
+        item.pk: item for item in (
+            returned_item(row, list_id=list_id, revision=revision, updated_at=now)
+            for row in returned
+        )
+    }
+    if len(items) < len(deltas):
+        # Whatever did not match is missing or would cross a bound.
+        rejected = [pk for pk in deltas if pk not in items]
+        existing = set(
+            GroceryItem.objects.filter(list_id=list_id, pk__in=rejected)
+            .values_list('id', flat=True)
+        )
+        raise AdjustmentRejected({
+            pk: NOT_FOUND if pk not in existing
+            else BELOW_FLOOR if deltas[pk] < 0 else ABOVE_CEILING.format(ceiling)
+            for pk in rejected
+        })
+
+    delta = summary.SummaryDelta(list_id)
+    for pk, item in items.items():
+        delta.add_quantity(item.category_id, deltas[pk])
+    delta.apply()
+    items = [items[pk] for pk in deltas]
+    items_saved(list_id, revision, items)
+    return items
+
+
+def _max_quantity():
+    # The quantity column's largest value on the database written to, the
+    # same bound GroceryItemSerializer takes from the model field.
+    connection = connections[router.db_for_write(GroceryItem)]
+    field = GroceryItem._meta.get_field('quantity')
+    return connection.ops.integer_field_range(field.get_internal_type())[1]
+
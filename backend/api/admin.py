@@ -1,3 +1,71 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import F
 
-# Register your models here.
+from . import summary
+from .changes import items_deleted, items_saved, list_changed
+from .models import GroceryItem, GroceryList
+
+
+@admin.register(GroceryList)
+class GroceryListAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+
+    def has_delete_permission(self, request, obj=None):
+        # Deleting a list goes through the API (api.mutations.delete_list),
+        # which keeps the default list and the list caches consistent.
+        return False
+
+
+@admin.register(GroceryItem)
+class GroceryItemAdmin(admin.ModelAdmin):
+    list_display = ('name', 'list', 'category', 'quantity', 'purchased', 'updated_at')
+    list_filter = ('list', 'purchased', 'category')
+    search_fields = ('name',)
+    list_select_related = ('list', 'category')
+
+    # Admin writes go through the same change hook and summary counters as
+    # the API views. Items cannot move between lists.
+
+    def get_readonly_fields(self, request, obj=None):
+        return ('list',) if obj is not None else ()
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            obj.revision = list_changed(obj.list_id)
+            delta = summary.SummaryDelta(obj.list_id)
+            if change:
+                delta.remove_rows(GroceryItem.objects.filter(pk=obj.pk))
+                obj.version = F('version') + 1
+            super().save_model(request, obj, form, change)
+            if change:
+                obj.refresh_from_db(fields=['version'])
+            delta.add(obj)
+            delta.apply()
+            items_saved(obj.list_id, obj.revision, [obj], created=not change)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            revision = list_changed(obj.list_id)
+            pk = obj.pk
+            delta = summary.SummaryDelta(obj.list_id)
+            delta.remove_rows(GroceryItem.objects.filter(pk=pk))
+            super().delete_model(request, obj)
+            delta.apply()
+            items_deleted(obj.list_id, revision, [pk])
+
+    def delete_queryset(self, request, queryset):
+        by_list = {}
+        for pk, list_id in queryset.values_list('id', 'list_id'):
+            by_list.setdefault(list_id, []).append(pk)
+        with transaction.atomic():
+            # Lists in id order, so concurrent admins lock them in the same order.
+            for list_id, ids in sorted(by_list.items()):
+                revision = list_changed(list_id)
+                items = GroceryItem.objects.filter(list_id=list_id, id__in=ids)
+                delta = summary.SummaryDelta(list_id)
+                delta.remove_rows(items)
+                super().delete_queryset(request, items)
+                delta.apply()
+                items_deleted(list_id, revision, ids)
@@ -0,0 +1,16 @@
+from django.urls import include, path
+from . import async_views
+from .models import DEFAULT_LIST_ID
+
+
+# Mounted like api.urls.item_patterns.
+item_patterns = [
+    path('', async_views.grocery_item_list, name='async-grocery-item-list'),
+    path('update-purchased/', async_views.bulk_update_purchased, name='async-bulk-update'),
+    path('<int:pk>/', async_views.grocery_item_detail, name='async-grocery-item-detail'),
+]
+
+urlpatterns = [
+    path('grocery-items/', include(item_patterns), {'list_id': DEFAULT_LIST_ID}),
+    path('lists/<int:list_id>/items/', include(item_patterns)),
+]
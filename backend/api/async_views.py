@@ -0,0 +1,215 @@
+"""
+Async versions of the grocery item views for ASGI servers (uvicorn, daphne),
+mounted under /api/async/ by api.async_urls, per list like api.views.
+
+Reads use the async ORM directly. Validation and writes reuse api.mutations
+through sync_to_async, since Django's transaction API is synchronous, so
+the validation rules and change hooks are identical to the sync views.
+Responses are plain JSON (no browsable API), and the list response cache is
+not consulted; conditional GETs and Idempotency-Key are supported. CSRF
+is checked as DRF's SessionAuthentication checks it for the sync views.
+"""
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework.exceptions import APIException
+
+from . import mutations
+from .conditional import (
+    conditional_response, if_match_version, item_validators, item_version_etag,
+    list_validators, set_validators,
+)
+from .filters import filter_items
+from .idempotency import idempotent
+from .models import GroceryItem, ListRevision
+from .pagination import KeysetPagination
+from .serializers import item_rows
+
+
+class InvalidJSON(Exception):
+    pass
+
+
+def _json_body(request):
+    if not request.body:
+        return {}
+    try:
+        return json.loads(request.body)
+    except ValueError as exc:
+        raise InvalidJSON(f'JSON parse error - {exc}')
+
+
+def _error(detail, status):
+    if isinstance(detail, str):
+        detail = {'detail': detail}
+    return JsonResponse(detail, status=status)
+
+
+class _CSRFCheck(CsrfViewMiddleware):
+    def _reject(self, request, reason):
+        return reason
+
+
+def _session_csrf(view):
+    """
+    Check CSRF the way the sync (DRF) views do: only for requests from a
+    logged-in session, as SessionAuthentication does, so token-less API
+    clients are not rejected but a browser session cannot be ridden.
+    """
+    @csrf_exempt
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if user.is_authenticated:
+            check = _CSRFCheck(lambda request: None)
+            check.process_request(request)
+            if (reason := check.process_view(request, None, (), {})) is not None:
+                return _error(f'CSRF Failed: {reason}', 403)
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+async def _list_get(request, list_id):
+    try:
+        revision = await ListRevision.acurrent(list_id)
+    except ListRevision.DoesNotExist:
+        return HttpResponse(status=404)
+    etag, last_modified = list_validators(revision)
+    response = conditional_response(request, etag, last_modified)
+    if response is not None:
+        return set_validators(request, response, etag, last_modified)
+
+    try:
+        items = filter_items(GroceryItem.objects.filter(list_id=list_id), request.GET)
+        paginator = KeysetPagination()
+        params = request.GET
+        if paginator.page_size_query_param in params or paginator.cursor_query_param in params:
+            page = await paginator.apaginate_queryset(item_rows(items), request)
+            data = paginator.get_paginated_data(page)
+        else:
+            items = items.order_by(*paginator.ordering)
+            data = [row async for row in item_rows(items)]
+    except APIException as exc:
+        return _error(exc.detail, exc.status_code)
+    return set_validators(request, JsonResponse(data, safe=False), etag, last_modified)
+
+
+@require_http_methods(['GET', 'HEAD', 'POST', 'DELETE'])
+@_session_csrf
+@idempotent
+async def grocery_item_list(request, list_id):
+    """
+    Async counterpart of api.views.grocery_item_list.
+    """
+    if request.method in ('GET', 'HEAD'):
+        return await _list_get(request, list_id)
+
+    elif request.method == 'POST':
+        try:
+            body = _json_body(request)
+        except InvalidJSON as exc:
+            return _error({'detail': str(exc)}, 400)
+        on_conflict = request.GET.get('on_conflict')
+        if on_conflict is not None and on_conflict not in mutations.ON_CONFLICT_MODES:
+            return _error(
+                {'error': f"on_conflict must be one of: {', '.join(mutations.ON_CONFLICT_MODES)}."},
+                400,
+            )
+        try:
+            if on_conflict is None:
+                data, errors = await sync_to_async(mutations.create_item)(list_id, body)
+                created = True
+            else:
+                data, created, errors = await sync_to_async(mutations.upsert_item)(
+                    list_id, body, on_conflict
+                )
+        except Http404:
+            return HttpResponse(status=404)
+        if errors:
+            return _error(errors, 400)
+        return JsonResponse(data, status=201 if created else 200)
+
+    elif request.method == 'DELETE':
+        try:
+            count = await sync_to_async(mutations.delete_all_items)(list_id)
+        except Http404:
+            return HttpResponse(status=404)
+        return JsonResponse({'deleted': count})
+
+
+@require_http_methods(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@_session_csrf
+@idempotent
+async def grocery_item_detail(request, list_id, pk):
+    """
+    Async counterpart of api.views.grocery_item_detail.
+    """
+    if request.method in ('GET', 'HEAD'):
+        # One query serves both the validators and the body.
+        items = GroceryItem.objects.filter(list_id=list_id, pk=pk)
+        row = await item_rows(items, 'updated_at').afirst()
+        if row is None:
+            return HttpResponse(status=404)
+        updated_at = row.pop('updated_at')
+        etag, last_modified = item_validators(pk, row['version'], updated_at)
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = JsonResponse(row)
+        return set_validators(request, response, etag, last_modified)
+
+    if request.method == 'PATCH':
+        try:
+            version = if_match_version(request, pk)
+        except ValueError as exc:
+            return _error({'error': str(exc)}, 400)
+        try:
+            body = _json_body(request)
+        except InvalidJSON as exc:
+            return _error({'detail': str(exc)}, 400)
+        try:
+            data, errors = await sync_to_async(mutations.update_item)(
+                list_id, pk, body, version
+            )
+        except (Http404, GroceryItem.DoesNotExist):
+            return HttpResponse(status=404)
+        except mutations.VersionConflict as exc:
+            return _error({'error': str(exc), 'item': exc.item}, 409)
+        if errors:
+            return _error(errors, 400)
+        return JsonResponse(data, headers={'ETag': item_version_etag(pk, data['version'])})
+
+    try:
+        item = await GroceryItem.objects.aget(list_id=list_id, pk=pk)
+    except GroceryItem.DoesNotExist:
+        return HttpResponse(status=404)
+
+    if request.method == 'DELETE':
+        await sync_to_async(mutations.delete_item)(item)
+        return HttpResponse(status=204)
+
+
+@require_http_methods(['PATCH'])
+@_session_csrf
+@idempotent
+async def bulk_update_purchased(request, list_id):
+    """
+    Async counterpart of api.views.bulk_update_purchased.
+    """
+    try:
+        body = _json_body(request)
+    except InvalidJSON as exc:
+        return _error({'detail': str(exc)}, 400)
+    purchased, errors = mutations.purchased_value(body)
+    if errors:
+        return _error(errors, 400)
+    try:
+        updated_count = await sync_to_async(mutations.set_all_purchased)(list_id, purchased)
+    except Http404:
+        return HttpResponse(status=404)
+    return JsonResponse({'updated': updated_count})
@@ -0,0 +1,305 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import summary
+from .categories import save_categories
+from .changes import items_deleted, items_saved, list_changed
+from .models import GroceryItem
+from .mutations import VERSION_CONFLICT
+from .serializers import DUPLICATE_NAME, GroceryItemSerializer, serialize_item
+
+MAX_BATCH_SIZE = 500
+NOT_FOUND = 'Not found.'
+DUPLICATE_ID = 'Duplicate id in batch.'
+UPDATED_AND_DELETED = 'An item cannot be both updated and deleted in one batch.'
+_version_field = serializers.IntegerField(min_value=1)
+
+
+class GroceryItemBatchSerializer(GroceryItemSerializer):
+    """
+    GroceryItemSerializer without the per-item name uniqueness query.
+    Name uniqueness for a batch is checked with a single query in
+    BatchOperation.check_names() instead of one SELECT per item.
+    """
+    def validate_name(self, value):
+        return value
+
+
+class BatchOperation:
+    """
+    Validate and apply a batch of creates, partial updates and deletes.
+
+    Body: {"create": [{...}], "update": [{"id": 1, ...}], "delete": [1, 2]}
+
+    Every operation applies to one list; ids from other lists are not
+    found. An update with a "version" only applies if the item is still at
+    that version. Either every operation is valid and all of them are applied in one
+    transaction, or nothing is written and `errors` holds one entry per
+    operation (an empty dict for the valid ones).
+    """
+
+    def __init__(self, list_id, data):
+        self.list_id = list_id
+        self.items = GroceryItem.objects.filter(list_id=list_id)
+        self.data = data
+        self.errors = {}
+        self.creates = []
+        self.updates = []
+        self.deletes = []
+
+    def is_valid(self):
+        if not isinstance(self.data, dict) or not any(
+            key in self.data for key in ('create', 'update', 'delete')
+        ):
+            self.errors = {'error': 'create, update or delete is required'}
+            return False
+
+        sections = {}
+        for key in ('create', 'update', 'delete'):
+            value = self.data.get(key, [])
+            if not isinstance(value, list):
+                self.errors[key] = ['Expected a list.']
+            elif len(value) > MAX_BATCH_SIZE:
+                self.errors[key] = [f'At most {MAX_BATCH_SIZE} operations are allowed.']
+            sections[key] = value
+        if self.errors:
+            return False
+
+        # Ids named in both sections; each of those entries is rejected.
+        conflicts = {
+            entry.get('id') for entry in sections['update']
+            if isinstance(entry, dict) and _is_id(entry.get('id'))
+        } & {pk for pk in sections['delete'] if _is_id(pk)}
+        create_errors = self.validate_creates(sections['create'])
+        update_errors = self.validate_updates(sections['update'], conflicts)
+        delete_errors = self.validate_deletes(sections['delete'], conflicts)
+        self.check_names(create_errors, update_errors)
+
+        if any(create_errors + update_errors + delete_errors):
+            self.errors = {
+                'create': create_errors,
+                'update': update_errors,
+                'delete': delete_errors,
+            }
+            return False
+        return True
+
+    def validate_creates(self, entries):
+        errors = []
+        for entry in entries:
+            serializer = GroceryItemBatchSerializer(data=entry)
+            if serializer.is_valid():
+                self.creates.append(serializer.validated_data)
+                errors.append({})
+            else:
+                self.creates.append(None)
+                errors.append(serializer.errors)
+        return errors
+
+    def validate_updates(self, entries, conflicts=()):
+        ids = [entry.get('id') for entry in entries if isinstance(entry, dict)]
+        instances = self.items.in_bulk([pk for pk in ids if _is_id(pk)])
+        errors = []
+        seen = set()
+        for entry in entries:
+            pk = entry.get('id') if isinstance(entry, dict) else None
+            if not _is_id(pk):
+                self.updates.append(None)
+                errors.append({'id': ['A valid integer is required.']})
+                continue
+            if pk in seen:
+                self.updates.append(None)
+                errors.append({'id': [DUPLICATE_ID]})
+                continue
+            seen.add(pk)
+            if pk in conflicts:
+                self.updates.append(None)
+                errors.append({'id': [UPDATED_AND_DELETED]})
+                continue
+            instance = instances.get(pk)
+            if instance is None:
+                self.updates.append(None)
+                errors.append({'id': [NOT_FOUND]})
+                continue
+            serializer = GroceryItemBatchSerializer(instance, data=entry, partial=True)
+            version, error = _version(entry)
+            if error:
+                self.updates.append(None)
+                errors.append(error)
+            elif version is not None and version != instance.version:
+                self.updates.append(None)
+                errors.append({'version': [VERSION_CONFLICT]})
+            elif serializer.is_valid():
+                self.updates.append((instance, serializer.validated_data, version))
+                errors.append({})
+            else:
+                self.updates.append(None)
+                errors.append(serializer.errors)
+        return errors
+
+    def validate_deletes(self, ids, conflicts=()):
+        valid = [pk for pk in ids if _is_id(pk)]
+        existing = set(
+            self.items.filter(id__in=valid).values_list('id', flat=True)
+        )
+        errors = []
+        seen = set()
+        for pk in ids:
+            if not _is_id(pk):
+                errors.append({'id': ['A valid integer is required.']})
+            elif pk in seen:
+                errors.append({'id': [DUPLICATE_ID]})
+            elif pk in conflicts:
+                seen.add(pk)
+                errors.append({'id': [UPDATED_AND_DELETED]})
+            elif pk not in existing:
+                errors.append({'id': [NOT_FOUND]})
+            else:
+                seen.add(pk)
+                self.deletes.append(pk)
+                errors.append({})
+        return errors
+
+    def check_names(self, create_errors, update_errors):
+        """Enforce unique names across the batch and the existing rows."""
+        deleted = set(self.deletes)
+        renamed = {
+            op[0].pk for op in self.updates
+            if op and 'name' in op[1] and op[1]['name'] != op[0].name
+        }
+        wanted = []
+        for index, validated in enumerate(self.creates):
+            if validated:
+                wanted.append((validated['name'], None, create_errors, index))
+        for index, op in enumerate(self.updates):
+            if op and op[0].pk in renamed:
+                wanted.append((op[1]['name'], op[0].pk, update_errors, index))
+        if not wanted:
+            return
+
+        taken = {
+            name: pk for pk, name in self.items.filter(
+                name__in=[name for name, *_ in wanted]
+            ).values_list('id', 'name')
+            if pk not in deleted and pk not in renamed
+        }
+        claimed = set()
+        for name, pk, errors, index in wanted:
+            if name in taken or name in claimed:
+                errors[index] = {'name': [DUPLICATE_NAME]}
+            claimed.add(name)
+
+    @transaction.atomic
+    def save(self):
+        """Apply deletes, then updates, then creates. Returns per-item results."""
+        revision = list_changed(self.list_id)
+        save_categories([*self.creates, *(validated for _, validated, _ in self.updates)])
+        delta = summary.SummaryDelta(self.list_id)
+        if self.deletes:
+            deleted = self.items.filter(id__in=self.deletes)
+            delta.remove_rows(deleted)
+            deleted.delete()
+            items_deleted(self.list_id, revision, self.deletes)
+
+        updated = self.apply_updates(revision, delta)
+        created = GroceryItem.objects.bulk_create(
+            GroceryItem(**validated, list_id=self.list_id, revision=revision)
+            for validated in self.creates
+        )
+        for item in created:
+            delta.add(item)
+        delta.apply()
+        items_saved(self.list_id, revision, updated)
+        items_saved(self.list_id, revision, created, created=True)
+        return {
+            'create': [serialize_item(item) for item in created],
+            'update': [serialize_item(item) for item in updated],
+            'delete': list(self.deletes),
+        }
+
+    def apply_updates(self, revision, delta):
+        """
+        Apply the validated updates to the rows as locked in this transaction,
+        not to the instances validated before it, so an update only writes its
+        own fields and the summary delta and versions follow the stored rows.
+        """
+        if not self.updates:
+            return []
+        locked = self.items.select_for_update().in_bulk([op[0].pk for op in self.updates])
+        errors = []
+        for instance, validated, version in self.updates:
+            item = locked.get(instance.pk)
+            if item is None:
+                errors.append({'id': [NOT_FOUND]})
+            elif version is not None and version != item.version:
+                errors.append({'version': [VERSION_CONFLICT]})
+            else:
+                errors.append({})
+        if any(errors):
+            raise BatchRejected({'create': [{} for _ in self.creates], 'update': errors,
+                                 'delete': [{} for _ in self.deletes]})
+
+        # bulk_update() skips auto_now, so updated_at is set by hand; rows are
+        # grouped by the fields their update sets.
+        now = timezone.now()
+        updated = []
+        groups = defaultdict(list)
+        for instance, validated, version in self.updates:
+            item = locked[instance.pk]
+            delta.remove(item)
+            for attr, value in validated.items():
+                setattr(item, attr, value)
+            item.updated_at = now
+            item.revision = revision
+            item.version += 1
+            delta.add(item)
+            groups[frozenset(validated)].append(item)
+            updated.append(item)
+        for fields, items in groups.items():
+            GroceryItem.objects.bulk_update(
+                items, sorted(fields | {'updated_at', 'revision', 'version'})
+            )
+        return updated
+
+
+class BatchRejected(Exception):
+    """An update found its row deleted or changed when the batch was applied."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(errors)
+
+
+def _version(entry):
+    """The optional "version" of an update entry, as (version, None) or (None, errors)."""
+    if 'version' not in entry:
+        return None, None
+    try:
+        return _version_field.run_validation(entry['version']), None
+    except serializers.ValidationError as exc:
+        return None, {'version': exc.detail}
+
+
+def _is_id(value):
+    # bool is a subclass of int; true/false are not item ids.
+    return type(value) is int
+
+
+def apply_batch(list_id, data):
+    """
+    Run a batch against a list. Returns (results, None) on success or (None, errors).
+    A unique constraint violation that slips past the name check (a
+    concurrent insert) is reported as a batch error rather than a 500.
+    """
+    batch = BatchOperation(list_id, data)
+    if not batch.is_valid():
+        return None, batch.errors
+    try:
+        return batch.save(), None
+    except BatchRejected as exc:
+        return None, exc.errors
+    except IntegrityError:
+        return None, {'error': DUPLICATE_NAME}
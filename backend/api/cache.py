@@ -0,0 +1,127 @@
+"""
+Response cache for the item list GET endpoints.
+
+Rendered bodies (JSON and the compact formats of api.renderers) are stored
+in the configured Django cache (see CACHES in backend/settings.py) under a
+key that includes the grocery list's "generation" token. Invalidation
+replaces the token, which orphans every cached variant of that list
+(filters, pages, media types, URL aliases) at once while other lists'
+entries stay warm; stale entries simply expire. A random token is used
+rather than a counter so an evicted generation key can never bring an old
+entry back to life.
+
+Hit and miss counters are kept in the same cache so they are shared across
+gunicorn workers when a shared backend is configured.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+
+from .conditional import list_revision
+
+CACHE_ALIAS = 'default'
+GENERATION_KEY = 'grocery:list:{list_id}:generation'
+HITS_KEY = 'grocery:list:hits'
+MISSES_KEY = 'grocery:list:misses'
+DEFAULT_TIMEOUT = 300
+CACHED_FORMATS = ('json', 'columnar', 'msgpack')
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _timeout():
+    return getattr(settings, 'LIST_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def _generation(list_id):
+    key = GENERATION_KEY.format(list_id=list_id)
+    generation = _cache().get(key)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        # add() so concurrent workers agree on a single token.
+        if not _cache().add(key, generation, None):
+            generation = _cache().get(key, generation)
+    return generation
+
+
+def _key(request, list_id):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    # The revision the request saw (from the ETag lookup): a body read from
+    # a lagging replica is only ever served to requests that see the same
+    # revision, whatever the generation.
+    revision = list_revision(request, list_id).revision
+    return (
+        f'grocery:list:{list_id}:{_generation(list_id)}:{revision}:'
+        f'{request.accepted_media_type}:{path}'
+    )
+
+
+def _count(key):
+    cache = _cache()
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def _cacheable(request):
+    # Only cache the data renderers, not the browsable API.
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is not None and renderer.format in CACHED_FORMATS
+
+
+def get_cached_response(request, list_id):
+    """Return a cached HttpResponse for this list request, or None."""
+    if not _cacheable(request):
+        return None
+    cached = _cache().get(_key(request, list_id))
+    if cached is None:
+        _count(MISSES_KEY)
+        return None
+    _count(HITS_KEY)
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def cache_response(request, list_id, response):
+    """Store `response` once DRF has rendered it. Returns the response."""
+    if not _cacheable(request):
+        return response
+    key = _key(request, list_id)
+
+    def store(rendered):
+        if rendered.status_code == 200:
+            _cache().set(key, (rendered.content, rendered['Content-Type']), _timeout())
+
+    response.add_post_render_callback(store)
+    return response
+
+
+def invalidate(list_id):
+    """Drop every cached response for the list."""
+    _cache().set(GENERATION_KEY.format(list_id=list_id), uuid.uuid4().hex, None)
+
+
+def invalidate_on_commit(list_id):
+    """
+    Invalidate now and again once the surrounding transaction commits, so a
+    read that raced the write cannot leave pre-commit data cached.
+    """
+    invalidate(list_id)
+    transaction.on_commit(lambda: invalidate(list_id))
+
+
+def stats():
+    cache = _cache()
+    return {
+        'backend': cache.__class__.__name__,
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
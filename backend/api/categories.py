@@ -0,0 +1,122 @@
+"""
+In-process cache of Category ids and names.
+
+The API speaks category names while items store a Category id. Reads map
+ids to names and writes map names to ids through this cache, so neither
+joins api_category nor queries it once the cache is warm. The category
+table is tiny, so a miss reloads all of it.
+
+Categories are never renamed or deleted by the app, so entries never go
+stale. Entries read or created inside a transaction are only cached once
+it commits: a rolled-back insert could otherwise leave an id in the cache
+that the database hands out again for a different name.
+"""
+import threading
+
+from django.db import transaction
+
+from .models import Category
+
+_lock = threading.Lock()
+_names = {}  # id -> name
+_ids = {}    # name -> id
+
+
+def _remember(pairs):
+    pairs = list(pairs)
+
+    def store():
+        with _lock:
+            for pk, name in pairs:
+                _names[pk] = name
+                _ids[name] = pk
+
+    # Runs immediately outside a transaction.
+    transaction.on_commit(store)
+
+
+def _cached(pk, name):
+    category = Category(id=pk, name=name)
+    category._state.adding = False
+    return category
+
+
+class NameLookup(dict):
+    """
+    id -> name mapping for one read. The first id missing from the cache
+    loads every category, once per lookup.
+    """
+
+    def __init__(self):
+        super().__init__(_names)
+        self._loaded = False
+
+    def __missing__(self, pk):
+        if self._loaded:
+            raise KeyError(pk)
+        self._loaded = True
+        pairs = list(Category.objects.values_list('id', 'name'))
+        _remember(pairs)
+        self.update(pairs)
+        return self[pk]
+
+
+def category_name(pk):
+    """Return the name of the category with id `pk`."""
+    try:
+        return _names[pk]
+    except KeyError:
+        return NameLookup()[pk]
+
+
+def cached_id(name):
+    """Return the id of the category `name` if it is cached, else None."""
+    return _ids.get(name)
+
+
+def get_category(name):
+    """Return the Category called `name`, creating it if needed."""
+    pk = _ids.get(name)
+    if pk is not None:
+        return _cached(pk, name)
+    category, _ = Category.objects.get_or_create(name=name)
+    _remember([(category.pk, category.name)])
+    return category
+
+
+def find_category(name):
+    """
+    Return the Category called `name` without creating it: an unsaved
+    Category if there is none yet. Validation uses this, so a rejected
+    request never writes a category; save_categories() creates the missing
+    ones inside the write's transaction.
+    """
+    pk = _ids.get(name)
+    if pk is not None:
+        return _cached(pk, name)
+    category = Category.objects.filter(name=name).first()
+    if category is None:
+        return Category(name=name)
+    _remember([(category.pk, category.name)])
+    return category
+
+
+def save_categories(rows):
+    """
+    Replace each unsaved Category from find_category() in the validated
+    `rows` (dicts) with a saved one. Call inside the write's transaction.
+    """
+    saved = {}
+    for fields in rows:
+        category = fields.get('category')
+        if category is not None and category.pk is None:
+            if category.name not in saved:
+                saved[category.name] = get_category(category.name)
+            fields['category'] = saved[category.name]
+
+
+def clear():
+    """Forget every cached category, e.g. after the table is emptied."""
+    with _lock:
+        _names.clear()
+        _ids.clear()
@@ -0,0 +1,65 @@
+"""
+Single entry point for "a grocery list changed".
+
+Every mutating path (the views, the batch endpoint and the admin) calls
+list_changed() for the list it writes to inside the transaction that
+performs the write, before touching any item rows, and stamps the rows it
+creates or updates with the returned revision. Taking the list's
+ListRevision row lock first keeps the lock order the same for every writer
+of a list, and writers of different lists never wait for each other.
+Deletes are recorded as tombstones for delta sync, and every change is
+published to api.events subscribers once the transaction commits.
+Queryset update()/delete()/bulk_* calls do not send model signals, so this
+is called explicitly rather than hooked up to post_save/post_delete.
+"""
+from django.http import Http404
+
+from . import cache, events
+from .models import ListRevision, Tombstone
+from .serializers import serialize_item
+
+
+def list_changed(list_id):
+    """
+    Record a change to the list and return its new revision.
+    Call inside the write's transaction. Raises Http404 if there is no such
+    list.
+    """
+    try:
+        revision = ListRevision.bump(list_id)
+    except ListRevision.DoesNotExist:
+        raise Http404('No such grocery list.')
+    cache.invalidate_on_commit(list_id)
+    return revision
+
+
+def items_saved(list_id, revision, items, created=False):
+    """Announce items created or updated at `revision`."""
+    if items:
+        events.publish(
+            'created' if created else 'updated', list_id, revision,
+            items=[serialize_item(item) for item in items],
+        )
+
+
+def items_bulk_updated(list_id, revision, **fields):
+    """Announce a change applied to every item of the list, e.g. purchased=True."""
+    events.publish('bulk_updated', list_id, revision, fields=fields)
+
+
+def items_deleted(list_id, revision, item_ids):
+    """Record tombstones for items deleted at `revision`."""
+    item_ids = list(item_ids)
+    Tombstone.objects.bulk_create(
+        Tombstone(list_id=list_id, item_id=item_id, revision=revision) for item_id in item_ids
+    )
+    if item_ids:
+        events.publish('deleted', list_id, revision, ids=item_ids)
+
+
+def list_cleared(list_id, revision):
+    """Record that every item of the list was deleted at `revision`."""
+    # A clear supersedes every earlier tombstone of the list.
+    Tombstone.objects.filter(list_id=list_id, revision__lt=revision).delete()
+    Tombstone.objects.create(list_id=list_id, item_id=None, revision=revision)
+    events.publish('cleared', list_id, revision)
@@ -0,0 +1,80 @@
+"""
+Response compression negotiated from Accept-Encoding, so responses leave
+the application compressed whether or not a proxy in front compresses.
+
+The coding is the one of brotli and gzip that Accept-Encoding gives the
+higher q-value, brotli on a tie; a coding with q=0 (or only matched by a
+"*;q=0") is never used. Gzip is Django's GZipMiddleware, including its
+BREACH padding. Streaming responses such as export/ are gzipped as they
+stream, if gzip is acceptable; the event stream is left alone so events
+are not held back. Listed in MIDDLEWARE but only
+active with RESPONSE_COMPRESSION=True (see backend/settings.py).
+"""
+import brotli
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+# Quality 11 (the default) costs far more CPU than it saves on per-request
+# payloads; 5 compresses list responses better than gzip at a similar speed.
+BROTLI_QUALITY = 5
+MIN_LENGTH = 200
+
+CODINGS = ('br', 'gzip')
+
+
+def accepted_codings(header):
+    """The CODINGS an Accept-Encoding header allows, most preferred first."""
+    qualities = {}
+    for entry in header.split(','):
+        coding, *params = entry.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            qualities[coding.strip().lower()] = quality
+    default = qualities.get('*', 0.0)
+    ranked = [(qualities.get(coding, default), coding) for coding in CODINGS]
+    # sorted() is stable, so brotli stays first on equal q-values.
+    return [coding for quality, coding in sorted(ranked, key=lambda pair: -pair[0]) if quality > 0]
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Brotli or gzip, whichever Accept-Encoding prefers; brotli on a tie."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'RESPONSE_COMPRESSION', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        codings = accepted_codings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if 'gzip' in codings and (response.streaming or codings[0] == 'gzip'):
+            return super().process_response(request, response)
+
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < MIN_LENGTH:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming or not codings:
+            return response
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        # As GZipMiddleware: the encoded body no longer matches a strong ETag.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
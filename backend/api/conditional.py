@@ -0,0 +1,125 @@
+"""
+ETag / Last-Modified callbacks for django.views.decorators.http.condition.
+
+Each list is versioned by its ListRevision row and single items by their
+version column, so a matching If-None-Match is answered with 304 after
+one indexed lookup, without running the list query or the serializer. Only
+safe methods get validators. Item PATCH checks If-Match itself (see
+if_match_version()) and answers a stale version with 409, not 412. The
+callbacks receive the view's URL kwargs, including list_id.
+"""
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import GroceryItem, ListRevision
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def list_revision(request, list_id):
+    """The list's ListRevision, looked up once per request."""
+    # condition() calls both callbacks, and api.cache keys on it.
+    if not hasattr(request, '_list_revision'):
+        try:
+            request._list_revision = ListRevision.current(list_id)
+        except ListRevision.DoesNotExist:
+            raise Http404('No such grocery list.')
+    return request._list_revision
+
+
+def list_etag(request, list_id, **kwargs):
+    if request.method not in SAFE_METHODS:
+        return None
+    # DRF has negotiated the renderer by the time condition() runs.
+    renderer = getattr(request, 'accepted_renderer', None)
+    representation = renderer.format if renderer is not None else 'json'
+    return list_validators(list_revision(request, list_id), representation)[0]
+
+
+def list_last_modified(request, list_id, **kwargs):
+    if request.method not in SAFE_METHODS:
+        return None
+    return list_revision(request, list_id).updated_at
+
+
+def _item_version(request, list_id, pk):
+    # (version, updated_at), or None for a missing item.
+    if not hasattr(request, '_item_version'):
+        request._item_version = (
+            GroceryItem.objects.filter(list_id=list_id, pk=pk)
+            .values_list('version', 'updated_at')
+            .first()
+        )
+    return request._item_version
+
+
+def item_etag(request, list_id, pk):
+    if request.method not in SAFE_METHODS:
+        return None
+    row = _item_version(request, list_id, pk)
+    if row is None:
+        return None
+    return item_version_etag(pk, row[0])
+
+
+def item_last_modified(request, list_id, pk):
+    if request.method not in SAFE_METHODS:
+        return None
+    row = _item_version(request, list_id, pk)
+    return row[1] if row is not None else None
+
+
+def item_version_etag(pk, version):
+    return f'"item-{pk}-{version}"'
+
+
+def if_match_version(request, pk):
+    """
+    The item version a write is conditional on, from an If-Match header
+    holding the item's ETag. Returns None without the header or for "*";
+    raises ValueError for anything else.
+    """
+    value = request.headers.get('If-Match', '').strip()
+    if not value or value == '*':
+        return None
+    # GZipMiddleware weakens the ETags of compressed responses.
+    value = value.removeprefix('W/')
+    prefix = f'"item-{pk}-'
+    version = value[len(prefix):-1]
+    if value.startswith(prefix) and value.endswith('"') and version.isdigit():
+        return int(version)
+    raise ValueError("If-Match must be the item's ETag.")
+
+
+# Async views cannot use condition(): it calls the callbacks synchronously.
+
+def list_validators(revision, representation='json'):
+    """
+    (etag, last_modified) for a ListRevision row. Formats other than JSON
+    (a renderer's format, e.g. "msgpack") get ETags of their own, since
+    their bodies differ; content codings weaken the ETag instead (see
+    api.compression).
+    """
+    etag = f'list-{revision.list_id}-{revision.revision}'
+    if representation != 'json':
+        etag += f'-{representation}'
+    return f'"{etag}"', revision.updated_at
+
+
+def item_validators(pk, version, updated_at):
+    return item_version_etag(pk, version), updated_at
+
+
+def conditional_response(request, etag, last_modified):
+    """Return a 304/412 response if the request's preconditions say so."""
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+
+
+def set_validators(request, response, etag, last_modified):
+    if request.method in SAFE_METHODS:
+        response.headers.setdefault('ETag', etag)
+        response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+    return response
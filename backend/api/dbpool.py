@@ -0,0 +1,55 @@
+"""
+Connection pool statistics for GET /api/grocery-items/pool-stats/.
+
+With PostgreSQL and DATABASE_POOL enabled (see backend/settings.py), Django
+checks connections out of a psycopg_pool.ConnectionPool for each request and
+returns them afterwards. Pools are per process, so the numbers describe the
+worker that served the request; `pid` tells workers apart.
+"""
+import os
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def _pool(using):
+    # Only the PostgreSQL backend has a `pool` attribute; it is None when
+    # OPTIONS['pool'] is not set.
+    return getattr(connections[using], 'pool', None)
+
+
+def stats(using=DEFAULT_DB_ALIAS):
+    pool = _pool(using)
+    if pool is None:
+        return {'enabled': False, 'vendor': connections[using].vendor}
+
+    raw = pool.get_stats()
+    # Django opens the pool on first use; until then pool_size counts the
+    # min_size connections it is about to open.
+    size = 0 if pool.closed else raw.get('pool_size', 0)
+    in_use = size - raw.get('pool_available', 0)
+    queued = raw.get('requests_queued', 0)
+    wait_ms = raw.get('requests_wait_ms', 0)
+    return {
+        'enabled': True,
+        'vendor': connections[using].vendor,
+        'pid': os.getpid(),
+        'open': not pool.closed,
+        'min_size': raw['pool_min'],
+        'max_size': raw['pool_max'],
+        'size': size,
+        'in_use': in_use,
+        'available': raw.get('pool_available', 0),
+        'utilization': round(in_use / raw['pool_max'], 3),
+        'waiting': raw.get('requests_waiting', 0),
+        # Checkouts since the pool was created, and how many had to wait
+        # for a free connection.
+        'checkouts': raw.get('requests_num', 0),
+        'checkouts_queued': queued,
+        'checkout_errors': raw.get('requests_errors', 0),
+        'wait_ms_total': wait_ms,
+        'wait_ms_avg': round(wait_ms / queued, 2) if queued else 0,
+        'connections_opened': raw.get('connections_num', 0),
+        'connection_errors': raw.get('connections_errors', 0),
+        'connections_lost': raw.get('connections_lost', 0),
+        'usage_ms_total': raw.get('usage_ms', 0),
+    }
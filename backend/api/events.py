@@ -0,0 +1,242 @@
+"""
+Push notifications for list changes.
+
+Mutation paths publish events through api.changes once their transaction
+commits. Events are fanned out to every subscriber of the broker configured
+by settings.EVENTS_BACKEND:
+
+LocalBroker      in-process only. Enough for a single ASGI worker, and for
+                 tests.
+PostgresBroker   publishes with NOTIFY and runs one LISTEN connection per
+                 process, so every worker's subscribers see every event.
+
+Every event names the list it belongs to, and a subscription only
+receives its own list's events (plus list-less "resync" events from the
+broker itself).
+
+Subscribers are asyncio queues owned by the event loop serving the
+connection (see api.views.grocery_item_events). Publishing is thread-safe:
+sync views run in a worker thread under ASGI and hand events to the loop
+with call_soon_threadsafe. A subscriber that falls behind has its queue
+replaced by a single "resync" event instead of buffering without bound.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+QUEUE_SIZE = 100
+CHANNEL = 'grocery_events'
+# NOTIFY payloads are limited to 8000 bytes.
+MAX_NOTIFY_PAYLOAD = 7500
+LISTEN_RETRY_SECONDS = 1
+KEEPALIVE_SECONDS = 15
+
+
+class Subscription:
+    def __init__(self, broker, loop, list_id=None):
+        self.broker = broker
+        self.loop = loop
+        # None subscribes to every list.
+        self.list_id = list_id
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def _put(self, event):
+        # Runs on self.loop.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({
+                'type': 'resync', 'list': event.get('list'), 'revision': event.get('revision'),
+            })
+
+    def wants(self, event):
+        list_id = event.get('list')
+        return self.list_id is None or list_id is None or list_id == self.list_id
+
+
+def _put_all(subscriptions, event):
+    for subscription in subscriptions:
+        subscription._put(event)
+
+
+class LocalBroker:
+    """Fans events out to the subscribers of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self, list_id=None):
+        """Subscribe from inside a running event loop."""
+        subscription = Subscription(self, asyncio.get_running_loop(), list_id)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        self.deliver(event)
+
+    def deliver(self, event):
+        # One wake-up per event loop rather than per subscriber.
+        by_loop = {}
+        with self._lock:
+            for subscription in self._subscribers:
+                if subscription.wants(event):
+                    by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in by_loop.items():
+            if loop.is_closed():
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+                continue
+            loop.call_soon_threadsafe(_put_all, subscriptions, event)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Cross-process fan-out with Postgres LISTEN/NOTIFY.
+
+    Events are NOTIFYed on the default database connection and delivered to
+    local subscribers by a listener thread, including events published by
+    this process. Oversized events are replaced by a "resync" event that
+    tells clients to fetch the list's changes/ endpoint.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, list_id=None):
+        self._ensure_listener()
+        return super().subscribe(list_id)
+
+    def publish(self, event):
+        payload = json.dumps(event, separators=(',', ':'))
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            payload = json.dumps({
+                'type': 'resync', 'list': event.get('list'), 'revision': event.get('revision'),
+            })
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name='grocery-events-listener', daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg
+
+        params = connection.get_connection_params()
+        reconnecting = False
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(f'LISTEN {CHANNEL}')
+                    if reconnecting:
+                        # Events may have been missed while disconnected.
+                        self.deliver({'type': 'resync', 'revision': None})
+                    reconnecting = True
+                    for notify in conn.notifies():
+                        self.deliver(json.loads(notify.payload))
+            except psycopg.Error:
+                reconnecting = True
+                time.sleep(LISTEN_RETRY_SECONDS)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'EVENTS_BACKEND', 'api.events.LocalBroker')
+                _broker = import_string(backend)()
+    return _broker
+
+
+def publish(event_type, list_id, revision, **data):
+    """Publish an event for a list once the current transaction commits."""
+    event = {'type': event_type, 'list': list_id, 'revision': revision, **data}
+    transaction.on_commit(lambda: get_broker().publish(event), robust=True)
+
+
+class EventStream:
+    """
+    Async iterator of SSE messages for one client.
+
+    The subscription is taken on first iteration, inside the event loop
+    serving the response. close() is registered with StreamingHttpResponse
+    as a resource closer, so the handler unsubscribes deterministically when
+    the client disconnects.
+    """
+
+    def __init__(self, broker, list_id, resume_from=None, keepalive=KEEPALIVE_SECONDS):
+        self.broker = broker
+        self.list_id = list_id
+        self.resume_from = resume_from
+        self.keepalive = keepalive
+        self.subscription = None
+
+    def __aiter__(self):
+        return self._messages()
+
+    async def _messages(self):
+        self.subscription = self.broker.subscribe(self.list_id)
+        try:
+            yield ': connected\n\n'
+            if self.resume_from is not None:
+                yield format_sse({
+                    'type': 'resync', 'list': self.list_id, 'revision': self.resume_from,
+                })
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        self.subscription.get(), timeout=self.keepalive
+                    )
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(event)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.subscription is not None:
+            self.subscription.close()
+
+
+def format_sse(event):
+    """Encode an event as a Server-Sent Events message."""
+    lines = []
+    if event.get('revision') is not None:
+        lines.append(f"id: {event['revision']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
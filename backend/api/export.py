@@ -0,0 +1,41 @@
+import json
+
+from .serializers import ITEM_FIELDS, item_rows
+
+EXPORT_FIELDS = ITEM_FIELDS
+EXPORT_CHUNK_SIZE = 2000
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def iter_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield each item as a dict without caching the queryset."""
+    return item_rows(queryset).iterator(chunk_size=chunk_size)
+
+
+def stream_json_array(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a JSON array of items, one chunk of rows per string."""
+    yield '['
+    first = True
+    batch = []
+    for row in iter_rows(queryset, chunk_size):
+        batch.append(_encode(row))
+        if len(batch) >= chunk_size:
+            yield ('' if first else ',') + ','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ('' if first else ',') + ','.join(batch)
+    yield ']'
+
+
+def stream_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield newline-delimited JSON, one item per line."""
+    batch = []
+    for row in iter_rows(queryset, chunk_size):
+        batch.append(_encode(row))
+        if len(batch) >= chunk_size:
+            yield '\n'.join(batch) + '\n'
+            batch = []
+    if batch:
+        yield '\n'.join(batch) + '\n'
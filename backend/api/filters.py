@@ -0,0 +1,42 @@
+from rest_framework.exceptions import ValidationError
+
+from .categories import cached_id
+from .models import Category
+
+TRUE_VALUES = {'true', '1', 'yes'}
+FALSE_VALUES = {'false', '0', 'no'}
+
+
+def filter_items(queryset, params):
+    """
+    Apply the list filters from the query string.
+
+    ?purchased=true|false  exact match on purchased
+    ?category=Dairy        exact match on category
+    ?name=mil              case-insensitive name prefix
+    """
+    purchased = params.get('purchased')
+    if purchased is not None:
+        value = purchased.lower()
+        if value in TRUE_VALUES:
+            queryset = queryset.filter(purchased=True)
+        elif value in FALSE_VALUES:
+            queryset = queryset.filter(purchased=False)
+        else:
+            raise ValidationError({'purchased': ['Must be true or false.']})
+
+    category = params.get('category')
+    if category:
+        # Compare ids: from the cache when possible, otherwise through a
+        # subquery (no query here, so async views can use this too).
+        category_id = cached_id(category)
+        if category_id is not None:
+            queryset = queryset.filter(category=category_id)
+        else:
+            queryset = queryset.filter(category__in=Category.objects.filter(name=category))
+
+    name = params.get('name')
+    if name:
+        queryset = queryset.filter(name__istartswith=name)
+
+    return queryset
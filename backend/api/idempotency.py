@@ -0,0 +1,174 @@
+"""
+Idempotency-Key support for the mutating API views.
+
+A client retrying a POST, PATCH or DELETE after a dropped connection sends
+the same Idempotency-Key header as the first attempt. The first response is
+stored and replayed to every retry (with an Idempotent-Replayed: true
+header) without running the write again, so a retried create does not fail
+on the name it already added and a retried batch is not applied twice.
+
+Records live in the "idempotency" cache (see settings.CACHES), which
+expires them after IDEMPOTENCY_TTL seconds and bounds how many are kept.
+The key is claimed with cache.add() before the view runs, so a retry that
+arrives while the first attempt is still running gets 409 instead of a
+second write. Reusing a key for a different request (method, path or body)
+gets 422. Server errors and exceptions release the key so the retry runs.
+A replay carries the first response's headers (ETag, Location, ...) except
+hop-by-hop headers, Content-Length and cookies.
+"""
+import functools
+import hashlib
+from wsgiref.util import is_hop_by_hop
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from rest_framework.response import Response
+
+CACHE_ALIAS = 'idempotency'
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# A claim outlives any request; it only matters if a worker dies mid-write.
+IN_PROGRESS_TIMEOUT = 60
+METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+IN_PROGRESS = 'A request with this Idempotency-Key is in progress.'
+# Recomputed or per-client rather than part of the stored response.
+NOT_REPLAYED = ('content-length', 'set-cookie', REPLAYED_HEADER.lower())
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _fingerprint(request):
+    digest = hashlib.sha256()
+    for part in (request.method, request.get_full_path()):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _cache_key(key):
+    return 'grocery:idempotency:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _error(message, status):
+    return Response({'error': message}, status=status)
+
+
+def _json_error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _key_error(key):
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters.'
+    return None
+
+
+def _claimed(record, fingerprint, error):
+    """The response to a retry of a request whose key is already claimed."""
+    if record is None:
+        # Expired between add() and get(); treat as in progress.
+        return error(IN_PROGRESS, 409)
+    if record['fingerprint'] != fingerprint:
+        return error('Idempotency-Key was used for a different request.', 422)
+    if 'status' not in record:
+        return error(IN_PROGRESS, 409)
+    return _replay(record)
+
+
+def _record(fingerprint, response):
+    return {
+        'fingerprint': fingerprint,
+        'status': response.status_code,
+        'content': response.content,
+        'headers': [
+            (name, value) for name, value in response.items()
+            if not is_hop_by_hop(name) and name.lower() not in NOT_REPLAYED
+        ],
+    }
+
+
+def _replay(record):
+    response = HttpResponse(record['content'], status=record['status'])
+    for name, value in record['headers']:
+        response[name] = value
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(view):
+    """
+    Decorate a DRF function view (below @api_view), or an async Django
+    view, to honour Idempotency-Key on its mutating methods.
+    """
+    if iscoroutinefunction(view):
+        return _async_idempotent(view)
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or request.method not in METHODS:
+            return view(request, *args, **kwargs)
+        if message := _key_error(key):
+            return _error(message, 400)
+
+        cache = _cache()
+        cache_key = _cache_key(key)
+        fingerprint = _fingerprint(request)
+        if not cache.add(cache_key, {'fingerprint': fingerprint}, IN_PROGRESS_TIMEOUT):
+            return _claimed(cache.get(cache_key), fingerprint, _error)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        def store(rendered):
+            if rendered.status_code >= 500:
+                cache.delete(cache_key)
+                return
+            cache.set(cache_key, _record(fingerprint, rendered))
+
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
+
+    return wrapper
+
+
+def _async_idempotent(view):
+    # The same protocol for the api.async_views views, which return plain
+    # Django responses and use the async cache API.
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or request.method not in METHODS:
+            return await view(request, *args, **kwargs)
+        if message := _key_error(key):
+            return _json_error(message, 400)
+
+        cache = _cache()
+        cache_key = _cache_key(key)
+        fingerprint = _fingerprint(request)
+        if not await cache.aadd(cache_key, {'fingerprint': fingerprint}, IN_PROGRESS_TIMEOUT):
+            return _claimed(await cache.aget(cache_key), fingerprint, _json_error)
+
+        try:
+            response = await view(request, *args, **kwargs)
+        except Exception:
+            await cache.adelete(cache_key)
+            raise
+        if response.status_code >= 500:
+            await cache.adelete(cache_key)
+        else:
+            await cache.aset(cache_key, _record(fingerprint, response))
+        return response
+
+    return wrapper
@@ -0,0 +1,184 @@
+"""
+Streaming item import for POST .../import/ and `manage.py import_items`.
+
+Rows are read from CSV (a header row naming the columns: name, category,
+quantity, purchased) or NDJSON (one JSON object per line), validated with
+GroceryItemSerializer's rules and inserted with one bulk_create per batch,
+each batch in its own transaction with its own revision. Invalid rows,
+including names already in the list or earlier in the file, are reported
+with their line number and skipped; the rest of the load continues.
+
+Only one batch of rows and at most MAX_REPORTED_ERRORS error entries are
+held at a time, so memory does not grow with the input. Names are checked
+with one query per batch, against the list as committed by earlier batches.
+"""
+import csv
+import json
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from . import summary
+from .batch import GroceryItemBatchSerializer
+from .categories import save_categories
+from .changes import items_saved, list_changed
+from .models import GroceryItem
+from .serializers import DUPLICATE_NAME
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+CONTENT_TYPES = {
+    'text/csv': CSV,
+    'application/x-ndjson': NDJSON,
+    'application/jsonlines': NDJSON,
+}
+IMPORT_FIELDS = ('name', 'category', 'quantity', 'purchased')
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_BATCH_SIZE = 10000
+MAX_REPORTED_ERRORS = 100
+
+
+def decode_lines(lines):
+    """Decode an iterable of UTF-8 byte lines (a file or request body)."""
+    for number, line in enumerate(lines):
+        text = line.decode('utf-8', errors='replace')
+        yield text.lstrip('\ufeff') if number == 0 else text
+
+
+def _parse_error(message):
+    return {'non_field_errors': [message]}
+
+
+def read_csv(lines):
+    """Yield (line number, row, None) or (line number, None, errors) for CSV text lines."""
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            # The reader has consumed the bad record and can go on.
+            yield reader.line_num, None, _parse_error(f'CSV parse error - {exc}')
+            continue
+        # Empty cells fall back to the field defaults, like omitted keys.
+        yield reader.line_num, {
+            field: value for field, value in row.items()
+            if field in IMPORT_FIELDS and value not in ('', None)
+        }, None
+
+
+def read_ndjson(lines):
+    """Yield (line number, row, None) or (line number, None, errors) for NDJSON text lines."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, _parse_error(f'JSON parse error - {exc}')
+            continue
+        if not isinstance(row, dict):
+            yield number, None, _parse_error('Expected a JSON object.')
+            continue
+        yield number, row, None
+
+
+READERS = {CSV: read_csv, NDJSON: read_ndjson}
+
+
+class ItemImport:
+    """
+    Import rows into one list. feed() takes the (line, row, errors) triples
+    the readers yield; report() returns the outcome.
+    """
+
+    def __init__(self, list_id, batch_size=IMPORT_BATCH_SIZE):
+        self.list_id = list_id
+        self.batch_size = batch_size
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self._batch = []
+        # One serializer validates every row: building a ModelSerializer's
+        # fields costs more than validating a row with them.
+        self._serializer = GroceryItemBatchSerializer()
+
+    def feed(self, rows):
+        for line, row, errors in rows:
+            if errors:
+                self.fail(line, errors)
+                continue
+            try:
+                fields = self._serializer.run_validation(row)
+            except ValidationError as exc:
+                self.fail(line, exc.detail)
+                continue
+            self._batch.append((line, fields))
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+        self.flush()
+
+    def fail(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def flush(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        try:
+            created, duplicates = self._insert(batch)
+        except IntegrityError:
+            # Only reachable if a name slipped past the check; the batch
+            # was rolled back as a whole.
+            created, duplicates = 0, [line for line, _ in batch]
+        self.created += created
+        for line in duplicates:
+            self.fail(line, {'name': [DUPLICATE_NAME]})
+
+    @transaction.atomic
+    def _insert(self, batch):
+        revision = list_changed(self.list_id)
+        save_categories(fields for _, fields in batch)
+        # Checked after list_changed() so the list's writers are locked out.
+        taken = set(
+            GroceryItem.objects.filter(
+                list_id=self.list_id, name__in={fields['name'] for _, fields in batch}
+            ).values_list('name', flat=True)
+        )
+        items = []
+        duplicates = []
+        for line, fields in batch:
+            if fields['name'] in taken:
+                duplicates.append(line)
+                continue
+            taken.add(fields['name'])
+            items.append(GroceryItem(**fields, list_id=self.list_id, revision=revision))
+        GroceryItem.objects.bulk_create(items)
+        delta = summary.SummaryDelta(self.list_id)
+        for item in items:
+            delta.add(item)
+        delta.apply()
+        items_saved(self.list_id, revision, items, created=True)
+        return len(items), duplicates
+
+    def report(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_items(list_id, lines, format, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import items from an iterable of byte lines in `format` (CSV or NDJSON)
+    into a list. Returns the report dict.
+    """
+    job = ItemImport(list_id, batch_size)
+    job.feed(READERS[format](decode_lines(lines)))
+    return job.report()
@@ -0,0 +1,71 @@
+"""
+Background runs of the bulk writes (delete-all, update-purchased) started
+with ?background=1, and their progress at .../items/jobs/<job_id>/.
+
+A job runs in a thread of the worker process that accepted it and reports
+after every committed batch. Its record lives in the default cache
+(CACHE_URL) under a random id, so with a shared cache any worker can
+answer the status request. A job whose process exits mid-run keeps its
+committed batches and stays "running" until the record expires; repeating
+the request finishes the work.
+"""
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY = 'grocery:job:{job_id}'
+JOB_TIMEOUT = 24 * 60 * 60
+RUNNING, DONE, FAILED = 'running', 'done', 'failed'
+
+
+def start(operation, list_id, func, *args):
+    """
+    Run func(*args, progress=...) in a new thread. Returns the job record:
+    {"id", "operation", "list_id", "state", "processed", "error"}.
+    """
+    job = {
+        'id': uuid.uuid4().hex,
+        'operation': operation,
+        'list_id': list_id,
+        'state': RUNNING,
+        'processed': 0,
+        'error': None,
+    }
+    _save(job)
+    thread = threading.Thread(
+        target=_run, args=(job, func, args), name=f'grocery-job-{job["id"]}', daemon=True
+    )
+    thread.start()
+    return job
+
+
+def get(job_id):
+    """The job's current record, or None if it is unknown or expired."""
+    return cache.get(JOB_KEY.format(job_id=job_id))
+
+
+def _run(job, func, args):
+    def progress(processed):
+        job['processed'] = processed
+        _save(job)
+
+    try:
+        job['processed'] = func(*args, progress=progress)
+        job['state'] = DONE
+    except Exception as exc:
+        logger.exception('Background %s of list %s failed', job['operation'], job['list_id'])
+        job['state'] = FAILED
+        job['error'] = str(exc)
+    finally:
+        _save(job)
+        # Connections are per thread; this one's would otherwise stay open.
+        connections.close_all()
+
+
+def _save(job):
+    cache.set(JOB_KEY.format(job_id=job['id']), dict(job), JOB_TIMEOUT)
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api.models import ListRevision, Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete old delta-sync tombstones. Clients that last synced before "
+        "the compacted revision are told to refetch the full list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help='Keep tombstones newer than this many days (default: 7).',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # Revisions are per list, so each list is compacted through its own
+        # newest old tombstone.
+        old = (
+            Tombstone.objects.filter(deleted_at__lt=cutoff)
+            .values('list').annotate(through=Max('revision')).order_by('list')
+        )
+        compacted = 0
+        deleted = 0
+        for row in old:
+            list_id, through = row['list'], row['through']
+            with transaction.atomic():
+                # Revision-ordered, so everything up to `through` goes.
+                count, _ = Tombstone.objects.filter(
+                    list_id=list_id, revision__lte=through
+                ).delete()
+                ListRevision.objects.filter(
+                    list_id=list_id, compacted_through__lt=through
+                ).update(compacted_through=through)
+            compacted += 1
+            deleted += count
+        if not compacted:
+            self.stdout.write('Nothing to compact.')
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f'Removed {deleted} tombstones from {compacted} lists.')
+        )
@@ -0,0 +1,59 @@
+import json
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import importer
+from api.models import DEFAULT_LIST_ID, GroceryList
+
+EXTENSIONS = {'.csv': importer.CSV, '.ndjson': importer.NDJSON, '.jsonl': importer.NDJSON}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import grocery items from a CSV (with a header row) or NDJSON file "
+        "into a list, in batched transactions. Invalid rows are reported "
+        "and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for standard input.')
+        parser.add_argument(
+            '--list', type=int, default=DEFAULT_LIST_ID, dest='list_id',
+            help=f'Id of the list to import into (default: {DEFAULT_LIST_ID}).',
+        )
+        parser.add_argument(
+            '--format', choices=importer.FORMATS,
+            help='Input format (default: from the file extension).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=importer.IMPORT_BATCH_SIZE,
+            help=f'Rows per transaction (default: {importer.IMPORT_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, path, list_id, format, batch_size, **options):
+        format = format or EXTENSIONS.get(Path(path).suffix.lower())
+        if format is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if not GroceryList.objects.filter(pk=list_id).exists():
+            raise CommandError(f'There is no list {list_id}.')
+
+        if path == '-':
+            report = importer.import_items(list_id, sys.stdin.buffer, format, batch_size)
+        else:
+            try:
+                with open(path, 'rb') as lines:
+                    report = importer.import_items(list_id, lines, format, batch_size)
+            except OSError as exc:
+                raise CommandError(exc)
+
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        if report['errors_truncated']:
+            self.stderr.write(f"... only the first {len(report['errors'])} errors are shown.")
+        message = f"Imported {report['created']} items; {report['failed']} rows failed."
+        style = self.style.WARNING if report['failed'] else self.style.SUCCESS
+        self.stdout.write(style(message))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api import summary
+from api.models import GroceryList
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every list's per-category summary counters from the grocery "
+        "items, fixing any drift from writes made outside the API."
+    )
+
+    def handle(self, *args, **options):
+        # One transaction per list, so only one list is locked at a time.
+        repaired = sum(
+            summary.rebuild(list_id)
+            for list_id in GroceryList.objects.order_by('id').values_list('id', flat=True)
+        )
+        if not repaired:
+            self.stdout.write('Summary counters are consistent.')
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f'Repaired counters for {repaired} categories.')
+        )
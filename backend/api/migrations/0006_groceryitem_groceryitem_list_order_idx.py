@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_alter_groceryitem_options_alter_groceryitem_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='groceryitem',
+            index=models.Index(fields=['purchased', 'category', 'id'], name='groceryitem_list_order_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_existing_items(apps, schema_editor):
+    # Give existing rows a non-zero revision so ?since=0 returns them.
+    ListRevision = apps.get_model('api', 'ListRevision')
+    GroceryItem = apps.get_model('api', 'GroceryItem')
+    ListRevision.objects.get_or_create(pk=1)
+    ListRevision.objects.filter(pk=1).update(revision=F('revision') + 1)
+    revision = ListRevision.objects.get(pk=1).revision
+    GroceryItem.objects.update(revision=revision)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_groceryitem_updated_at_listrevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groceryitem',
+            name='revision',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='listrevision',
+            name='compacted_through',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.BigIntegerField(blank=True, null=True)),
+                ('revision', models.PositiveBigIntegerField(db_index=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(stamp_existing_items, migrations.RunPython.noop),
+    ]
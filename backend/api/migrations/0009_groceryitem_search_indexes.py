@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Django's icontains compares UPPER(column::text) on PostgreSQL; indexing the
+# same expression with gin_trgm_ops lets api.search use the indexes for
+# substring matches. SQLite gets an FTS5 table instead, installed after
+# migrate by api.signals.install_search_index.
+TRIGRAM_INDEXES = {
+    'groceryitem_name_trgm_idx': 'name',
+    'groceryitem_category_trgm_idx': 'category',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index} ON api_groceryitem '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_groceryitem_revision_tombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
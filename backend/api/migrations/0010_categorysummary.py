@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_summary(apps, schema_editor):
+    GroceryItem = apps.get_model('api', 'GroceryItem')
+    CategorySummary = apps.get_model('api', 'CategorySummary')
+    rows = GroceryItem.objects.values('category').annotate(
+        item_count=Count('id'),
+        total_quantity=Sum('quantity'),
+        purchased_count=Count('id', filter=Q(purchased=True)),
+    )
+    CategorySummary.objects.bulk_create(CategorySummary(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_groceryitem_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100, unique=True)),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('purchased_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,132 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+import api.models
+
+DEFAULT_CATEGORY = 'Other'
+
+
+def create_categories(apps, schema_editor):
+    Category = apps.get_model('api', 'Category')
+    GroceryItem = apps.get_model('api', 'GroceryItem')
+    names = set(GroceryItem.objects.values_list('category', flat=True).distinct())
+    names.add(DEFAULT_CATEGORY)
+    Category.objects.bulk_create(Category(name=name) for name in sorted(names))
+
+
+def link_categories(apps, schema_editor):
+    Category = apps.get_model('api', 'Category')
+    GroceryItem = apps.get_model('api', 'GroceryItem')
+    for pk, name in Category.objects.values_list('id', 'name'):
+        GroceryItem.objects.filter(category=name).update(category_ref=pk)
+
+
+def unlink_categories(apps, schema_editor):
+    Category = apps.get_model('api', 'Category')
+    GroceryItem = apps.get_model('api', 'GroceryItem')
+    for pk, name in Category.objects.values_list('id', 'name'):
+        GroceryItem.objects.filter(category_ref=pk).update(category=name)
+
+
+def _aggregate(items, key):
+    return items.values(key).annotate(
+        item_count=Count('id'),
+        total_quantity=Sum('quantity'),
+        purchased_count=Count('id', filter=Q(purchased=True)),
+    )
+
+
+def build_summary(apps, schema_editor):
+    GroceryItem = apps.get_model('api', 'GroceryItem')
+    CategorySummary = apps.get_model('api', 'CategorySummary')
+    CategorySummary.objects.bulk_create(
+        CategorySummary(
+            category_id=row.pop('category'), **row
+        ) for row in _aggregate(GroceryItem.objects.order_by(), 'category')
+    )
+
+
+def build_name_summary(apps, schema_editor):
+    # Reverse only: refill the CharField-keyed summary table.
+    GroceryItem = apps.get_model('api', 'GroceryItem')
+    CategorySummary = apps.get_model('api', 'CategorySummary')
+    CategorySummary.objects.bulk_create(
+        CategorySummary(
+            category=row.pop('category__name'), **row
+        ) for row in _aggregate(GroceryItem.objects.order_by(), 'category__name')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_categorysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Categories',
+            },
+        ),
+        migrations.RunPython(create_categories, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='groceryitem',
+            name='groceryitem_list_order_idx',
+        ),
+        migrations.AddField(
+            model_name='groceryitem',
+            name='category_ref',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.PROTECT,
+                related_name='+', to='api.category',
+            ),
+        ),
+        migrations.RunPython(link_categories, unlink_categories),
+        migrations.RemoveField(
+            model_name='groceryitem',
+            name='category',
+        ),
+        migrations.RenameField(
+            model_name='groceryitem',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.AlterField(
+            model_name='groceryitem',
+            name='category',
+            field=models.ForeignKey(
+                default=api.models.default_category,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='items', to='api.category',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='groceryitem',
+            index=models.Index(fields=['purchased', 'category', 'id'], name='groceryitem_list_order_idx'),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, build_name_summary),
+        migrations.DeleteModel(
+            name='CategorySummary',
+        ),
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('purchased_count', models.IntegerField(default=0)),
+                ('category', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='summary', to='api.category',
+                )),
+            ],
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,135 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+DEFAULT_LIST_ID = 1
+
+
+def create_default_list(apps, schema_editor):
+    GroceryList = apps.get_model('api', 'GroceryList')
+    GroceryList.objects.create(id=DEFAULT_LIST_ID, name='Groceries')
+    # The id was given explicitly, so PostgreSQL's sequence has not moved.
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [GroceryList]):
+            cursor.execute(sql)
+
+
+def link_revision(apps, schema_editor):
+    # The singleton revision row becomes the default list's.
+    ListRevision = apps.get_model('api', 'ListRevision')
+    ListRevision.objects.exclude(pk=1).delete()
+    if not ListRevision.objects.filter(pk=1).update(list_id=DEFAULT_LIST_ID):
+        ListRevision.objects.create(list_id=DEFAULT_LIST_ID)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroceryList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_default_list, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='listrevision',
+            name='list',
+            field=models.OneToOneField(
+                null=True, on_delete=django.db.models.deletion.CASCADE,
+                related_name='+', to='api.grocerylist',
+            ),
+        ),
+        migrations.RunPython(link_revision, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='listrevision',
+            name='list',
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='+', to='api.grocerylist',
+            ),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='list',
+            field=models.ForeignKey(
+                default=DEFAULT_LIST_ID, on_delete=django.db.models.deletion.CASCADE,
+                related_name='+', to='api.grocerylist',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='tombstone',
+            name='revision',
+            field=models.PositiveBigIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['list', 'revision'], name='tombstone_list_revision_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='groceryitem',
+            name='groceryitem_list_order_idx',
+        ),
+        migrations.AddField(
+            model_name='groceryitem',
+            name='list',
+            field=models.ForeignKey(
+                default=DEFAULT_LIST_ID, on_delete=django.db.models.deletion.CASCADE,
+                related_name='items', to='api.grocerylist',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='groceryitem',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='groceryitem',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='groceryitem',
+            constraint=models.UniqueConstraint(fields=['list', 'name'], name='groceryitem_unique_list_name'),
+        ),
+        migrations.AddIndex(
+            model_name='groceryitem',
+            index=models.Index(fields=['list', 'purchased', 'category', 'id'], name='groceryitem_list_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groceryitem',
+            index=models.Index(fields=['list', 'revision'], name='groceryitem_list_revision_idx'),
+        ),
+        migrations.AlterField(
+            model_name='categorysummary',
+            name='category',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='summaries', to='api.category',
+            ),
+        ),
+        migrations.AddField(
+            model_name='categorysummary',
+            name='list',
+            field=models.ForeignKey(
+                default=DEFAULT_LIST_ID, on_delete=django.db.models.deletion.CASCADE,
+                related_name='+', to='api.grocerylist',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name='categorysummary',
+            constraint=models.UniqueConstraint(
+                fields=['list', 'category'], name='categorysummary_unique_list_category'
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Queries shorter than a trigram only match name prefixes, which Django
+# compiles to UPPER(name::text) LIKE 'X%' on PostgreSQL. The trigram index
+# from 0009 cannot serve those, so without this index they scanned the
+# whole list. text_pattern_ops lets a btree answer LIKE prefixes under any
+# collation; list_id first keeps the range inside one list. The same index
+# serves ?name= prefix filters on the list endpoint. SQLite has its own
+# (list_id, lower(name)) index, installed by api.search.
+#
+# 0009's trigram index on category went away with the category column in
+# 0011: categories are matched in the small api_category table instead.
+PREFIX_INDEX = 'groceryitem_list_upper_name_idx'
+
+
+def create_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {PREFIX_INDEX} ON api_groceryitem '
+        f'(list_id, (UPPER(name::text)) text_pattern_ops)'
+    )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {PREFIX_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_groceryitem_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
@@ -1,18 +1,167 @@
 from django.db import models
+from django.db.models import F
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 
-class GroceryItem(models.Model):
+DEFAULT_CATEGORY = 'Other'
+# The list served by the unscoped /api/grocery-items/ endpoints.
+DEFAULT_LIST_ID = 1
+
+
+class GroceryList(models.Model):
+    """
+    One household's list. Items, revisions, tombstones and summary counters
+    are all partitioned by list, so writes to one list never lock or scan
+    another list's rows.
+    """
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+
+class Category(models.Model):
+    """
+    A category name, stored once and referenced by id from every item.
+    Categories are created on first use and never renamed or deleted by the
+    app; api.categories caches the id <-> name mapping per process.
+    """
+    id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100, unique=True)
-    category = models.CharField(max_length=100, default='Other')
+
+    class Meta:
+        verbose_name_plural = 'Categories'
+
+    def __str__(self):
+        return self.name
+
+
+def default_category():
+    from .categories import get_category
+    return get_category(DEFAULT_CATEGORY).pk
+
+
+class GroceryItem(models.Model):
+    list = models.ForeignKey(
+        GroceryList, on_delete=models.CASCADE, default=DEFAULT_LIST_ID, related_name='items'
+    )
+    name = models.CharField(max_length=100)
+    category = models.ForeignKey(
+        Category, on_delete=models.PROTECT, default=default_category, related_name='items'
+    )
     purchased = models.BooleanField(default=False)
     quantity = models.IntegerField(
         default=1,
         validators=[MinValueValidator(1)]
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # The list's ListRevision.revision at the item's last change, for delta
+    # sync.
+    revision = models.PositiveBigIntegerField(default=0)
+    # Incremented by every write to the item. The item ETag, and what PATCH
+    # with If-Match or a version compares against (optimistic concurrency).
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     def __str__(self):
         return f"{self.name} ({self.quantity})"
 
     class Meta:
         verbose_name = 'Grocery Item'
-        verbose_name_plural = 'Grocery Items'
\ No newline at end of file
+        verbose_name_plural = 'Grocery Items'
+        constraints = [
+            models.UniqueConstraint(fields=['list', 'name'], name='groceryitem_unique_list_name'),
+        ]
+        indexes = [
+            # Matches the list ordering used by KeysetPagination.
+            models.Index(
+                fields=['list', 'purchased', 'category', 'id'],
+                name='groceryitem_list_order_idx',
+            ),
+            models.Index(fields=['list', 'revision'], name='groceryitem_list_revision_idx'),
+        ]
+
+
+class ListRevision(models.Model):
+    """
+    Per-list counter bumped on every change to that list.
+    Used as the list ETag so unchanged polls can be answered with a 304
+    from one indexed lookup instead of a table scan, as the sync position
+    for the list's changes/ endpoint, and as the row lock that serializes
+    the list's writers.
+    """
+    list = models.OneToOneField(GroceryList, on_delete=models.CASCADE, related_name='+')
+    revision = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    # Tombstones at or below this revision have been compacted away.
+    compacted_through = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"list {self.list_id} revision {self.revision}"
+
+    @classmethod
+    def current(cls, list_id):
+        """The list's revision row; raises DoesNotExist for unknown lists."""
+        return cls.objects.get(list_id=list_id)
+
+    @classmethod
+    async def acurrent(cls, list_id):
+        return await cls.objects.aget(list_id=list_id)
+
+    @classmethod
+    def bump(cls, list_id):
+        """
+        Increment the list's revision and return the new value. Call inside
+        the write's transaction: the row lock taken by the UPDATE serializes
+        the list's writers, so revisions are assigned in commit order.
+        Raises DoesNotExist for unknown lists.
+        """
+        rows = cls.objects.filter(list_id=list_id)
+        if not rows.update(revision=F('revision') + 1, updated_at=timezone.now()):
+            raise cls.DoesNotExist(f'No grocery list {list_id}.')
+        return rows.values_list('revision', flat=True).get()
+
+
+class Tombstone(models.Model):
+    """
+    Marks an item deleted at a revision so delta sync can report it.
+    A tombstone without an item_id records that the whole list was cleared.
+    """
+    list = models.ForeignKey(GroceryList, on_delete=models.CASCADE, related_name='+')
+    item_id = models.BigIntegerField(null=True, blank=True)
+    revision = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['list', 'revision'], name='tombstone_list_revision_idx'),
+        ]
+
+    def __str__(self):
+        target = self.item_id if self.item_id is not None else 'all items'
+        return f"{target} deleted at revision {self.revision}"
+
+
+class CategorySummary(models.Model):
+    """
+    Per-list, per-category totals for the summary/ endpoints. Maintained
+    incrementally by api.summary inside each write's transaction, so reads
+    never aggregate the item table; `manage.py repair_summary` recomputes
+    them from the items. Counts are signed so that drift (items written
+    outside the API) shows up instead of failing writes.
+    """
+    list = models.ForeignKey(GroceryList, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='summaries')
+    item_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    purchased_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['list', 'category'], name='categorysummary_unique_list_category'
+            ),
+        ]
+
+    def __str__(self):
+        return f"list {self.list_id}, {self.category_id}: {self.item_count} items"
@@ -0,0 +1,301 @@
+"""
+Write operations shared by the sync (api.views) and async
+(api.async_views) grocery item views. Item writes take the id of the list
+they write to (or read it from the item) and only touch that list's rows.
+
+Each function validates through GroceryItemSerializer where input is
+involved and performs the write together with its api.changes hooks and
+api.summary counter updates in one transaction (one per batch for the
+whole-list writes). Validation results are returned as (data, errors)
+pairs so the caller decides how to build the response.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import cache, summary
+from .categories import save_categories
+from .changes import (
+    items_bulk_updated, items_deleted, items_saved, list_changed, list_cleared,
+)
+from .models import DEFAULT_LIST_ID, GroceryItem, GroceryList
+from .returning import old_item, returned_item, update_returning, upsert_returning
+from .serializers import GroceryItemSerializer, GroceryListSerializer, serialize_item
+
+DEFAULT_LIST_UNDELETABLE = 'The default list cannot be deleted.'
+
+# ?on_conflict= modes of POST when the name already exists in the list:
+# add the posted quantity to the item's, or overwrite the posted fields.
+INCREMENT = 'increment'
+REPLACE = 'replace'
+ON_CONFLICT_MODES = (INCREMENT, REPLACE)
+UPSERT_FIELDS = ('category', 'quantity', 'purchased')
+# The item fields the summary counters depend on.
+SUMMARY_FIELDS = ('category', 'quantity', 'purchased')
+
+VERSION_CONFLICT = 'The item was changed by another request.'
+_version_field = serializers.IntegerField(min_value=1)
+_purchased_field = serializers.BooleanField()
+
+
+class VersionConflict(Exception):
+    """A conditional write found the item at another version."""
+
+    def __init__(self, item):
+        super().__init__(VERSION_CONFLICT)
+        # The current item data, so the client can merge without a refetch.
+        self.item = item
+
+
+def create_item(list_id, data):
+    """Create an item in a list. Returns (item data, None) or (None, errors)."""
+    serializer = GroceryItemSerializer(data=data, context={'list_id': list_id})
+    if not serializer.is_valid():
+        return None, serializer.errors
+    with transaction.atomic():
+        revision = list_changed(list_id)
+        save_categories([serializer.validated_data])
+        item = serializer.save(list_id=list_id, revision=revision)
+        delta = summary.SummaryDelta(list_id)
+        delta.add(item)
+        delta.apply()
+        items_saved(list_id, revision, [item], created=True)
+    return serializer.data, None
+
+
+def upsert_item(list_id, data, on_conflict):
+    """
+    Create an item, or change the list's item of the same name as
+    `on_conflict` says. Returns (item data, created, None) or
+    (None, False, errors).
+
+    The write is a single INSERT ... ON CONFLICT (list, name) DO UPDATE ...
+    RETURNING instead of a uniqueness SELECT, an INSERT, and a client retry.
+    A new row is the only one returned at version 1. An increment changes
+    only the quantity, by the posted amount, so its summary delta follows
+    from the returned row. A replace may move the item to another category
+    or change whether it is purchased, and neither database returns the
+    values an upsert overwrote, so that mode reads the old counter fields
+    first, under the list lock.
+    """
+    serializer = GroceryItemSerializer(data=data, context={'on_conflict': on_conflict})
+    if not serializer.is_valid():
+        return None, False, serializer.errors
+    fields = serializer.validated_data
+    if on_conflict == INCREMENT:
+        changes = {'add': ['quantity']}
+    else:
+        changes = {'replace': [field for field in UPSERT_FIELDS if field in fields]}
+    with transaction.atomic():
+        revision = list_changed(list_id)
+        save_categories([fields])
+        existing = None
+        if on_conflict == REPLACE:
+            existing = (
+                GroceryItem.objects.filter(list_id=list_id, name=fields['name'])
+                .only('category', 'quantity', 'purchased').first()
+            )
+        posted = GroceryItem(list_id=list_id, revision=revision, **fields)
+        row = upsert_returning(posted, **changes)
+        item = returned_item(row, list_id=list_id, revision=revision, updated_at=posted.updated_at)
+        created = item.version == 1
+        delta = summary.SummaryDelta(list_id)
+        if created:
+            delta.add(item)
+        elif on_conflict == INCREMENT:
+            delta.add_quantity(item.category_id, posted.quantity)
+        else:
+            delta.remove(existing)
+            delta.add(item)
+        delta.apply()
+        items_saved(list_id, revision, [item], created=created)
+    return serialize_item(item), created, None
+
+
+def update_item(list_id, pk, data, version=None):
+    """
+    Partially update the list's item `pk`. Returns (item data, None) or
+    (None, errors); raises GroceryItem.DoesNotExist for an unknown item.
+
+    The write is one UPDATE ... RETURNING with no lookup first: it returns
+    the updated row and, from a CTE read before it runs, the old category,
+    quantity and purchased flag for the summary counters. Passing `version`
+    (from If-Match), or a "version" in `data`, makes the update conditional:
+    if the item is at another version nothing is written and VersionConflict
+    is raised with the current item.
+    """
+    if version is None and isinstance(data, dict) and 'version' in data:
+        try:
+            version = _version_field.run_validation(data['version'])
+        except serializers.ValidationError as exc:
+            return None, {'version': exc.detail}
+    serializer = GroceryItemSerializer(
+        data=data, partial=True, context={'list_id': list_id, 'pk': pk}
+    )
+    if not serializer.is_valid():
+        return None, serializer.errors
+    fields = serializer.validated_data
+    with transaction.atomic():
+        revision = list_changed(list_id)
+        save_categories([fields])
+        rows = GroceryItem.objects.filter(list_id=list_id, pk=pk)
+        if version is not None:
+            rows = rows.filter(version=version)
+        now = timezone.now()
+        returned = update_returning(
+            rows, {**fields, 'version': F('version') + 1, 'revision': revision, 'updated_at': now},
+            old=SUMMARY_FIELDS,
+        )
+        if not returned:
+            # Only a failed write reads the item, to tell why.
+            current = GroceryItem.objects.filter(list_id=list_id, pk=pk).first()
+            if current is None:
+                raise GroceryItem.DoesNotExist('No such grocery item.')
+            raise VersionConflict(serialize_item(current))
+        [row] = returned
+        item = returned_item(row, list_id=list_id, revision=revision, updated_at=now)
+        delta = summary.SummaryDelta(list_id)
+        delta.remove(old_item(row, SUMMARY_FIELDS))
+        delta.add(item)
+        delta.apply()
+        items_saved(list_id, revision, [item])
+    return serialize_item(item), None
+
+
+def delete_item(item):
+    pk, list_id = item.pk, item.list_id
+    with transaction.atomic():
+        revision = list_changed(list_id)
+        delta = summary.SummaryDelta(list_id)
+        delta.remove_rows(GroceryItem.objects.filter(pk=pk))
+        item.delete()
+        delta.apply()
+        items_deleted(list_id, revision, [pk])
+
+
+def delete_all_items(list_id, batch_size=None, progress=None):
+    """
+    Delete every item of a list. Returns the number of items deleted.
+    Runs in batches; see _in_batches().
+    """
+    def delete(revision, rows, last):
+        if last:
+            count, _ = rows.delete()
+            summary.clear(list_id)
+            list_cleared(list_id, revision)
+        else:
+            delta = summary.SummaryDelta(list_id)
+            delta.remove_rows(rows)
+            count, _ = rows.delete()
+            delta.apply()
+        return count
+
+    rows = GroceryItem.objects.filter(list_id=list_id)
+    return _in_batches(list_id, rows, delete, batch_size, progress)
+
+
+def purchased_value(data):
+    """
+    The "purchased" of an update-purchased body as a bool. Returns
+    (purchased, None) or (None, errors).
+    """
+    if not isinstance(data, dict) or data.get('purchased') is None:
+        return None, {'error': 'purchased field is required'}
+    try:
+        return _purchased_field.to_internal_value(data['purchased']), None
+    except serializers.ValidationError as exc:
+        return None, {'purchased': exc.detail}
+
+
+def set_all_purchased(list_id, purchased, batch_size=None, progress=None):
+    """
+    Set purchased (a bool; see purchased_value()) on every item of a list.
+    Returns the number of items changed: rows that already have the value
+    are not rewritten. Runs in batches; see _in_batches().
+    """
+    def update(revision, rows, last):
+        delta = summary.SummaryDelta(list_id)
+        if not last:
+            delta.set_purchased_rows(rows, purchased)
+        count = rows.update(
+            purchased=purchased, updated_at=timezone.now(), revision=revision,
+            version=F('version') + 1,
+        )
+        if last:
+            summary.set_all_purchased(list_id, purchased)
+            items_bulk_updated(list_id, revision, purchased=purchased)
+        else:
+            delta.apply()
+        return count
+
+    rows = GroceryItem.objects.filter(list_id=list_id).exclude(purchased=purchased)
+    return _in_batches(list_id, rows, update, batch_size, progress)
+
+
+def _in_batches(list_id, rows, apply, batch_size=None, progress=None):
+    """
+    Call apply(revision, batch, last) on `rows` of a list, batch_size
+    (settings.BULK_BATCH_SIZE) rows at a time in id order, each batch in
+    its own transaction. `apply` must take the batch's rows out of `rows`
+    (delete them or change the filtered column). Returns the sum of what
+    `apply` returns; progress(total) is called after each commit.
+
+    A large list is therefore never locked, or written in one transaction,
+    for the whole run. Batches walk the ids upwards; the last one takes
+    every row still in `rows`, including any that changed back behind the
+    walk, and is the one that announces the change as a whole (the clear
+    marker, the bulk_updated event). Readers in between see the earlier
+    batches' rows already changed.
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    total = 0
+    after = 0
+    last = False
+    while not last:
+        with transaction.atomic():
+            revision = list_changed(list_id)
+            # The batch's last id and the one after it, if there is one.
+            bounds = list(
+                rows.filter(id__gt=after).order_by('id')
+                .values_list('id', flat=True)[batch_size - 1:batch_size + 1]
+            )
+            last = len(bounds) < 2
+            if last:
+                batch = rows
+            else:
+                batch = rows.filter(id__gt=after, id__lte=bounds[0])
+                after = bounds[0]
+            total += apply(revision, batch, last)
+        if progress is not None:
+            progress(total)
+    return total
+
+
+def create_list(data):
+    """Create a grocery list. Returns (list data, None) or (None, errors)."""
+    serializer = GroceryListSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    # The list's ListRevision row is created by api.signals in the same
+    # transaction.
+    with transaction.atomic():
+        serializer.save()
+    return serializer.data, None
+
+
+def delete_list(grocery_list):
+    """
+    Delete a list with its items, tombstones and counters. Returns an error
+    dict for the default list, which the unscoped endpoints serve.
+    """
+    if grocery_list.pk == DEFAULT_LIST_ID:
+        return {'error': DEFAULT_LIST_UNDELETABLE}
+    list_id = grocery_list.pk
+    with transaction.atomic():
+        # Lock the list against concurrent writers before deleting it.
+        list_changed(list_id)
+        grocery_list.delete()
+    cache.invalidate(list_id)
+    return None
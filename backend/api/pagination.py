@@ -0,0 +1,174 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the (purchased, category_id, id) ordering.
+
+    Each page is fetched with a WHERE clause seeking past the last row of the
+    previous page, so the cost of a page does not depend on how deep into the
+    list it is. The matching composite index lives on GroceryItem.Meta.
+
+    Categories are grouped in id order, which is the order they were first
+    used in, not by name: sorting on the name would need a join with
+    api_category that the index cannot serve, so every page would sort all
+    of the list's rows again.
+    """
+    ordering = ('purchased', 'category_id', 'id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request)
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async variant for api.async_views; `request` may be an HttpRequest."""
+        queryset = self._page_queryset(queryset, request)
+        return self._set_page([row async for row in queryset])
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.seek(*position))
+        # Fetch one extra row to find out whether there is a next page.
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, results):
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        return _page_size(self, request)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [self._value(last, field) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def seek(self, purchased, category, pk):
+        """Rows strictly after (purchased, category, pk) in list order."""
+        return (
+            Q(purchased__gt=purchased)
+            | Q(purchased=purchased, category__gt=category)
+            | Q(purchased=purchased, category=category, id__gt=pk)
+        )
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = _params(request).get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            purchased, category, pk = json.loads(base64.urlsafe_b64decode(padded))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(purchased, bool) or type(category) is not int or type(pk) is not int:
+            raise NotFound(self.invalid_cursor_message)
+        return purchased, category, pk
+
+    def get_paginated_data(self, data):
+        """The paginated body without DRF's Response, for async views."""
+        return {'next': self.get_next_link(), 'results': data}
+
+    @staticmethod
+    def _value(row, field):
+        # item_rows() dicts hold the category name; ItemRow keeps the id as
+        # an attribute.
+        if isinstance(row, dict) and field in row:
+            return row[field]
+        return getattr(row, field)
+
+
+class RankedPagination(BasePagination):
+    """
+    Page-number pagination for ranked results, which have no stable column
+    to seek on. Responses have the same {"next", "results"} shape as
+    KeysetPagination. The caller fetches `limit` rows starting at `offset`
+    (one more than the page size, to detect a next page) and hands them to
+    paginate_rows().
+    """
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    # Deep pages of a relevance ranking are rarely useful and cost an
+    # ever-larger OFFSET.
+    max_page = 50
+    invalid_page_message = 'Invalid page'
+
+    def get_window(self, request):
+        """Return (offset, limit) for the requested page."""
+        self.request = request
+        self.page_size = _page_size(self, request)
+        try:
+            self.page_number = int(_params(request).get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if not 1 <= self.page_number <= self.max_page:
+            raise NotFound(self.invalid_page_message)
+        return (self.page_number - 1) * self.page_size, self.page_size + 1
+
+    def paginate_rows(self, rows):
+        self.has_next = len(rows) > self.page_size and self.page_number < self.max_page
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+
+def _page_size(paginator, request):
+    try:
+        size = int(_params(request)[paginator.page_size_query_param])
+    except (KeyError, ValueError):
+        return paginator.page_size
+    if size <= 0:
+        return paginator.page_size
+    return min(size, paginator.max_page_size)
+
+
+def _params(request):
+    # DRF requests expose query_params; plain HttpRequests only have GET.
+    return getattr(request, 'query_params', request.GET)
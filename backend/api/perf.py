@@ -0,0 +1,222 @@
+"""
+Per-view performance metrics: PerfMiddleware and the Prometheus text served
+at GET /api/grocery-items/metrics/.
+
+The middleware is listed in MIDDLEWARE but only active with
+PERF_METRICS=True (see backend/settings.py). For every request it measures
+
+- wall time until the response is ready (for streaming responses, until
+  the headers are; queries made while streaming the body are not counted),
+- database queries and the time spent in them, counted by an execute
+  wrapper that api.signals adds to every connection as it is opened,
+- render time: encoding a DRF Response, between process_template_response()
+  and the response's post-render callback,
+- the response body size (not for streaming responses),
+
+sends the timings back in a Server-Timing header and adds them to
+histograms labelled by URL name and method. The per-request cost is a few
+perf_counter() calls, one extra function call per query and a short lock
+around the histogram update.
+
+Histograms live in process memory, so, like pool-stats, the endpoint
+describes the worker that served the scrape; each worker counts from its
+own start.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNMATCHED_VIEW = 'unmatched'
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    """A Prometheus histogram with one series per (view, method)."""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        # labels -> [per-bucket counts with a final +Inf slot, sum]
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def exposition(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        for (view, method), (counts, total) in sorted(self._series.items()):
+            labels = f'view="{_escape(view)}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    'grocery_request_duration_seconds', 'Time until the response was ready.', SECONDS_BUCKETS
+)
+DB_SECONDS = Histogram(
+    'grocery_request_db_seconds', 'Time spent in database queries.', SECONDS_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'grocery_request_db_queries', 'Database queries per request.', QUERY_BUCKETS
+)
+RENDER_SECONDS = Histogram(
+    'grocery_request_render_seconds', 'Time spent rendering DRF responses.', SECONDS_BUCKETS
+)
+RESPONSE_BYTES = Histogram(
+    'grocery_response_bytes', 'Response body size (non-streaming responses).', BYTES_BUCKETS
+)
+HISTOGRAMS = (REQUEST_SECONDS, DB_SECONDS, DB_QUERIES, RENDER_SECONDS, RESPONSE_BYTES)
+
+_lock = threading.Lock()
+# The RequestMetrics of the request being served. A context variable rather
+# than a per-request wrapper on the connection: under ASGI, sync views and
+# the async ORM run in another thread, with that thread's connection, but
+# with a copy of the request's context.
+_current = ContextVar('perf_metrics', default=None)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def exposition():
+    """The histograms in the Prometheus text format."""
+    with _lock:
+        lines = [line for histogram in HISTOGRAMS for line in histogram.exposition()]
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        for histogram in HISTOGRAMS:
+            histogram._series.clear()
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's metrics."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_seconds += perf_counter() - start
+        metrics.queries += 1
+
+
+def install_query_counter(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class RequestMetrics:
+    """One request's measurements."""
+
+    __slots__ = ('start', 'queries', 'db_seconds', 'render_start', 'render_seconds')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_start = None
+        self.render_seconds = None
+
+    def rendered(self, response):
+        self.render_seconds = perf_counter() - self.render_start
+
+    def finish(self, request, response):
+        seconds = perf_counter() - self.start
+        timings = [
+            f'total;dur={seconds * 1000:.2f}',
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"',
+        ]
+        if self.render_seconds is not None:
+            timings.append(f'render;dur={self.render_seconds * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        match = request.resolver_match
+        labels = (match.view_name if match else UNMATCHED_VIEW, request.method)
+        with _lock:
+            REQUEST_SECONDS.observe(labels, seconds)
+            DB_SECONDS.observe(labels, self.db_seconds)
+            DB_QUERIES.observe(labels, self.queries)
+            if self.render_seconds is not None:
+                RENDER_SECONDS.observe(labels, self.render_seconds)
+            if not response.streaming:
+                RESPONSE_BYTES.observe(labels, len(response.content))
+        return response
+
+
+class PerfMiddleware:
+    """
+    Measure each request (see the module docstring). Place it first in
+    MIDDLEWARE so the timings include the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Saves Django a sync_to_async() thread hop per DRF response.
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = request.perf_metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return metrics.finish(request, response)
+
+    async def __acall__(self, request):
+        metrics = request.perf_metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return metrics.finish(request, response)
+
+    def process_template_response(self, request, response):
+        return self._start_render(request, response)
+
+    def _start_render(self, request, response):
+        # Called just before the handler renders the response; DRF encodes
+        # the body in render().
+        metrics = request.perf_metrics
+        metrics.render_start = perf_counter()
+        response.add_post_render_callback(metrics.rendered)
+        return response
+
+    async def _aprocess_template_response(self, request, response):
+        return self._start_render(request, response)
@@ -0,0 +1,66 @@
+"""
+Compact representations of the item list, negotiated with Accept on
+GET .../items/ alongside application/json:
+
+application/vnd.grocery.columnar+json
+    One array per item field instead of one object per item, with the
+    category names stored once: {"count": 2, "categories": ["Dairy"],
+    "id": [1, 2], "name": ["Milk", "Eggs"], "category": [0, 0], ...}, where
+    "category" holds indexes into "categories". Paginated responses keep
+    {"next": ..., "results": ...} with the columns in "results".
+application/msgpack
+    The same data as application/json, encoded as MessagePack.
+
+Other response bodies (created items, errors) keep their usual shape in
+either format.
+"""
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .serializers import ITEM_FIELDS
+
+
+def to_columns(rows):
+    """Item rows (response-shaped dicts) as the columnar layout above."""
+    categories = {}
+    # "categories" is filled in last; listed first so it precedes the columns.
+    columns = {'count': len(rows), 'categories': None}
+    for field in ITEM_FIELDS:
+        if field == 'category':
+            columns[field] = [
+                categories.setdefault(row['category'], len(categories)) for row in rows
+            ]
+        else:
+            columns[field] = [row[field] for row in rows]
+    columns['categories'] = list(categories)
+    return columns
+
+
+def _columnar(data):
+    if isinstance(data, list):
+        return to_columns(data)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return {**data, 'results': to_columns(data['results'])}
+    return data
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.grocery.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(_columnar(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Dates, decimals and lazy strings become what they are in JSON.
+        return msgpack.packb(data, default=JSONEncoder().default)
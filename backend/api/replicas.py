@@ -0,0 +1,158 @@
+"""
+Read replicas: ReplicaRouter and ReplicaMiddleware, active when
+DATABASE_REPLICA_URLS lists replica databases (see backend/settings.py).
+
+Writes always go to the primary ('default'). Reads go to a replica, one
+chosen per request so a response is read from a single database, except
+that they go to the primary
+
+- for the whole of a request that is not GET, HEAD or OPTIONS,
+- after anything in the same request, thread or task has written,
+- inside a transaction on the primary (the write paths read their rows
+  there under the list lock),
+- for REPLICA_STICKY_SECONDS after a client's write: the middleware sets a
+  cookie on responses to requests that wrote, so a client reads its own
+  writes however far the replicas lag,
+- when no replica accepts a connection. A replica that fails to connect is
+  skipped for REPLICA_RETRY_SECONDS by the worker that noticed.
+
+Other clients may see a replica's lag. The replicas are expected to have
+the primary's schema (streaming replication, or a copy of the SQLite file
+for local testing); migrations only run on the primary.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'grocery_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Per request (or thread/task outside requests): whether reads must use the
+# primary, whether anything was written, and the replica chosen for reads.
+_use_primary = ContextVar('grocery_use_primary', default=False)
+_wrote = ContextVar('grocery_wrote', default=False)
+_replica = ContextVar('grocery_replica', default=None)
+
+# Replica alias -> time.monotonic() before which it is not tried again.
+_down_until = {}
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def read_alias():
+    """The database the current request, thread or task reads from."""
+    if _use_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    replica = _replica.get()
+    if replica is not None and _is_up(replica):
+        return replica
+    candidates = [alias for alias in replicas() if alias != replica]
+    random.shuffle(candidates)
+    for alias in candidates:
+        if _is_up(alias):
+            _replica.set(alias)
+            return alias
+    _replica.set(None)
+    return DEFAULT_DB_ALIAS
+
+
+def written():
+    """Record a write: later reads in this context use the primary."""
+    _use_primary.set(True)
+    _wrote.set(True)
+
+
+def _connect(alias):
+    connections[alias].ensure_connection()
+
+
+def _is_up(alias):
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        _connect(alias)
+    except DatabaseError:
+        logger.warning('Replica %s is unreachable; reading from the primary.', alias, exc_info=True)
+        _down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        return False
+    _down_until.pop(alias, None)
+    return True
+
+
+class ReplicaRouter:
+    """Reads to read_alias(), writes and migrations to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        written()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """
+    Scope the routing state to the request: pin unsafe requests and
+    clients holding the sticky cookie to the primary, and set the cookie
+    when the request wrote.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = self._enter(request)
+        try:
+            response = self.get_response(request)
+            return self._finish(response)
+        finally:
+            self._exit(tokens)
+
+    async def __acall__(self, request):
+        tokens = self._enter(request)
+        try:
+            response = await self.get_response(request)
+            return self._finish(response)
+        finally:
+            self._exit(tokens)
+
+    def _enter(self, request):
+        primary = request.method not in SAFE_METHODS or STICKY_COOKIE in request.COOKIES
+        return (_use_primary.set(primary), _wrote.set(False), _replica.set(None))
+
+    def _exit(self, tokens):
+        for var, token in zip((_use_primary, _wrote, _replica), tokens):
+            var.reset(token)
+
+    def _finish(self, response):
+        if _wrote.get():
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,108 @@
+"""
+Item writes that return the written rows in the same statement
+(UPDATE ... RETURNING, INSERT ... ON CONFLICT ... RETURNING), so the write
+paths build their responses and summary deltas without reading the item
+first or again afterwards.
+
+RETURNING and WITH ... AS MATERIALIZED need PostgreSQL 12+ or SQLite 3.35+.
+"""
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+from django.db.models.sql import UpdateQuery
+
+from .models import GroceryItem
+
+RETURNED_FIELDS = [
+    GroceryItem._meta.get_field(name)
+    for name in ('id', 'name', 'category', 'quantity', 'purchased', 'version')
+]
+
+
+def returned_item(row, **values):
+    """A GroceryItem from a RETURNING row plus the `values` the write set."""
+    return GroceryItem(
+        **values, **{field.attname: value for field, value in zip(RETURNED_FIELDS, row)}
+    )
+
+
+def update_returning(queryset, values, old=()):
+    """
+    queryset.update(**values), returning RETURNED_FIELDS of the updated rows
+    followed by the values the fields named in `old` had before the update.
+    """
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    returning = _columns(connection, RETURNED_FIELDS)
+    prefix, prefix_params = '', ()
+    if old:
+        # The rows' old values, materialized before the UPDATE runs because
+        # its WHERE reads them; RETURNING would otherwise see only the new
+        # values (SQLite cannot return columns of an UPDATE ... FROM table).
+        pk = quote(GroceryItem._meta.pk.column)
+        fields = [GroceryItem._meta.pk, *(GroceryItem._meta.get_field(name) for name in old)]
+        prior = queryset.values(*(field.name for field in fields)).query
+        prior_sql, prefix_params = prior.get_compiler(queryset.db).as_sql()
+        prefix = f'WITH "old" ({_columns(connection, fields)}) AS MATERIALIZED ({prior_sql}) '
+        queryset = GroceryItem._base_manager.using(queryset.db).filter(
+            pk__in=RawSQL(f'SELECT {pk} FROM "old"', ())
+        )
+        table = quote(GroceryItem._meta.db_table)
+        returning += ''.join(
+            f', (SELECT "old".{quote(field.column)} FROM "old" WHERE "old".{pk} = {table}.{pk})'
+            for field in fields[1:]
+        )
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix}{sql} RETURNING {returning}', (*prefix_params, *params))
+        return cursor.fetchall()
+
+
+def old_item(row, old):
+    """A GroceryItem holding the `old` values update_returning() returned in `row`."""
+    values = row[len(RETURNED_FIELDS):]
+    return GroceryItem(**{
+        GroceryItem._meta.get_field(name).attname: value for name, value in zip(old, values)
+    })
+
+
+def upsert_returning(item, replace=(), add=()):
+    """
+    INSERT the unsaved GroceryItem `item`, or, if its list already has an
+    item of that name, UPDATE that item instead: it takes `item`'s values
+    for the fields in `replace`, adds them for the fields in `add`, gets
+    `item`'s revision and updated_at, and its version is incremented.
+    Returns RETURNED_FIELDS of the inserted or updated row.
+    """
+    connection = connections[router.db_for_write(GroceryItem)]
+    quote = connection.ops.quote_name
+    table = quote(GroceryItem._meta.db_table)
+
+    def column(name):
+        return quote(GroceryItem._meta.get_field(name).column)
+
+    fields = [field for field in GroceryItem._meta.concrete_fields if not field.primary_key]
+    params = [
+        field.get_db_prep_save(field.pre_save(item, add=True), connection)
+        for field in fields
+    ]
+    updates = [
+        *(f'{column(name)} = EXCLUDED.{column(name)}'
+          for name in (*replace, 'revision', 'updated_at')),
+        *(f'{column(name)} = {table}.{column(name)} + EXCLUDED.{column(name)}' for name in add),
+        f'{column("version")} = {table}.{column("version")} + 1',
+    ]
+    sql = (
+        f'INSERT INTO {table} ({_columns(connection, fields)}) '
+        f'VALUES ({", ".join(["%s"] * len(fields))}) '
+        f'ON CONFLICT ({column("list")}, {column("name")}) DO UPDATE SET {", ".join(updates)} '
+        f'RETURNING {_columns(connection, RETURNED_FIELDS)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+
+
+def _columns(connection, fields):
+    return ', '.join(connection.ops.quote_name(field.column) for field in fields)
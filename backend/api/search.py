@@ -0,0 +1,211 @@
+"""
+Ranked search over item names and categories for /api/grocery-items/search/.
+
+PostgreSQL   substring match with ILIKE, served by a GIN trigram index on
+             UPPER(name) (migration 0009), and prefix match with LIKE,
+             served by a btree index on (list_id, UPPER(name)
+             text_pattern_ops) (migration 0014); categories are matched
+             in the small api_category table and items filtered by id.
+             Ties are broken by trigram similarity.
+SQLite       an FTS5 table with the trigram tokenizer over item and category
+             names (plus the unindexed list id), kept in sync with
+             api_groceryitem by triggers, and an index on (list_id,
+             lower(name)) for prefix matches. These are
+             (re)installed after every migrate, as rebuilding
+             api_groceryitem in a SQLite migration drops them.
+
+Every search is limited to one list. Queries shorter than a trigram only
+match name and category prefixes.
+
+Results rank exact name matches first, then name prefixes, then other name
+matches, then category-only matches, shorter names first within each group.
+Ranking every match of a broad query ("milk" in a million rows) would cost
+time proportional to the table, so only a bounded set of candidates is
+ranked: all name-prefix matches plus the first substring matches the index
+yields, at least enough to fill the requested page. FTS5's bm25() is not
+used for the same reason; it scans every match to compute its statistics.
+"""
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+
+from .categories import NameLookup
+from .models import Category, GroceryItem
+from .serializers import ITEM_FIELDS, item_rows
+
+FTS_TABLE = 'api_groceryitem_fts'
+LOWER_NAME_INDEX = 'groceryitem_list_lower_name_idx'
+# Replaced by LOWER_NAME_INDEX when items were partitioned by list.
+_OLD_INDEXES = ('groceryitem_lower_name_idx',)
+# Trigram indexes cannot match anything shorter than a trigram.
+MIN_SUBSTRING_QUERY_LENGTH = 3
+MIN_CANDIDATES = 1000
+# Sorts after every character, to turn a prefix into a range.
+_MAX_CHAR = chr(0x10FFFF)
+
+_CATEGORY_NAME = '(SELECT name FROM api_category WHERE id = new.category_id)'
+_FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON api_groceryitem BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, category, list_id)
+            VALUES (new.id, new.name, {_CATEGORY_NAME}, new.list_id);
+        END""",
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON api_groceryitem BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END""",
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF name, category_id, list_id ON api_groceryitem BEGIN
+            UPDATE {FTS_TABLE}
+            SET name = new.name, category = {_CATEGORY_NAME}, list_id = new.list_id
+            WHERE rowid = old.id;
+        END""",
+}
+
+
+def install_sqlite_index(using_connection):
+    """
+    Create the FTS5 table, its triggers and the lower(name) index if they
+    are missing, refilling the FTS table when any trigger had to be
+    recreated.
+    """
+    with using_connection.cursor() as cursor:
+        for index in _OLD_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {index}')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {LOWER_NAME_INDEX} '
+            'ON api_groceryitem (list_id, lower(name))'
+        )
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f'{FTS_TABLE}%'],
+        )
+        existing = dict(cursor.fetchall())
+        if FTS_TABLE in existing and 'list_id' not in existing[FTS_TABLE]:
+            # Created before items were partitioned by list: replace the
+            # table and its triggers.
+            cursor.execute(f'DROP TABLE {FTS_TABLE}')
+            for name in _FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            existing.clear()
+        missing = [name for name in _FTS_TRIGGERS if name not in existing]
+        if FTS_TABLE in existing and not missing:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, category, list_id UNINDEXED, tokenize='trigram')"
+        )
+        for name in missing:
+            cursor.execute(_FTS_TRIGGERS[name])
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, category, list_id) "
+            "SELECT i.id, i.name, c.name, i.list_id FROM api_groceryitem i "
+            "JOIN api_category c ON c.id = i.category_id"
+        )
+
+
+def search_items(list_id, query, offset, limit):
+    """
+    Return up to `limit` response-shaped items of the list matching
+    `query`, best first.
+    """
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(list_id, query, offset, limit)
+    return _search_orm(list_id, query, offset, limit)
+
+
+def _window(offset, limit):
+    return max(MIN_CANDIDATES, offset + limit)
+
+
+def _search_orm(list_id, query, offset, limit):
+    window = _window(offset, limit)
+    items = GroceryItem.objects.filter(list_id=list_id)
+    if len(query) >= MIN_SUBSTRING_QUERY_LENGTH:
+        categories = Category.objects.filter(name__icontains=query)
+        matches = Q(name__icontains=query) | Q(category__in=categories)
+    else:
+        matches = Q(category__in=Category.objects.filter(name__istartswith=query))
+    # Candidate ids are fetched separately: an OR of two IN (subquery)
+    # conditions is evaluated row by row over the whole table.
+    candidates = set(
+        items.filter(name__istartswith=query).values_list('id', flat=True)[:window]
+    )
+    candidates.update(items.filter(matches).values_list('id', flat=True)[:window])
+
+    queryset = GroceryItem.objects.filter(id__in=candidates).annotate(
+        match_rank=Case(
+            When(name__iexact=query, then=Value(0)),
+            When(name__istartswith=query, then=Value(1)),
+            When(name__icontains=query, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField(),
+        ),
+        name_length=Length('name'),
+    )
+    ordering = ['match_rank', 'name_length', 'id']
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        queryset = queryset.annotate(similarity=TrigramSimilarity('name', query))
+        ordering.insert(1, '-similarity')
+    return list(item_rows(queryset.order_by(*ordering))[offset:offset + limit])
+
+
+def _like_escape(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_sqlite(list_id, query, offset, limit):
+    window = _window(offset, limit)
+    # SQLite's lower() and LIKE only fold ASCII letters.
+    prefix = query.lower()
+    prefix_params = [list_id, prefix, prefix + _MAX_CHAR]
+    name_sql = (
+        f"SELECT id FROM api_groceryitem INDEXED BY {LOWER_NAME_INDEX} "
+        "WHERE list_id = %s AND lower(name) >= %s AND lower(name) < %s LIMIT %s"
+    )
+    if len(query) >= MIN_SUBSTRING_QUERY_LENGTH:
+        other_sql = (
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND list_id = %s LIMIT %s"
+        )
+        other_params = ['"' + query.replace('"', '""') + '"', list_id]
+    else:
+        other_sql = (
+            "SELECT id FROM api_groceryitem WHERE list_id = %s AND category_id IN ("
+            "SELECT id FROM api_category WHERE lower(name) >= %s AND lower(name) < %s"
+            ") LIMIT %s"
+        )
+        other_params = prefix_params
+    escaped = _like_escape(query)
+    columns = ', '.join(
+        f'i.{GroceryItem._meta.get_field(field).column}' for field in ITEM_FIELDS
+    )
+    items = GroceryItem.objects.raw(
+        f"""
+        SELECT {columns}
+        FROM api_groceryitem i
+        WHERE i.id IN (
+            SELECT id FROM ({name_sql}) UNION SELECT * FROM ({other_sql})
+        )
+        ORDER BY
+            CASE WHEN i.name LIKE %s ESCAPE '\\' THEN 0
+                 WHEN i.name LIKE %s ESCAPE '\\' THEN 1
+                 WHEN i.name LIKE %s ESCAPE '\\' THEN 2
+                 ELSE 3 END,
+            length(i.name),
+            i.id
+        LIMIT %s OFFSET %s
+        """,
+        [*prefix_params, window, *other_params, window,
+         escaped, escaped + '%', '%' + escaped + '%', limit, offset],
+    )
+    names = NameLookup()
+    return [
+        {
+            field: names[item.category_id] if field == 'category' else getattr(item, field)
+            for field in ITEM_FIELDS
+        }
+        for item in items
+    ]
@@ -1,8 +1,120 @@
+from django.db.models.query import ValuesIterable
 from rest_framework import serializers
-from .models import GroceryItem
+from .categories import NameLookup, category_name, find_category
+from .models import DEFAULT_LIST_ID, GroceryItem, GroceryList
+
+DUPLICATE_NAME = 'grocery item with this name already exists.'
+
+
+class CategoryField(serializers.CharField):
+    """
+    A category name in requests and responses, stored as a Category
+    foreign key. Names are resolved through api.categories; a new name
+    validates to an unsaved Category, which the write saves with
+    api.categories.save_categories().
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 100)
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=serializers.empty):
+        # CharField validators (max_length) check the name, not the Category.
+        return find_category(super().run_validation(data))
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, instance):
+        return _category_of(instance)
+
 
 class GroceryItemSerializer(serializers.ModelSerializer):
+    """
+    Item input and output. Names are unique per list: pass the list as
+    context={'list_id': ...} when creating; updates use the instance's list,
+    or context={'list_id': ..., 'pk': ...} when validating without one.
+    Upserts pass context={'on_conflict': ...} and let the database resolve
+    an existing name instead.
+    """
+    # Not required: the model default ("Other") applies when omitted.
+    category = CategoryField(required=False)
+
     class Meta:
         model = GroceryItem
-        fields = ['id', 'name', 'category', 'quantity', 'purchased']
-        read_only_fields = ['id']
\ No newline at end of file
+        fields = ['id', 'name', 'category', 'quantity', 'purchased', 'version']
+        read_only_fields = ['id', 'version']
+
+    def validate_name(self, value):
+        if self.context.get('on_conflict'):
+            return value
+        if self.instance is not None:
+            list_id, pk = self.instance.list_id, self.instance.pk
+        else:
+            list_id = self.context.get('list_id', DEFAULT_LIST_ID)
+            pk = self.context.get('pk')
+        items = GroceryItem.objects.filter(list_id=list_id)
+        if pk is not None:
+            items = items.exclude(pk=pk)
+        if items.filter(name=value).exists():
+            raise serializers.ValidationError(DUPLICATE_NAME)
+        return value
+
+
+class GroceryListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GroceryList
+        fields = ['id', 'name', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+
+# Read-only fast path. DRF's per-field to_representation dominates CPU on
+# large list responses; for reads the model fields map straight onto the
+# response, so rows are fetched as dicts with .values() instead. Writes still
+# go through GroceryItemSerializer for validation.
+ITEM_FIELDS = tuple(GroceryItemSerializer.Meta.fields)
+
+
+class ItemRow(dict):
+    """A response row that still knows its category id, for keyset cursors."""
+    __slots__ = ('category_id',)
+
+
+class ItemRowIterable(ValuesIterable):
+    """.values() rows with the category id replaced by its name."""
+
+    def __iter__(self):
+        # ValuesIterable.__iter__, building ItemRows directly.
+        query = self.queryset.query
+        compiler = query.get_compiler(self.queryset.db)
+        fields = [*query.extra_select, *query.values_select, *query.annotation_select]
+        categories = NameLookup()
+        for values in compiler.results_iter(
+            chunked_fetch=self.chunked_fetch, chunk_size=self.chunk_size
+        ):
+            row = ItemRow(zip(fields, values))
+            row.category_id = row['category']
+            row['category'] = categories[row.category_id]
+            yield row
+
+
+def item_rows(queryset, *extra_fields):
+    """Return a queryset yielding response-shaped dicts."""
+    rows = queryset.values(*ITEM_FIELDS, *extra_fields)
+    rows._iterable_class = ItemRowIterable
+    return rows
+
+
+def _category_of(item):
+    # Freshly saved items already hold their Category; others only the id.
+    if GroceryItem.category.is_cached(item):
+        return item.category.name
+    return category_name(item.category_id)
+
+
+def serialize_item(item):
+    """Build the response dict for a single GroceryItem instance."""
+    return {
+        field: _category_of(item) if field == 'category' else getattr(item, field)
+        for field in ITEM_FIELDS
+    }
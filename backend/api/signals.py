@@ -0,0 +1,46 @@
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import cache, perf, search
+from .models import Category, GroceryItem, GroceryList, ListRevision
+
+
+@receiver(post_save, sender=GroceryItem)
+def invalidate_list_cache(sender, instance, **kwargs):
+    # Catches saves made outside the API (shell, fixtures, tests). API and
+    # admin writes also invalidate through api.changes.list_changed().
+    # There is deliberately no post_delete receiver: any delete receiver
+    # disables Django's fast-delete path for queryset.delete().
+    cache.invalidate(instance.list_id)
+
+
+@receiver(post_save, sender=GroceryList)
+def create_list_revision(sender, instance, created, raw=False, **kwargs):
+    # Every list needs its revision row: item writes lock it and the item
+    # endpoints 404 without it. Created here so lists made in the admin or
+    # the shell get one as well as those made through the API. Fixtures (raw)
+    # carry their own rows.
+    if created and not raw:
+        ListRevision.objects.create(list=instance)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    # Always installed so PERF_METRICS can be switched on per process; the
+    # wrapper returns straight away outside PerfMiddleware requests.
+    perf.install_query_counter(connection)
+
+
+def install_search_index(sender, using, **kwargs):
+    # Connected to post_migrate for this app in ApiConfig.ready(). SQLite
+    # table rebuilds drop the FTS triggers, so they are checked after every
+    # migrate rather than created once in a migration.
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    tables = connection.introspection.table_names()
+    if not {GroceryItem._meta.db_table, Category._meta.db_table} <= set(tables):
+        return
+    search.install_sqlite_index(connection)
@@ -0,0 +1,164 @@
+"""
+Per-list, per-category counters behind the summary/ endpoints.
+
+Every write path records what it changes in a SummaryDelta and applies it
+in the same transaction, after api.changes.list_changed(). That call takes
+the list's ListRevision row lock, so the list's writers are serialized and
+reading an item's old values inside the transaction is exact. Reads scan
+the list's few CategorySummary rows instead of a GROUP BY over its items.
+
+Writes made outside the API (the shell, fixtures, raw SQL) are not counted;
+`manage.py repair_summary` recomputes the counters from the items.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.http import Http404
+
+from .categories import NameLookup
+from .changes import list_changed
+from .models import CategorySummary, GroceryItem, ListRevision
+
+
+class SummaryDelta:
+    """Accumulates one list's counter changes per category; apply() writes them."""
+
+    def __init__(self, list_id):
+        self.list_id = list_id
+        # category id -> [item_count, total_quantity, purchased_count]
+        self._changes = defaultdict(lambda: [0, 0, 0])
+
+    def add(self, item, sign=1):
+        """Count a GroceryItem instance."""
+        change = self._changes[item.category_id]
+        change[0] += sign
+        change[1] += sign * item.quantity
+        change[2] += sign if item.purchased else 0
+
+    def remove(self, item):
+        self.add(item, sign=-1)
+
+    def add_quantity(self, category_id, quantity):
+        """Count a change of an item's quantity by `quantity`."""
+        self._changes[category_id][1] += quantity
+
+    def add_rows(self, queryset, sign=1):
+        """Count the rows of `queryset`, aggregated in one query."""
+        for row in _aggregate(queryset):
+            change = self._changes[row['category']]
+            change[0] += sign * row['item_count']
+            change[1] += sign * row['total_quantity']
+            change[2] += sign * row['purchased_count']
+
+    def remove_rows(self, queryset):
+        self.add_rows(queryset, sign=-1)
+
+    def set_purchased_rows(self, queryset, purchased):
+        """Count setting purchased on the rows of `queryset`, none of which have it yet."""
+        for row in queryset.order_by().values('category').annotate(count=Count('id')):
+            self._changes[row['category']][2] += row['count'] if purchased else -row['count']
+
+    def apply(self):
+        """Write the accumulated changes. Call inside the write's transaction."""
+        counters = CategorySummary.objects.filter(list_id=self.list_id)
+        touched = []
+        # Sorted so concurrent writers lock counter rows in the same order.
+        for category, (count, quantity, purchased) in sorted(self._changes.items()):
+            if not (count or quantity or purchased):
+                continue
+            touched.append(category)
+            updated = counters.filter(category=category).update(
+                item_count=F('item_count') + count,
+                total_quantity=F('total_quantity') + quantity,
+                purchased_count=F('purchased_count') + purchased,
+            )
+            if not updated:
+                CategorySummary.objects.create(
+                    list_id=self.list_id, category_id=category, item_count=count,
+                    total_quantity=quantity, purchased_count=purchased,
+                )
+        if touched:
+            counters.filter(category__in=touched, item_count=0).delete()
+        self._changes.clear()
+
+
+def _aggregate(queryset):
+    return queryset.order_by().values('category').annotate(
+        item_count=Count('id'),
+        total_quantity=Sum('quantity'),
+        purchased_count=Count('id', filter=Q(purchased=True)),
+    )
+
+
+def clear(list_id):
+    """Every item of the list was deleted."""
+    CategorySummary.objects.filter(list_id=list_id).delete()
+
+
+def set_all_purchased(list_id, purchased):
+    """purchased was set on every item of the list."""
+    CategorySummary.objects.filter(list_id=list_id).update(
+        purchased_count=F('item_count') if purchased else 0
+    )
+
+
+def summary(list_id):
+    """Per-category totals and overall totals, from the counter table."""
+    categories = []
+    totals = {'items': 0, 'quantity': 0, 'purchased': 0, 'remaining': 0}
+    names = NameLookup()
+    rows = CategorySummary.objects.filter(list_id=list_id, item_count__gt=0).values_list(
+        'category', 'item_count', 'total_quantity', 'purchased_count'
+    )
+    for category, items, quantity, purchased in rows:
+        entry = {
+            'category': names[category],
+            'items': items,
+            'quantity': quantity,
+            'purchased': purchased,
+            'remaining': items - purchased,
+        }
+        categories.append(entry)
+        for key in totals:
+            totals[key] += entry[key]
+    categories.sort(key=lambda entry: entry['category'])
+    return {'categories': categories, 'totals': totals}
+
+
+@transaction.atomic
+def rebuild(list_id):
+    """
+    Recompute the list's counters from its items. Returns the number of
+    categories whose counters were wrong.
+    """
+    # Lock order matches the write paths: ListRevision first. The revision
+    # only moves if a counter is repaired, so a no-op run leaves ETags alone.
+    try:
+        ListRevision.objects.select_for_update().only('pk').get(list_id=list_id)
+    except ListRevision.DoesNotExist:
+        raise Http404('No such grocery list.')
+    actual = {
+        row['category']: (row['item_count'], row['total_quantity'], row['purchased_count'])
+        for row in _aggregate(GroceryItem.objects.filter(list_id=list_id))
+    }
+    counters = CategorySummary.objects.filter(list_id=list_id)
+    stored = {
+        row[0]: row[1:] for row in counters.values_list(
+            'category', 'item_count', 'total_quantity', 'purchased_count'
+        )
+    }
+    wrong = {c for c in actual.keys() | stored.keys() if actual.get(c) != stored.get(c)}
+    if not wrong:
+        return 0
+    list_changed(list_id)
+    counters.filter(category__in=wrong).delete()
+    CategorySummary.objects.bulk_create(
+        CategorySummary(
+            list_id=list_id, category_id=category, item_count=count,
+            total_quantity=quantity, purchased_count=purchased,
+        )
+        for category, (count, quantity, purchased) in actual.items()
+        if category in wrong
+    )
+    return len(wrong)
@@ -0,0 +1,57 @@
+"""
+Delta sync: what changed in a list since a given revision of that list.
+
+Items carry the revision of their last change (indexed), deletes leave
+Tombstone rows, and deleting the whole list leaves a single clear marker,
+so the work done per request is proportional to the churn since `since`
+rather than to the size of the list.
+"""
+from .models import GroceryItem, ListRevision, Tombstone
+from .serializers import item_rows
+
+# Beyond this many changes a full refetch is cheaper than a delta.
+MAX_CHANGES = 1000
+
+
+def changes_since(list_id, since):
+    """
+    Returns {"revision", "reset", "cleared", "updated", "deleted"}.
+
+    reset:   the delta is unavailable (compacted away or too large); the
+             client must refetch the full list.
+    cleared: the whole list was deleted after `since`; the client drops its
+             local items before applying `updated`.
+    """
+    state = ListRevision.current(list_id)
+    result = {
+        'revision': state.revision,
+        'reset': False,
+        'cleared': False,
+        'updated': [],
+        'deleted': [],
+    }
+    if since >= state.revision:
+        return result
+    if since < state.compacted_through:
+        result['reset'] = True
+        return result
+
+    tombstones = Tombstone.objects.filter(list_id=list_id, revision__gt=since)
+    items = GroceryItem.objects.filter(list_id=list_id, revision__gt=since)
+    updated = list(
+        item_rows(items.order_by('revision', 'id'))
+        [:MAX_CHANGES + 1]
+    )
+    deleted = list(
+        tombstones.filter(item_id__isnull=False)
+        .order_by('revision', 'id')
+        .values_list('item_id', flat=True)[:MAX_CHANGES + 1]
+    )
+    if len(updated) > MAX_CHANGES or len(deleted) > MAX_CHANGES:
+        result['reset'] = True
+        return result
+
+    result['cleared'] = tombstones.filter(item_id__isnull=True).exists()
+    result['updated'] = updated
+    result['deleted'] = deleted
+    return result
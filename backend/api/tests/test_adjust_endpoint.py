@@ -0,0 +1,137 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import summary
+from api.adjust import ABOVE_CEILING
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, CategorySummary, GroceryItem, GroceryList, ListRevision
+
+
+class GroceryItemAdjustTests(APITestCase):
+    """Tests for POST /api/grocery-items/<pk>/adjust/"""
+
+    def setUp(self):
+        self.milk = GroceryItem.objects.create(
+            name="Milk", category=get_category("Dairy"), quantity=2
+        )
+        summary.rebuild(DEFAULT_LIST_ID)
+        self.url = reverse('grocery-item-adjust', kwargs={'pk': self.milk.pk})
+
+    def test_increment_and_decrement(self):
+        """The delta is added to the stored quantity and the new item returned."""
+        response = self.client.post(self.url, {'delta': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quantity'], 5)
+        self.assertEqual(response.data['version'], 2)
+        self.assertEqual(response['ETag'], f'"item-{self.milk.pk}-2"')
+        response = self.client.post(self.url, {'delta': -4}, format='json')
+        self.assertEqual(response.data['quantity'], 1)
+        self.milk.refresh_from_db()
+        self.assertEqual((self.milk.quantity, self.milk.version), (1, 3))
+
+    def test_single_update_statement(self):
+        """The item is not read: one UPDATE ... RETURNING does the change."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'delta': 1}, format='json')
+        item_queries = [q['sql'] for q in queries if '"api_groceryitem"' in q['sql']]
+        self.assertEqual(len(item_queries), 1)
+        self.assertTrue(item_queries[0].startswith('UPDATE'))
+        self.assertIn('RETURNING', item_queries[0])
+
+    def test_floor(self):
+        """A delta that would take the quantity below 1 writes nothing."""
+        revision = ListRevision.current(DEFAULT_LIST_ID).revision
+        response = self.client.post(self.url, {'delta': -2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('delta', response.data)
+        self.milk.refresh_from_db()
+        self.assertEqual((self.milk.quantity, self.milk.version), (2, 1))
+        self.assertEqual(ListRevision.current(DEFAULT_LIST_ID).revision, revision)
+
+    def test_ceiling(self):
+        """A delta that would overflow the quantity column is a 400, not a 500."""
+        ceiling = connection.ops.integer_field_range('IntegerField')[1]
+        GroceryItem.objects.filter(pk=self.milk.pk).update(quantity=ceiling - 5)
+        response = self.client.post(self.url, {'delta': 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['delta'], [ABOVE_CEILING.format(ceiling)])
+        response = self.client.post(self.url, {'delta': 5}, format='json')
+        self.assertEqual(response.data['quantity'], ceiling)
+
+    def test_invalid_delta(self):
+        """delta must be a non-zero integer within bounds."""
+        for body in ({}, {'delta': 0}, {'delta': 'x'}, {'delta': 10 ** 6}):
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+
+    def test_not_found(self):
+        """Unknown items and items of other lists return 404."""
+        url = reverse('grocery-item-adjust', kwargs={'pk': 0})
+        response = self.client.post(url, {'delta': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        cabin = GroceryList.objects.create(name="Cabin")
+        url = reverse('grocery-item-adjust', kwargs={'list_id': cabin.pk, 'pk': self.milk.pk})
+        response = self.client.post(url, {'delta': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_summary_counts_quantity(self):
+        """The category's total quantity follows the adjustment."""
+        self.client.post(self.url, {'delta': 4}, format='json')
+        counter = CategorySummary.objects.get(list_id=DEFAULT_LIST_ID)
+        self.assertEqual((counter.item_count, counter.total_quantity), (1, 6))
+
+
+class GroceryItemsAdjustTests(APITestCase):
+    """Tests for POST /api/grocery-items/adjust/"""
+
+    def setUp(self):
+        self.url = reverse('grocery-items-adjust')
+        self.milk = GroceryItem.objects.create(name="Milk", category=get_category("Dairy"))
+        self.bread = GroceryItem.objects.create(
+            name="Bread", category=get_category("Bakery"), quantity=3
+        )
+        summary.rebuild(DEFAULT_LIST_ID)
+
+    def test_adjust_many(self):
+        """All adjustments apply in one UPDATE and come back in request order."""
+        body = [{'id': self.bread.pk, 'delta': -2}, {'id': self.milk.pk, 'delta': 5}]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['name'], item['quantity']) for item in response.data],
+            [("Bread", 1), ("Milk", 6)],
+        )
+        updates = [q for q in queries if q['sql'].startswith('UPDATE "api_groceryitem"')]
+        self.assertEqual(len(updates), 1)
+        totals = self.client.get(reverse('grocery-item-summary')).data['totals']
+        self.assertEqual(totals['quantity'], 7)
+
+    def test_all_or_nothing(self):
+        """One missing item or floor violation rejects every adjustment."""
+        body = [
+            {'id': self.milk.pk, 'delta': 1},
+            {'id': self.bread.pk, 'delta': -3},
+            {'id': 0, 'delta': 1},
+        ]
+        response = self.client.post(self.url, body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('delta', response.data[1])
+        self.assertIn('id', response.data[2])
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.quantity, 1)
+
+    def test_invalid_body(self):
+        """The body must be a non-empty list of valid, distinct adjustments."""
+        for body in ({'id': self.milk.pk, 'delta': 1}, []):
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('error', response.data)
+        body = [{'id': self.milk.pk, 'delta': 1}, {'id': self.milk.pk, 'delta': 1}, {'delta': 1}]
+        response = self.client.post(self.url, body, format='json')
+        self.assertEqual(response.data[0], {})
+        self.assertIn('id', response.data[1])
+        self.assertIn('id', response.data[2])
@@ -0,0 +1,170 @@
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from api.models import Category, GroceryItem
+
+
+class AsyncListTests(TestCase):
+    """Tests for /api/async/grocery-items/"""
+
+    def setUp(self):
+        self.url = reverse('async-grocery-item-list')
+
+    async def test_list_items(self):
+        """GET returns every item in list order."""
+        bakery, _ = await Category.objects.aget_or_create(name="Bakery")
+        dairy, _ = await Category.objects.aget_or_create(name="Dairy")
+        await GroceryItem.objects.acreate(name="Milk", category=dairy)
+        await GroceryItem.objects.acreate(name="Bread", category=bakery)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in response.json()], ["Bread", "Milk"])
+
+    async def test_paginated_list(self):
+        """page_size switches to keyset pagination."""
+        for name in ("Milk", "Bread", "Eggs"):
+            await GroceryItem.objects.acreate(name=name)
+        response = await self.async_client.get(self.url, {'page_size': 2})
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        response = await self.async_client.get(data['next'])
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNone(response.json()['next'])
+
+    async def test_conditional_get(self):
+        """A matching If-None-Match returns 304."""
+        response = await self.async_client.get(self.url)
+        response = await self.async_client.get(self.url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_invalid_filter(self):
+        """Filter errors are returned as 400."""
+        response = await self.async_client.get(self.url, {'purchased': 'maybe'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('purchased', response.json())
+
+    async def test_create_item(self):
+        """POST validates and creates an item."""
+        response = await self.async_client.post(
+            self.url, {"name": "Eggs", "quantity": 12}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['quantity'], 12)
+        self.assertTrue(await GroceryItem.objects.filter(name="Eggs").aexists())
+
+    async def test_create_item_invalid(self):
+        """POST keeps the serializer's validation rules."""
+        await GroceryItem.objects.acreate(name="Milk")
+        response = await self.async_client.post(
+            self.url, {"name": "Milk", "quantity": 0}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.json())
+        self.assertIn('quantity', response.json())
+
+    async def test_upsert_item(self):
+        """POST honours ?on_conflict= like the sync view."""
+        await GroceryItem.objects.acreate(name="Eggs", quantity=6)
+        response = await self.async_client.post(
+            f'{self.url}?on_conflict=increment', {"name": "Eggs", "quantity": 6},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['quantity'], 12)
+
+    async def test_create_item_bad_json(self):
+        """Malformed JSON returns 400."""
+        response = await self.async_client.post(self.url, '{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_delete_all(self):
+        """DELETE removes every item and returns the count."""
+        await GroceryItem.objects.acreate(name="Milk")
+        response = await self.async_client.delete(self.url)
+        self.assertEqual(response.json(), {'deleted': 1})
+        self.assertEqual(await GroceryItem.objects.acount(), 0)
+
+
+class AsyncDetailTests(TestCase):
+    """Tests for /api/async/grocery-items/<pk>/ and update-purchased/"""
+
+    def setUp(self):
+        self.item = GroceryItem.objects.create(name="Milk", quantity=2)
+        self.url = reverse('async-grocery-item-detail', kwargs={'pk': self.item.pk})
+
+    async def test_get_item(self):
+        """GET returns the item with validators."""
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.json()['quantity'], 2)
+        response = await self.async_client.get(self.url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_item_not_found(self):
+        """Unknown ids return 404."""
+        url = reverse('async-grocery-item-detail', kwargs={'pk': 0})
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+        self.assertEqual((await self.async_client.delete(url)).status_code, 404)
+
+    async def test_patch_item(self):
+        """PATCH updates the given fields."""
+        response = await self.async_client.patch(
+            self.url, {"purchased": True}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['purchased'])
+        self.assertEqual(response.json()['name'], "Milk")
+
+    async def test_patch_invalid_quantity(self):
+        """PATCH with quantity < 1 returns 400."""
+        response = await self.async_client.patch(
+            self.url, {"quantity": 0}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_delete_item(self):
+        """DELETE removes the item."""
+        response = await self.async_client.delete(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await GroceryItem.objects.filter(pk=self.item.pk).aexists())
+
+    async def test_bulk_update_purchased(self):
+        """update-purchased sets purchased on every item."""
+        url = reverse('async-bulk-update')
+        response = await self.async_client.patch(url, {"purchased": True}, content_type='application/json')
+        self.assertEqual(response.json(), {'updated': 1})
+        response = await self.async_client.patch(url, {}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.patch(
+            url, {"purchased": "maybe"}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.patch(
+            url, {"purchased": "false"}, content_type='application/json'
+        )
+        self.assertEqual(response.json(), {'updated': 1})
+
+
+class AsyncCSRFTests(TestCase):
+    """CSRF applies to the async views as it does to the sync ones."""
+
+    def setUp(self):
+        self.url = reverse('async-grocery-item-list')
+        self.csrf_client = AsyncClient(enforce_csrf_checks=True)
+
+    async def _post(self):
+        return await self.csrf_client.post(
+            self.url, {"name": "Milk"}, content_type='application/json'
+        )
+
+    async def test_anonymous_needs_no_token(self):
+        """API clients without a session do not need a CSRF token."""
+        self.assertEqual((await self._post()).status_code, 201)
+
+    async def test_session_needs_token(self):
+        """A logged-in session without a CSRF token is rejected."""
+        user = await User.objects.acreate_user('shopper', password='secret')
+        await self.csrf_client.aforce_login(user)
+        response = await self._post()
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF Failed', response.json()['detail'])
+        self.assertFalse(await GroceryItem.objects.aexists())
@@ -0,0 +1,162 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import summary
+from api.batch import (
+    DUPLICATE_ID, NOT_FOUND, UPDATED_AND_DELETED, BatchOperation, BatchRejected,
+)
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, CategorySummary, GroceryItem
+from api.mutations import VERSION_CONFLICT
+
+
+class GroceryItemBatchTests(APITestCase):
+    """Tests for POST on /api/grocery-items/batch/"""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-batch')
+        self.milk = GroceryItem.objects.create(name="Milk", category=get_category("Dairy"))
+        self.bread = GroceryItem.objects.create(name="Bread", category=get_category("Bakery"))
+
+    def test_mixed_batch(self):
+        """Creates, updates and deletes are applied together."""
+        data = {
+            "create": [{"name": "Eggs", "quantity": 12}, {"name": "Apples", "category": "Produce"}],
+            "update": [{"id": self.milk.pk, "purchased": True, "quantity": 2}],
+            "delete": [self.bread.pk],
+        }
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in response.data['create']], ["Eggs", "Apples"])
+        self.assertTrue(all(item['id'] for item in response.data['create']))
+        self.assertEqual(response.data['update'][0]['quantity'], 2)
+        self.assertEqual(response.data['delete'], [self.bread.pk])
+
+        self.milk.refresh_from_db()
+        self.assertTrue(self.milk.purchased)
+        self.assertFalse(GroceryItem.objects.filter(pk=self.bread.pk).exists())
+        self.assertEqual(GroceryItem.objects.count(), 3)
+
+    def test_invalid_item_rolls_back_batch(self):
+        """One invalid operation rejects the whole batch with per-item errors."""
+        data = {
+            "create": [{"name": "Eggs"}, {"name": "Butter", "quantity": 0}],
+            "delete": [self.bread.pk],
+        }
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['create'][0], {})
+        self.assertIn('quantity', response.data['create'][1])
+        self.assertEqual(GroceryItem.objects.count(), 2)
+
+    def test_duplicate_name_against_existing(self):
+        """Creating an existing name is rejected."""
+        response = self.client.post(self.url, {"create": [{"name": "Milk"}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data['create'][0])
+
+    def test_duplicate_name_within_batch(self):
+        """Two creates with the same name are rejected."""
+        data = {"create": [{"name": "Eggs"}, {"name": "Eggs"}]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['create'][0], {})
+        self.assertIn('name', response.data['create'][1])
+
+    def test_name_freed_by_delete_can_be_reused(self):
+        """A name released by a delete in the same batch may be created."""
+        data = {"create": [{"name": "Milk"}], "delete": [self.milk.pk]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(GroceryItem.objects.filter(name="Milk").count(), 1)
+
+    def test_unknown_ids(self):
+        """Updates and deletes of missing items are reported per item."""
+        data = {"update": [{"id": 0, "quantity": 2}], "delete": [0]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', response.data['update'][0])
+        self.assertIn('id', response.data['delete'][0])
+
+    def test_update_and_delete_same_id(self):
+        """An id both updated and deleted is rejected in each section."""
+        data = {"update": [{"id": self.milk.pk, "quantity": 3}], "delete": [self.milk.pk]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['update'][0], {'id': [UPDATED_AND_DELETED]})
+        self.assertEqual(response.data['delete'][0], {'id': [UPDATED_AND_DELETED]})
+        self.assertTrue(GroceryItem.objects.filter(pk=self.milk.pk, quantity=1).exists())
+
+    def test_duplicate_delete_ids(self):
+        """A repeated delete id is reported on its second occurrence."""
+        data = {"delete": [self.bread.pk, self.bread.pk]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['delete'], [{}, {'id': [DUPLICATE_ID]}])
+        self.assertTrue(GroceryItem.objects.filter(pk=self.bread.pk).exists())
+
+    def test_unhashable_update_id(self):
+        """An update id that is not an integer is a 400, even if unhashable."""
+        data = {"update": [{"id": [self.bread.pk], "quantity": 2}], "delete": [self.bread.pk]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(GroceryItem.objects.filter(pk=self.bread.pk).exists())
+
+    def test_update_with_version(self):
+        """An update with a stale "version" rejects the batch; a current one applies."""
+        data = {"update": [{"id": self.milk.pk, "quantity": 2, "version": 2}]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['update'], [{'version': [VERSION_CONFLICT]}])
+
+        data = {"update": [{"id": self.milk.pk, "quantity": 2, "version": 1}]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['update'][0]['version'], 2)
+
+    def test_update_keeps_concurrent_changes(self):
+        """
+        Updates apply to the rows as stored when the batch is saved: fields
+        an entry does not set keep their concurrent changes, and the summary
+        counts the stored rows.
+        """
+        summary.rebuild(DEFAULT_LIST_ID)
+        batch = BatchOperation(DEFAULT_LIST_ID, {"update": [
+            {"id": self.milk.pk, "purchased": True},
+            {"id": self.bread.pk, "quantity": 3},
+        ]})
+        self.assertTrue(batch.is_valid())
+        GroceryItem.objects.filter(pk=self.milk.pk).update(quantity=5, version=2)
+        GroceryItem.objects.filter(pk=self.bread.pk).update(purchased=True)
+        summary.rebuild(DEFAULT_LIST_ID)
+        results = batch.save()
+
+        self.assertEqual(
+            [(item['quantity'], item['purchased'], item['version']) for item in results['update']],
+            [(5, True, 3), (3, True, 2)],
+        )
+        self.assertEqual(
+            list(GroceryItem.objects.order_by('pk').values_list('quantity', 'purchased')),
+            [(5, True), (3, True)],
+        )
+        self.assertEqual(sorted(CategorySummary.objects.values_list(
+            'category__name', 'total_quantity', 'purchased_count'
+        )), [("Bakery", 3, 1), ("Dairy", 5, 1)])
+
+    def test_update_of_concurrently_deleted_item(self):
+        """An item deleted after validation rejects the batch when it is saved."""
+        batch = BatchOperation(DEFAULT_LIST_ID, {
+            "create": [{"name": "Eggs"}],
+            "update": [{"id": self.milk.pk, "quantity": 2}],
+        })
+        self.assertTrue(batch.is_valid())
+        self.milk.delete()
+        with self.assertRaises(BatchRejected) as raised:
+            batch.save()
+        self.assertEqual(raised.exception.errors['update'], [{'id': [NOT_FOUND]}])
+        self.assertFalse(GroceryItem.objects.filter(name="Eggs").exists())
+    def test_empty_body(self):
+        """A body without any operations returns 400."""
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
@@ -1,7 +1,14 @@
+import time
+
+from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
-from api.models import GroceryItem
+from rest_framework.test import APITestCase, APITransactionTestCase
+from api import categories, summary
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, CategorySummary, GroceryItem
+from api.mutations import delete_all_items, set_all_purchased
+from api.sync import changes_since
 
 
 class BulkUpdatePurchasedTests(APITestCase):
@@ -14,21 +21,21 @@ class BulkUpdatePurchasedTests(APITestCase):
         self.item3 = GroceryItem.objects.create(name="Eggs", purchased=True)
 
     def test_mark_all_purchased(self):
-        """PATCH with purchased=true updates all items."""
+        """PATCH with purchased=true updates the items not yet purchased."""
         data = {"purchased": True}
         response = self.client.patch(self.url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(response.data['updated'], 2)
         self.assertTrue(all(
             item.purchased for item in GroceryItem.objects.all()
         ))
 
     def test_mark_all_unpurchased(self):
-        """PATCH with purchased=false updates all items."""
+        """PATCH with purchased=false updates the purchased item."""
         data = {"purchased": False}
         response = self.client.patch(self.url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(response.data['updated'], 1)
         # Verify all items are not purchased
         self.assertFalse(any(
             item.purchased for item in GroceryItem.objects.all()
@@ -40,3 +47,114 @@ class BulkUpdatePurchasedTests(APITestCase):
         response = self.client.patch(self.url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('error', response.data)
+
+    def test_string_value(self):
+        """A string like "False" is parsed, and the summary matches the rows."""
+        summary.rebuild(DEFAULT_LIST_ID)
+        response = self.client.patch(self.url, {"purchased": "False"}, format='json')
+        self.assertEqual(response.data['updated'], 1)
+        self.assertFalse(GroceryItem.objects.filter(purchased=True).exists())
+        totals = self.client.get(reverse('grocery-item-summary')).data['totals']
+        self.assertEqual((totals['purchased'], totals['remaining']), (0, 3))
+
+    def test_invalid_value(self):
+        """A value that is not a boolean returns 400 and writes nothing."""
+        response = self.client.patch(self.url, {"purchased": "maybe"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('purchased', response.data)
+        self.assertEqual(GroceryItem.objects.filter(purchased=True).count(), 1)
+
+
+class BatchedBulkWriteTests(TestCase):
+    """Tests for delete-all and update-purchased spanning several batches."""
+
+    def setUp(self):
+        self.addCleanup(categories.clear)
+        dairy, bakery = get_category("Dairy"), get_category("Bakery")
+        GroceryItem.objects.bulk_create(
+            GroceryItem(name=f"Item {n}", category=dairy if n % 2 else bakery,
+                        quantity=2, purchased=n % 3 == 0)
+            for n in range(7)
+        )
+        summary.rebuild(DEFAULT_LIST_ID)
+
+    def _counters(self):
+        return sorted(CategorySummary.objects.values_list(
+            'category__name', 'item_count', 'total_quantity', 'purchased_count'
+        ))
+
+    def test_set_all_purchased_in_batches(self):
+        """Each batch commits its rows and counters; only changed rows count."""
+        seen = []
+        updated = set_all_purchased(DEFAULT_LIST_ID, True, batch_size=2, progress=seen.append)
+        self.assertEqual(updated, 4)
+        self.assertEqual(seen, [2, 4])
+        self.assertFalse(GroceryItem.objects.filter(purchased=False).exists())
+        self.assertEqual(self._counters(), [("Bakery", 4, 8, 4), ("Dairy", 3, 6, 3)])
+        self.assertEqual(GroceryItem.objects.filter(version=2).count(), 4)
+
+    def test_partial_run_keeps_counters_exact(self):
+        """Counters match the items after every intermediate batch."""
+        def check(processed):
+            self.assertEqual(summary.rebuild(DEFAULT_LIST_ID), 0)
+
+        set_all_purchased(DEFAULT_LIST_ID, False, batch_size=1, progress=check)
+        delete_all_items(DEFAULT_LIST_ID, batch_size=3, progress=check)
+
+    def test_delete_all_in_batches(self):
+        """The last batch empties the list and records the clear."""
+        since = changes_since(DEFAULT_LIST_ID, 0)['revision']
+        seen = []
+        self.assertEqual(delete_all_items(DEFAULT_LIST_ID, batch_size=3, progress=seen.append), 7)
+        self.assertEqual(seen, [3, 6, 7])
+        self.assertFalse(GroceryItem.objects.exists())
+        self.assertFalse(CategorySummary.objects.exists())
+        self.assertTrue(changes_since(DEFAULT_LIST_ID, since)['cleared'])
+
+
+class BackgroundBulkWriteTests(APITransactionTestCase):
+    """Tests for ?background=1 and the jobs/<id>/ status endpoint."""
+
+    serialized_rollback = True
+
+    def setUp(self):
+        self.addCleanup(categories.clear)
+        GroceryItem.objects.bulk_create(GroceryItem(name=f"Item {n}") for n in range(5))
+        summary.rebuild(DEFAULT_LIST_ID)
+
+    def _wait(self, url):
+        for _ in range(200):
+            job = self.client.get(url).data
+            if job['state'] != 'running':
+                return job
+            time.sleep(0.01)
+        self.fail('Background job did not finish.')
+
+    def test_background_delete_all(self):
+        """DELETE ?background=1 returns 202 with the job, which deletes every item."""
+        response = self.client.delete(reverse('grocery-item-list') + '?background=1')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['operation'], 'delete-all')
+        job = self._wait(response['Location'])
+        self.assertEqual((job['state'], job['processed']), ('done', 5))
+        self.assertFalse(GroceryItem.objects.exists())
+
+    def test_background_update_purchased(self):
+        """update-purchased ?background=1 reports the items it changed."""
+        url = reverse('bulk-update') + '?background=1'
+        response = self.client.patch(url, {'purchased': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = self._wait(response['Location'])
+        self.assertEqual((job['state'], job['processed']), ('done', 5))
+        self.assertEqual(GroceryItem.objects.filter(purchased=True).count(), 5)
+
+    def test_job_of_other_list(self):
+        """A job is only visible under its own list, and unknown ids are 404."""
+        response = self.client.delete(reverse('grocery-item-list') + '?background=1')
+        self._wait(response['Location'])
+        url = reverse('grocery-item-job', kwargs={'list_id': 99, 'job_id': response.data['id']})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        url = reverse('grocery-item-job', kwargs={'job_id': 'missing'})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        url = reverse('grocery-item-list', kwargs={'list_id': 99}) + '?background=1'
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import categories
+from api.models import Category, GroceryItem
+
+
+class CategoryTests(APITestCase):
+    """Tests for the Category lookup table behind the category string."""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-list')
+        self.addCleanup(categories.clear)
+
+    def test_api_reads_and_writes_names(self):
+        """The API takes and returns category names; rows share one Category."""
+        for name in ("Milk", "Cheese"):
+            response = self.client.post(self.url, {'name': name, 'category': "Dairy"}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data['category'], "Dairy")
+        self.assertEqual(Category.objects.filter(name="Dairy").count(), 1)
+        self.assertEqual(
+            {item['category'] for item in self.client.get(self.url).data}, {"Dairy"}
+        )
+
+    def test_default_category(self):
+        """Items created without a category get "Other"."""
+        response = self.client.post(self.url, {'name': "Milk"}, format='json')
+        self.assertEqual(response.data['category'], "Other")
+
+    def test_category_too_long(self):
+        """Category names keep the 100 character limit."""
+        response = self.client.post(self.url, {'name': "Milk", 'category': "x" * 101}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', response.data)
+        self.assertFalse(Category.objects.filter(name="x" * 101).exists())
+
+    def test_rejected_writes_create_no_category(self):
+        """A request that fails validation leaves no new category behind."""
+        GroceryItem.objects.create(name="Milk")
+        rejected = [
+            (self.url, {'name': "Milk", 'category': "Frozen"}),
+            (self.url, {'name': "Peas", 'category': "Frozen", 'quantity': 0}),
+            (reverse('grocery-item-batch'), {'create': [
+                {'name': "Peas", 'category': "Frozen"}, {'name': "Peas", 'category': "Tins"},
+            ]}),
+        ]
+        for url, body in rejected:
+            response = self.client.post(url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Category.objects.filter(name__in=["Frozen", "Tins"]).exists())
+
+        response = self.client.post(self.url, {'name': "Peas", 'category': "Frozen"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(GroceryItem.objects.get(name="Peas").category.name, "Frozen")
+
+    def test_filter_by_unknown_category(self):
+        """Filtering by a category nobody uses returns nothing and creates nothing."""
+        GroceryItem.objects.create(name="Milk", category=categories.get_category("Dairy"))
+        response = self.client.get(self.url, {'category': "Frozen"})
+        self.assertEqual(response.data, [])
+        self.assertFalse(Category.objects.filter(name="Frozen").exists())
+
+    def test_cache_fills_on_commit(self):
+        """Categories are cached only once the transaction that saw them commits."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            dairy = categories.get_category("Dairy")
+            self.assertIsNone(categories.cached_id("Dairy"))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(categories.cached_id("Dairy"), dairy.pk)
+        self.assertEqual(categories.category_name(dairy.pk), "Dairy")
+
+    def test_warm_cache_avoids_category_queries(self):
+        """With a warm cache, list reads and writes never touch api_category."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {'name': "Milk", 'category': "Dairy"}, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'name': "Cheese", 'category': "Dairy"}, format='json')
+            response = self.client.get(self.url, {'category': "Dairy"})
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse([q for q in queries if 'api_category"' in q['sql']])
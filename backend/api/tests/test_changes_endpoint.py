@@ -0,0 +1,88 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import GroceryItem, Tombstone
+
+
+class GroceryItemChangesTests(APITestCase):
+    """Tests for GET on /api/grocery-items/changes/"""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-changes')
+        self.list_url = reverse('grocery-item-list')
+        self.milk = self.client.post(self.list_url, {"name": "Milk"}, format='json').data
+        self.bread = self.client.post(self.list_url, {"name": "Bread"}, format='json').data
+        self.revision = self._changes(0)['revision']
+
+    def _changes(self, since):
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_since_zero_returns_everything(self):
+        """since=0 returns every item."""
+        data = self._changes(0)
+        self.assertEqual([item['name'] for item in data['updated']], ["Milk", "Bread"])
+        self.assertFalse(data['reset'])
+
+    def test_no_changes(self):
+        """Asking from the current revision returns an empty delta."""
+        data = self._changes(self.revision)
+        self.assertEqual(data['updated'], [])
+        self.assertEqual(data['deleted'], [])
+        self.assertEqual(data['revision'], self.revision)
+
+    def test_only_changed_items_are_returned(self):
+        """Creates, updates and deletes after `since` are reported."""
+        detail = reverse('grocery-item-detail', kwargs={'pk': self.milk['id']})
+        self.client.patch(detail, {"quantity": 2}, format='json')
+        self.client.post(self.list_url, {"name": "Eggs"}, format='json')
+        self.client.delete(reverse('grocery-item-detail', kwargs={'pk': self.bread['id']}))
+
+        data = self._changes(self.revision)
+        self.assertEqual([item['name'] for item in data['updated']], ["Milk", "Eggs"])
+        self.assertEqual(data['updated'][0]['quantity'], 2)
+        self.assertEqual(data['deleted'], [self.bread['id']])
+        self.assertEqual(data['revision'], self.revision + 3)
+
+    def test_bulk_and_batch_paths_are_tracked(self):
+        """bulk_update_purchased and the batch endpoint record changes."""
+        self.client.patch(reverse('bulk-update'), {"purchased": True}, format='json')
+        data = self._changes(self.revision)
+        self.assertEqual(len(data['updated']), 2)
+
+        revision = data['revision']
+        self.client.post(reverse('grocery-item-batch'), {"delete": [self.milk['id']]}, format='json')
+        data = self._changes(revision)
+        self.assertEqual(data['deleted'], [self.milk['id']])
+
+    def test_delete_all_reports_cleared(self):
+        """Deleting the whole list is reported as cleared, not per item."""
+        self.client.delete(self.list_url)
+        self.client.post(self.list_url, {"name": "Eggs"}, format='json')
+        data = self._changes(self.revision)
+        self.assertTrue(data['cleared'])
+        self.assertEqual([item['name'] for item in data['updated']], ["Eggs"])
+        self.assertEqual(Tombstone.objects.count(), 1)
+
+    def test_invalid_since(self):
+        """Missing or negative since returns 400."""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'since': '-1'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_compaction_forces_reset(self):
+        """Clients behind the compacted revision are told to refetch."""
+        self.client.delete(reverse('grocery-item-detail', kwargs={'pk': self.bread['id']}))
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=30))
+        call_command('compact_changes', days=7, stdout=StringIO())
+
+        self.assertEqual(Tombstone.objects.count(), 0)
+        self.assertTrue(self._changes(self.revision)['reset'])
+        self.assertFalse(self._changes(self.revision + 1)['reset'])
+        self.assertTrue(GroceryItem.objects.filter(pk=self.milk['id']).exists())
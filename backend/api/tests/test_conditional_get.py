@@ -0,0 +1,75 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import GroceryItem
+
+
+class ListConditionalGetTests(APITestCase):
+    """Tests for ETag / Last-Modified on GET /api/grocery-items/"""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-list')
+        self.client.post(self.url, {"name": "Milk"}, format='json')
+
+    def test_list_sends_validators(self):
+        """GET includes ETag and Last-Modified headers."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_unchanged_list_returns_304(self):
+        """A matching If-None-Match returns 304 without running the list query."""
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_each_mutation_changes_etag(self):
+        """POST, PATCH, DELETE and bulk updates all change the list ETag."""
+        item = GroceryItem.objects.get(name="Milk")
+        detail = reverse('grocery-item-detail', kwargs={'pk': item.pk})
+        mutations = [
+            lambda: self.client.post(self.url, {"name": "Bread"}, format='json'),
+            lambda: self.client.patch(detail, {"quantity": 3}, format='json'),
+            lambda: self.client.patch(reverse('bulk-update'), {"purchased": True}, format='json'),
+            lambda: self.client.post(reverse('grocery-item-batch'), {"create": [{"name": "Eggs"}]}, format='json'),
+            lambda: self.client.delete(detail),
+            lambda: self.client.delete(self.url),
+        ]
+        etag = self.client.get(self.url)['ETag']
+        for mutate in mutations:
+            mutate()
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response['ETag']
+
+
+class DetailConditionalGetTests(APITestCase):
+    """Tests for ETag / Last-Modified on GET /api/grocery-items/<pk>/"""
+
+    def setUp(self):
+        self.item = GroceryItem.objects.create(name="Milk")
+        self.url = reverse('grocery-item-detail', kwargs={'pk': self.item.pk})
+
+    def test_unchanged_item_returns_304(self):
+        """A matching If-None-Match returns 304."""
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_patch_changes_item_etag(self):
+        """PATCH gives the item a new ETag."""
+        etag = self.client.get(self.url)['ETag']
+        self.client.patch(self.url, {"purchased": True}, format='json')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_item_still_404(self):
+        """Conditional handling does not mask a missing item."""
+        url = reverse('grocery-item-detail', kwargs={'pk': 0})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"item-0-0"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,6 +1,7 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from api.categories import get_category
 from api.models import GroceryItem
 
 
@@ -9,7 +10,7 @@ class GroceryItemDetailTests(APITestCase):
 
     def setUp(self):
         self.item = GroceryItem.objects.create(
-            name="Milk", category="Dairy", quantity=2
+            name="Milk", category=get_category("Dairy"), quantity=2
         )
         self.url = reverse('grocery-item-detail', kwargs={'pk': self.item.pk})
 
@@ -0,0 +1,148 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from api import events
+from api.events import LocalBroker, format_sse
+from api.models import GroceryItem
+
+
+class RecordingBroker(LocalBroker):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, event):
+        self.published.append(event)
+
+
+class LocalBrokerTests(SimpleTestCase):
+    """Tests for the in-process broker."""
+
+    async def test_subscriber_receives_event(self):
+        """Published events reach every subscriber."""
+        broker = LocalBroker()
+        first, second = broker.subscribe(), broker.subscribe()
+        broker.publish({'type': 'cleared', 'revision': 3})
+        self.assertEqual((await first.get())['type'], 'cleared')
+        self.assertEqual((await second.get())['revision'], 3)
+
+    async def test_publish_from_another_thread(self):
+        """Events published from a worker thread are delivered to the loop."""
+        broker = LocalBroker()
+        subscription = broker.subscribe()
+        await asyncio.to_thread(broker.publish, {'type': 'cleared', 'revision': 1})
+        event = await asyncio.wait_for(subscription.get(), timeout=1)
+        self.assertEqual(event['type'], 'cleared')
+
+    async def test_slow_subscriber_gets_resync(self):
+        """A full queue is collapsed into a single resync event."""
+        broker = LocalBroker()
+        subscription = broker.subscribe()
+        for revision in range(events.QUEUE_SIZE + 1):
+            broker.publish({'type': 'updated', 'revision': revision})
+        await asyncio.sleep(0)
+        self.assertEqual(subscription.queue.qsize(), 1)
+        self.assertEqual((await subscription.get())['type'], 'resync')
+
+    async def test_closed_subscription_is_removed(self):
+        """Closing a subscription unsubscribes it."""
+        broker = LocalBroker()
+        broker.subscribe().close()
+        self.assertEqual(broker.subscriber_count, 0)
+
+    def test_format_sse(self):
+        """Events are encoded with the revision as the SSE id."""
+        message = format_sse({'type': 'deleted', 'revision': 7, 'ids': [1]})
+        self.assertTrue(message.startswith('id: 7\nevent: deleted\ndata: {'))
+        self.assertTrue(message.endswith('\n\n'))
+
+
+class MutationEventTests(APITestCase):
+    """Mutation paths publish events after commit."""
+
+    def setUp(self):
+        self.broker = RecordingBroker()
+        patcher = mock.patch.object(events, '_broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = reverse('grocery-item-list')
+
+    def _types(self):
+        return [event['type'] for event in self.broker.published]
+
+    def test_create_update_delete_events(self):
+        """POST, PATCH and DELETE publish created, updated and deleted."""
+        with self.captureOnCommitCallbacks(execute=True):
+            item = self.client.post(self.url, {"name": "Milk"}, format='json').data
+        detail = reverse('grocery-item-detail', kwargs={'pk': item['id']})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail, {"quantity": 2}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail)
+
+        self.assertEqual(self._types(), ['created', 'updated', 'deleted'])
+        self.assertEqual(self.broker.published[0]['items'][0]['name'], "Milk")
+        self.assertEqual(self.broker.published[1]['items'][0]['quantity'], 2)
+        self.assertEqual(self.broker.published[2]['ids'], [item['id']])
+
+    def test_bulk_paths_publish(self):
+        """bulk_update_purchased and delete-all publish one event each."""
+        GroceryItem.objects.create(name="Milk")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('bulk-update'), {"purchased": True}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.url)
+        self.assertEqual(self._types(), ['bulk_updated', 'cleared'])
+        self.assertEqual(self.broker.published[0]['fields'], {'purchased': True})
+
+    def test_failed_write_publishes_nothing(self):
+        """Invalid requests do not publish."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"name": "Milk", "quantity": 0}, format='json')
+        self.assertEqual(self.broker.published, [])
+
+
+class EventStreamTests(TestCase):
+    """Tests for GET on /api/grocery-items/events/"""
+
+    async def test_stream_delivers_events(self):
+        """The SSE stream yields published events."""
+        broker = LocalBroker()
+        with mock.patch.object(events, '_broker', broker):
+            response = await self.async_client.get(
+                reverse('grocery-item-events'), headers={'Last-Event-ID': '4'}
+            )
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b': connected\n\n')
+            self.assertIn(b'event: resync', await anext(stream))
+
+            broker.publish({'type': 'cleared', 'revision': 5})
+            self.assertIn(b'event: cleared', await anext(stream))
+            await stream.aclose()
+            response.close()
+        self.assertEqual(broker.subscriber_count, 0)
+
+    async def test_disconnect_unsubscribes(self):
+        """Closing the response closes the subscription without draining the stream."""
+        broker = LocalBroker()
+        with mock.patch.object(events, '_broker', broker):
+            response = await self.async_client.get(reverse('grocery-item-events'))
+            await anext(aiter(response.streaming_content))
+            self.assertEqual(broker.subscriber_count, 1)
+            response.close()
+        self.assertEqual(broker.subscriber_count, 0)
+
+    async def test_unknown_list(self):
+        """A missing list returns 404 instead of an open stream."""
+        url = reverse('grocery-item-events', kwargs={'list_id': 999})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_not_served_under_wsgi(self):
+        """A WSGI request gets 501: the server would never send the stream."""
+        response = self.client.get(reverse('grocery-item-events'))
+        self.assertEqual(response.status_code, 501)
@@ -0,0 +1,58 @@
+import json
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.export import stream_json_array
+from api.categories import get_category
+from api.models import GroceryItem
+
+
+class GroceryItemExportTests(APITestCase):
+    """Tests for GET on /api/grocery-items/export/"""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-export')
+        GroceryItem.objects.create(name="Milk", category=get_category("Dairy"), quantity=2)
+        GroceryItem.objects.create(name="Bread", category=get_category("Bakery"), purchased=True)
+
+    def _body(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_json_array(self):
+        """Default export streams a JSON array of every item."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = json.loads(self._body(response))
+        self.assertEqual([item['name'] for item in data], ["Milk", "Bread"])
+        self.assertEqual(data[0], {
+            'id': data[0]['id'], 'name': "Milk", 'category': "Dairy",
+            'quantity': 2, 'purchased': False, 'version': 1,
+        })
+
+    def test_export_empty_list(self):
+        """Exporting an empty table yields an empty array."""
+        GroceryItem.objects.all().delete()
+        response = self.client.get(self.url)
+        self.assertEqual(json.loads(self._body(response)), [])
+
+    def test_export_ndjson(self):
+        """ndjson=1 streams one JSON object per line."""
+        response = self.client.get(self.url, {'ndjson': '1'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = self._body(response).splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], ["Milk", "Bread"])
+
+    def test_export_applies_filters(self):
+        """List filters also apply to the export."""
+        response = self.client.get(self.url, {'purchased': 'true'})
+        data = json.loads(self._body(response))
+        self.assertEqual([item['name'] for item in data], ["Bread"])
+
+    def test_stream_chunks_join_into_valid_json(self):
+        """Chunk boundaries do not break the JSON array."""
+        GroceryItem.objects.create(name="Eggs")
+        body = ''.join(stream_json_array(GroceryItem.objects.order_by('id'), chunk_size=2))
+        self.assertEqual([item['name'] for item in json.loads(body)], ["Milk", "Bread", "Eggs"])
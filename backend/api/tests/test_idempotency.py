@@ -0,0 +1,150 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from api import idempotency
+from api.categories import get_category
+from api.models import GroceryItem
+
+
+class IdempotencyKeyTests(APITestCase):
+    """Tests for Idempotency-Key on the mutating endpoints."""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-list')
+        self.store = caches[idempotency.CACHE_ALIAS]
+        self.store.clear()
+        self.addCleanup(self.store.clear)
+
+    def test_retried_create_is_replayed(self):
+        """A retried POST returns the first 201 without creating a second item."""
+        first = self.client.post(
+            self.url, {'name': "Milk"}, format='json', HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        retry = self.client.post(
+            self.url, {'name': "Milk"}, format='json', HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(GroceryItem.objects.count(), 1)
+
+    def test_retried_batch_is_not_applied_twice(self):
+        """A retried batch replays its result instead of running again."""
+        url = reverse('grocery-item-batch')
+        body = {'create': [{'name': "Eggs"}]}
+        self.client.post(url, body, format='json', HTTP_IDEMPOTENCY_KEY='batch-1')
+        retry = self.client.post(url, body, format='json', HTTP_IDEMPOTENCY_KEY='batch-1')
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(GroceryItem.objects.filter(name="Eggs").count(), 1)
+
+    def test_retried_delete_is_replayed(self):
+        """A retried DELETE replays 204 instead of returning 404."""
+        milk = GroceryItem.objects.create(name="Milk", category=get_category("Dairy"))
+        url = reverse('grocery-item-detail', kwargs={'pk': milk.pk})
+        self.client.delete(url, HTTP_IDEMPOTENCY_KEY='del-1')
+        retry = self.client.delete(url, HTTP_IDEMPOTENCY_KEY='del-1')
+        self.assertEqual(retry.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_replay_keeps_etag(self):
+        """A replayed PATCH carries the ETag of the version it produced."""
+        milk = GroceryItem.objects.create(name="Milk", category=get_category("Dairy"))
+        url = reverse('grocery-item-detail', kwargs={'pk': milk.pk})
+        first = self.client.patch(url, {'quantity': 2}, format='json', HTTP_IDEMPOTENCY_KEY='p-1')
+        retry = self.client.patch(url, {'quantity': 2}, format='json', HTTP_IDEMPOTENCY_KEY='p-1')
+        self.assertEqual(retry['ETag'], first['ETag'])
+        self.assertEqual(retry['Content-Type'], first['Content-Type'])
+        self.assertEqual(retry.json(), first.json())
+
+    def test_replay_keeps_location(self):
+        """A replayed 202 points at the job the first request started."""
+        job = {'id': 'job-1', 'operation': 'delete-all', 'state': 'running'}
+        url = self.url + '?background=1'
+        with mock.patch('api.views.jobs.start', return_value=job) as start:
+            first = self.client.delete(url, HTTP_IDEMPOTENCY_KEY='bg-1')
+            retry = self.client.delete(url, HTTP_IDEMPOTENCY_KEY='bg-1')
+        self.assertEqual(start.call_count, 1)
+        self.assertEqual(retry.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(retry['Location'], first['Location'])
+
+    def test_key_reused_for_different_request(self):
+        """Reusing a key with another body returns 422 and writes nothing."""
+        self.client.post(self.url, {'name': "Milk"}, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        response = self.client.post(
+            self.url, {'name': "Bread"}, format='json', HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertIn('error', response.data)
+        self.assertFalse(GroceryItem.objects.filter(name="Bread").exists())
+
+    def test_request_in_progress(self):
+        """A retry while the first attempt still holds the key returns 409."""
+        request = APIRequestFactory().post(self.url, {'name': "Milk"}, format='json')
+        self.store.add(
+            idempotency._cache_key('abc'),
+            {'fingerprint': idempotency._fingerprint(request)},
+        )
+        response = self.client.post(
+            self.url, {'name': "Milk"}, format='json', HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_key_too_long(self):
+        """A key over the length limit returns 400."""
+        response = self.client.post(
+            self.url, {'name': "Milk"}, format='json', HTTP_IDEMPOTENCY_KEY='k' * 256
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GroceryItem.objects.exists())
+
+    def test_client_errors_are_replayed(self):
+        """A 400 is stored like any other response, so the retry gets the same 400."""
+        first = self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='bad')
+        retry = self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='bad')
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_without_key(self):
+        """Requests without the header behave as before."""
+        self.client.post(self.url, {'name': "Milk"}, format='json')
+        response = self.client.post(self.url, {'name': "Milk"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncIdempotencyKeyTests(TestCase):
+    """Idempotency-Key on the api.async_views endpoints."""
+
+    def setUp(self):
+        self.url = reverse('async-grocery-item-list')
+        self.store = caches[idempotency.CACHE_ALIAS]
+        self.store.clear()
+        self.addCleanup(self.store.clear)
+
+    async def _post(self, body, key):
+        return await self.async_client.post(
+            self.url, body, content_type='application/json',
+            headers={'Idempotency-Key': key},
+        )
+
+    async def test_retried_create_is_replayed(self):
+        """A retried async POST returns the first 201 without creating a second item."""
+        first = await self._post({'name': "Milk"}, 'abc')
+        retry = await self._post({'name': "Milk"}, 'abc')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(await GroceryItem.objects.acount(), 1)
+
+    async def test_key_reused_for_different_request(self):
+        """Reusing a key with another body returns 422 as JSON."""
+        await self._post({'name': "Milk"}, 'abc')
+        response = await self._post({'name': "Bread"}, 'abc')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertIn('error', response.json())
+        self.assertFalse(await GroceryItem.objects.filter(name="Bread").aexists())
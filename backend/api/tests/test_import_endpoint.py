@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import categories, importer
+from api.models import DEFAULT_LIST_ID, CategorySummary, GroceryItem, ListRevision
+
+
+class GroceryItemImportTests(APITestCase):
+    """Tests for POST /api/grocery-items/import/"""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-import')
+        self.addCleanup(categories.clear)
+
+    def _post(self, body, content_type, **params):
+        url = self.url
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.generic('POST', url, body.encode(), content_type=content_type)
+
+    def test_import_csv(self):
+        """CSV rows are created with the field defaults for empty cells."""
+        body = (
+            "name,category,quantity,purchased\n"
+            "Milk,Dairy,2,true\n"
+            "Bread,,,\n"
+        )
+        response = self._post(body, 'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 0)
+        milk = GroceryItem.objects.get(name="Milk")
+        self.assertEqual((milk.category.name, milk.quantity, milk.purchased), ("Dairy", 2, True))
+        bread = GroceryItem.objects.get(name="Bread")
+        self.assertEqual((bread.category.name, bread.quantity), ("Other", 1))
+
+    def test_import_ndjson(self):
+        """NDJSON rows are created; blank lines are ignored."""
+        body = '{"name": "Milk", "quantity": 3}\n\n{"name": "Eggs", "category": "Dairy"}\n'
+        response = self._post(body, 'application/x-ndjson')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(GroceryItem.objects.get(name="Milk").quantity, 3)
+
+    def test_row_errors_do_not_abort(self):
+        """Invalid rows are reported by line and the valid rows still load."""
+        GroceryItem.objects.create(name="Milk")
+        body = "\n".join([
+            '{"name": "Milk"}',
+            '{"name": "Eggs", "quantity": 0}',
+            'not json',
+            '[1, 2]',
+            '{"name": "Bread"}',
+            '{"name": "Bread"}',
+            '{"name": "Tea"}',
+        ])
+        response = self._post(body, 'application/x-ndjson', batch_size=2)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 5)
+        errors = {error['line']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4, 6])
+        self.assertIn('name', errors[1])
+        self.assertIn('quantity', errors[2])
+        self.assertIn('non_field_errors', errors[3])
+        self.assertIn('name', errors[6])
+        self.assertEqual(
+            sorted(GroceryItem.objects.values_list('name', flat=True)), ["Bread", "Milk", "Tea"]
+        )
+
+    def test_batches(self):
+        """Each batch is one bulk INSERT in its own revision; counters stay right."""
+        before = ListRevision.current(DEFAULT_LIST_ID).revision
+        body = "name\n" + "".join(f"item-{n}\n" for n in range(5))
+        with CaptureQueriesContext(connection) as queries:
+            response = self._post(body, 'text/csv', batch_size=2)
+        self.assertEqual(response.data['created'], 5)
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "api_groceryitem"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(ListRevision.current(DEFAULT_LIST_ID).revision, before + 3)
+        self.assertEqual(CategorySummary.objects.get(list_id=DEFAULT_LIST_ID).item_count, 5)
+
+    def test_error_report_is_bounded(self):
+        """Only the first MAX_REPORTED_ERRORS errors are listed."""
+        body = '{"quantity": 0}\n' * 5
+        with mock.patch.object(importer, 'MAX_REPORTED_ERRORS', 2):
+            response = self._post(body, 'application/x-ndjson')
+        self.assertEqual(response.data['failed'], 5)
+        self.assertEqual(len(response.data['errors']), 2)
+        self.assertTrue(response.data['errors_truncated'])
+
+    def test_unsupported_content_type(self):
+        """Bodies other than CSV and NDJSON return 415."""
+        response = self.client.post(self.url, [{'name': "Milk"}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_invalid_batch_size(self):
+        """batch_size must be a positive integer within the limit."""
+        for value in ('0', 'abc', str(importer.MAX_IMPORT_BATCH_SIZE + 1)):
+            response = self._post("name\nMilk\n", 'text/csv', batch_size=value)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GroceryItem.objects.exists())
+
+    def test_unknown_list(self):
+        """Importing into a missing list returns 404."""
+        url = reverse('grocery-item-import', kwargs={'list_id': 999})
+        response = self.client.generic('POST', url, b"name\nMilk\n", content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ImportItemsCommandTests(APITestCase):
+    """Tests for manage.py import_items"""
+
+    def setUp(self):
+        self.addCleanup(categories.clear)
+
+    def _file(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as output:
+            output.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_file(self):
+        """The format follows the extension and errors go to stderr."""
+        path = self._file('.ndjson', json.dumps({'name': "Milk"}) + '\n{"name": ""}\n')
+        out, err = StringIO(), StringIO()
+        call_command('import_items', path, batch_size=10, stdout=out, stderr=err)
+        self.assertIn('Imported 1 items; 1 rows failed.', out.getvalue())
+        self.assertIn('line 2', err.getvalue())
+        self.assertTrue(GroceryItem.objects.filter(name="Milk").exists())
+
+    def test_unknown_format(self):
+        """Files without a known extension need --format."""
+        path = self._file('.txt', "name\nMilk\n")
+        with self.assertRaises(CommandError):
+            call_command('import_items', path, stdout=StringIO())
+        call_command('import_items', path, format='csv', stdout=StringIO())
+        self.assertTrue(GroceryItem.objects.filter(name="Milk").exists())
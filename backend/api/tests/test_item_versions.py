@@ -0,0 +1,165 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import summary
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, CategorySummary, GroceryItem, ListRevision
+
+
+class ItemVersionTests(APITestCase):
+    """Tests for optimistic concurrency on PATCH /api/grocery-items/<pk>/"""
+
+    def setUp(self):
+        self.item = GroceryItem.objects.create(
+            name="Milk", category=get_category("Dairy"), quantity=2
+        )
+        self.url = reverse('grocery-item-detail', kwargs={'pk': self.item.pk})
+
+    def test_patch_increments_version(self):
+        """Every PATCH bumps the version; the response carries the new ETag."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(response['ETag'], f'"item-{self.item.pk}-1"')
+        response = self.client.patch(self.url, {'purchased': True}, format='json')
+        self.assertEqual(response.data['version'], 2)
+        self.assertEqual(response['ETag'], self.client.get(self.url)['ETag'])
+
+    def test_if_match(self):
+        """If-Match with the current ETag applies the update."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.patch(
+            self.url, {'quantity': 5}, format='json', HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quantity'], 5)
+        response = self.client.patch(
+            self.url, {'quantity': 6}, format='json', HTTP_IF_MATCH=f'W/{response["ETag"]}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_stale_if_match_conflicts(self):
+        """A stale If-Match returns 409 with the current item and writes nothing."""
+        etag = self.client.get(self.url)['ETag']
+        self.client.patch(self.url, {'purchased': True}, format='json')
+        revision = ListRevision.current(DEFAULT_LIST_ID).revision
+
+        response = self.client.patch(
+            self.url, {'quantity': 9}, format='json', HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('error', response.data)
+        self.assertEqual(response.data['item']['version'], 2)
+        self.assertTrue(response.data['item']['purchased'])
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.version), (2, 2))
+        self.assertEqual(ListRevision.current(DEFAULT_LIST_ID).revision, revision)
+
+    def test_version_in_body(self):
+        """A "version" in the body is checked like If-Match."""
+        response = self.client.patch(
+            self.url, {'purchased': True, 'version': 1}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(
+            self.url, {'purchased': False, 'version': 1}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.item.refresh_from_db()
+        self.assertTrue(self.item.purchased)
+
+    def test_invalid_preconditions(self):
+        """Malformed If-Match headers and versions return 400."""
+        other = f'"item-{self.item.pk + 1}-1"'
+        for header in ('"list-1-1"', other, 'garbage'):
+            response = self.client.patch(
+                self.url, {'quantity': 3}, format='json', HTTP_IF_MATCH=header
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for version in (0, 'abc'):
+            response = self.client.patch(
+                self.url, {'quantity': 3, 'version': version}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('version', response.data)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.version, 1)
+
+    def test_if_match_any(self):
+        """If-Match: * applies the update unconditionally."""
+        response = self.client.patch(
+            self.url, {'quantity': 3}, format='json', HTTP_IF_MATCH='*'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_missing_item(self):
+        """PATCH of an unknown item returns 404 with or without If-Match."""
+        url = reverse('grocery-item-detail', kwargs={'pk': 0})
+        response = self.client.patch(url, {'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.patch(url, {'quantity': 3}, format='json', HTTP_IF_MATCH='"item-0-1"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_summary_follows_update(self):
+        """Counters move with a conditional update and not with a conflict."""
+        summary.rebuild(DEFAULT_LIST_ID)
+        self.client.patch(
+            self.url, {'category': "Bakery", 'version': 1}, format='json'
+        )
+        self.client.patch(
+            self.url, {'category': "Frozen", 'version': 1}, format='json'
+        )
+        counters = CategorySummary.objects.filter(list_id=DEFAULT_LIST_ID)
+        self.assertEqual(
+            list(counters.values_list('category__name', 'item_count', 'total_quantity')),
+            [("Bakery", 1, 2)],
+        )
+
+    def test_single_statement(self):
+        """A PATCH writes the item with one UPDATE and does not read it first."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(self.url, {'quantity': 5, 'version': 1}, format='json')
+        item_queries = [q['sql'] for q in queries if '"api_groceryitem"' in q['sql']]
+        self.assertEqual(len(item_queries), 1)
+        self.assertIn('RETURNING', item_queries[0])
+
+    def test_other_writes_increment_version(self):
+        """Bulk updates, batches and upserts also bump the version."""
+        self.client.patch(reverse('bulk-update'), {'purchased': True}, format='json')
+        self.client.post(
+            reverse('grocery-item-batch'),
+            {'update': [{'id': self.item.pk, 'quantity': 4}]}, format='json',
+        )
+        response = self.client.post(
+            reverse('grocery-item-list') + '?on_conflict=increment',
+            {'name': "Milk"}, format='json',
+        )
+        self.assertEqual(response.data['version'], 4)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.version, 4)
+
+
+class AsyncItemVersionTests(TestCase):
+    """Tests for If-Match on PATCH /api/async/grocery-items/<pk>/"""
+
+    def setUp(self):
+        self.item = GroceryItem.objects.create(name="Milk")
+        self.url = reverse('async-grocery-item-detail', kwargs={'pk': self.item.pk})
+
+    async def test_if_match(self):
+        """A current If-Match applies; a stale one returns 409."""
+        etag = (await self.async_client.get(self.url))['ETag']
+        response = await self.async_client.patch(
+            self.url, {'quantity': 2}, content_type='application/json',
+            headers={'If-Match': etag},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"item-{self.item.pk}-2"')
+        response = await self.async_client.patch(
+            self.url, {'quantity': 3}, content_type='application/json',
+            headers={'If-Match': etag},
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['item']['quantity'], 2)
@@ -0,0 +1,71 @@
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.admin import GroceryItemAdmin
+from api.models import GroceryItem
+
+
+class ListCacheTests(APITestCase):
+    """Tests for the list response cache and its invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('grocery-item-list')
+        self.stats_url = reverse('list-cache-stats')
+        self.item = GroceryItem.objects.create(name="Milk")
+
+    def _get_names(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.json()]
+
+    def test_second_get_is_a_hit(self):
+        """A repeated GET is served from the cache without the list query."""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):  # the ETag lookup only
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()[0]['name'], "Milk")
+        stats = self.client.get(self.stats_url).data
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_query_strings_are_cached_separately(self):
+        """Filtered requests do not share cache entries with the full list."""
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'purchased': 'true'})
+        self.assertEqual(response.json(), [])
+
+    def test_mutations_invalidate(self):
+        """POST, PATCH, DELETE and bulk updates invalidate the cache."""
+        detail = reverse('grocery-item-detail', kwargs={'pk': self.item.pk})
+        self.assertEqual(self._get_names(), ["Milk"])
+
+        self.client.post(self.url, {"name": "Bread"}, format='json')
+        self.assertEqual(self._get_names(), ["Milk", "Bread"])
+
+        self.client.patch(detail, {"name": "Oat Milk"}, format='json')
+        self.assertEqual(self._get_names(), ["Oat Milk", "Bread"])
+
+        self.client.patch(reverse('bulk-update'), {"purchased": True}, format='json')
+        self.assertTrue(all(item['purchased'] for item in self.client.get(self.url).json()))
+
+        self.client.delete(detail)
+        self.assertEqual(self._get_names(), ["Bread"])
+
+        self.client.delete(self.url)
+        self.assertEqual(self._get_names(), [])
+
+    def test_admin_save_invalidates(self):
+        """Saving through the admin invalidates the cache."""
+        self._get_names()
+        self.item.name = "Soy Milk"
+        GroceryItemAdmin(GroceryItem, AdminSite()).save_model(None, self.item, None, True)
+        self.assertEqual(self._get_names(), ["Soy Milk"])
+
+    def test_admin_delete_invalidates(self):
+        """Deleting through the admin invalidates the cache."""
+        self._get_names()
+        GroceryItemAdmin(GroceryItem, AdminSite()).delete_queryset(None, GroceryItem.objects.all())
+        self.assertEqual(self._get_names(), [])
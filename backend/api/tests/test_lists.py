@@ -0,0 +1,214 @@
+from unittest import mock
+
+from django.contrib.admin.sites import AdminSite
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import categories, events
+from api.admin import GroceryListAdmin
+from api.categories import get_category
+from api.models import (
+    DEFAULT_LIST_ID, CategorySummary, GroceryItem, GroceryList, ListRevision, Tombstone,
+)
+from api.tests.test_events import RecordingBroker
+
+
+class GroceryListEndpointTests(APITestCase):
+    """Tests for /api/lists/ and /api/lists/<list_id>/"""
+
+    def setUp(self):
+        self.url = reverse('grocery-list-list')
+
+    def test_default_list_exists(self):
+        """Migrations create the default list served by /api/grocery-items/."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [DEFAULT_LIST_ID])
+
+    def test_create_list(self):
+        """POST creates a list that starts empty at revision 0."""
+        response = self.client.post(self.url, {'name': "Cabin"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['name'], "Cabin")
+        self.assertEqual(ListRevision.current(response.data['id']).revision, 0)
+        items = reverse('grocery-item-list', kwargs={'list_id': response.data['id']})
+        self.assertEqual(self.client.get(items).data, [])
+
+    def test_list_created_in_admin(self):
+        """A list saved through the admin gets its revision row and takes items."""
+        grocery_list = GroceryList(name="Cabin")
+        GroceryListAdmin(GroceryList, AdminSite()).save_model(None, grocery_list, None, change=False)
+        self.assertEqual(ListRevision.current(grocery_list.pk).revision, 0)
+        items = reverse('grocery-item-list', kwargs={'list_id': grocery_list.pk})
+        response = self.client.post(items, {'name': "Milk"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        summary = reverse('grocery-item-summary', kwargs={'list_id': grocery_list.pk})
+        self.assertEqual(self.client.get(summary).status_code, status.HTTP_200_OK)
+
+    def test_create_list_requires_name(self):
+        """POST without a name returns 400."""
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rename_list(self):
+        """PATCH renames a list."""
+        grocery_list = GroceryList.objects.create(name="Cabin")
+        url = reverse('grocery-list-detail', kwargs={'list_id': grocery_list.pk})
+        response = self.client.patch(url, {'name': "Beach house"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).data['name'], "Beach house")
+
+    def test_delete_list(self):
+        """DELETE removes the list with its items, tombstones and counters."""
+        list_id = self.client.post(self.url, {'name': "Cabin"}, format='json').data['id']
+        items = reverse('grocery-item-list', kwargs={'list_id': list_id})
+        milk = self.client.post(items, {'name': "Milk"}, format='json').data
+        self.client.delete(reverse('grocery-item-detail', kwargs={'list_id': list_id, 'pk': milk['id']}))
+        self.client.post(items, {'name': "Bread"}, format='json')
+
+        response = self.client.delete(reverse('grocery-list-detail', kwargs={'list_id': list_id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(GroceryItem.objects.filter(list_id=list_id).exists())
+        self.assertFalse(Tombstone.objects.filter(list_id=list_id).exists())
+        self.assertFalse(CategorySummary.objects.filter(list_id=list_id).exists())
+        self.assertFalse(ListRevision.objects.filter(list_id=list_id).exists())
+        self.assertEqual(self.client.get(items).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_default_list_cannot_be_deleted(self):
+        """DELETE of the default list returns 400."""
+        url = reverse('grocery-list-detail', kwargs={'list_id': DEFAULT_LIST_ID})
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(GroceryList.objects.filter(pk=DEFAULT_LIST_ID).exists())
+
+    def test_unknown_list(self):
+        """Item endpoints of a list that does not exist return 404."""
+        url = reverse('grocery-item-list', kwargs={'list_id': 999})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(url, {'name': "Milk"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(GroceryItem.objects.filter(list_id=999).exists())
+        response = self.client.patch(
+            reverse('bulk-update', kwargs={'list_id': 999}), {'purchased': True}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ListScopingTests(APITestCase):
+    """Item endpoints only see and write their own list."""
+
+    def setUp(self):
+        self.addCleanup(categories.clear)
+        self.home = DEFAULT_LIST_ID
+        self.cabin = GroceryList.objects.create(name="Cabin").pk
+        self.home_milk = GroceryItem.objects.create(
+            list_id=self.home, name="Milk", category=get_category("Dairy")
+        )
+        self.cabin_milk = GroceryItem.objects.create(
+            list_id=self.cabin, name="Milk", category=get_category("Dairy")
+        )
+
+    def _url(self, name, list_id, **kwargs):
+        return reverse(name, kwargs={'list_id': list_id, **kwargs})
+
+    def test_unscoped_endpoints_serve_default_list(self):
+        """/api/grocery-items/ and /api/lists/<default>/items/ are the same list."""
+        self.assertEqual(reverse('grocery-item-list'), '/api/grocery-items/')
+        unscoped = self.client.get(reverse('grocery-item-list')).data
+        scoped = self.client.get(self._url('grocery-item-list', self.home)).data
+        self.assertEqual(unscoped, scoped)
+        self.assertEqual([item['id'] for item in scoped], [self.home_milk.pk])
+
+    def test_names_are_unique_per_list(self):
+        """The same name may be used once in each list."""
+        url = self._url('grocery-item-list', self.cabin)
+        response = self.client.post(url, {'name': "Milk"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
+        response = self.client.post(url, {'name': "Bread"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_detail_of_other_list_is_not_found(self):
+        """An item id from another list returns 404."""
+        url = self._url('grocery-item-detail', self.cabin, pk=self.home_milk.pk)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_operations_touch_one_list(self):
+        """update-purchased and delete-all leave other lists alone."""
+        home_revision = ListRevision.current(self.home).revision
+        self.client.patch(
+            self._url('bulk-update', self.cabin), {'purchased': True}, format='json'
+        )
+        self.home_milk.refresh_from_db()
+        self.assertFalse(self.home_milk.purchased)
+        self.assertEqual(ListRevision.current(self.home).revision, home_revision)
+
+        response = self.client.delete(self._url('grocery-item-list', self.cabin))
+        self.assertEqual(response.data, {'deleted': 1})
+        self.assertTrue(GroceryItem.objects.filter(pk=self.home_milk.pk).exists())
+        self.assertFalse(Tombstone.objects.filter(list_id=self.home).exists())
+
+    def test_batch_ignores_other_lists(self):
+        """Batch updates and deletes of another list's ids are not found."""
+        url = self._url('grocery-item-batch', self.cabin)
+        response = self.client.post(url, {'delete': [self.home_milk.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['delete'], [{'id': ['Not found.']}])
+        response = self.client.post(url, {'create': [{'name': "Eggs"}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(GroceryItem.objects.get(name="Eggs").list_id, self.cabin)
+
+    def test_revisions_and_changes_are_per_list(self):
+        """Each list has its own revision sequence and delta sync."""
+        home_revision = ListRevision.current(self.home).revision
+        self.client.post(self._url('grocery-item-list', self.cabin), {'name': "Eggs"}, format='json')
+        changes = self.client.get(self._url('grocery-item-changes', self.cabin), {'since': 0}).data
+        self.assertEqual(changes['revision'], 1)
+        self.assertEqual([item['name'] for item in changes['updated']], ["Eggs"])
+        changes = self.client.get(
+            self._url('grocery-item-changes', self.home), {'since': home_revision}
+        ).data
+        self.assertEqual(changes['revision'], home_revision)
+        self.assertEqual(changes['updated'], [])
+
+    def test_search_and_summary_are_per_list(self):
+        """Search results and summary counters only cover the list."""
+        self.client.post(self._url('grocery-item-list', self.cabin), {'name': "Milk Powder"}, format='json')
+        response = self.client.get(self._url('grocery-item-search', self.home), {'q': 'milk'})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.home_milk.pk])
+        response = self.client.get(self._url('grocery-item-search', self.cabin), {'q': 'milk'})
+        self.assertEqual(len(response.data['results']), 2)
+        summary = self.client.get(self._url('grocery-item-summary', self.cabin)).data
+        self.assertEqual(summary['totals']['items'], 1)
+
+    def test_list_etags_differ_per_list(self):
+        """Writes to one list do not change another list's ETag."""
+        home = self._url('grocery-item-list', self.home)
+        etag = self.client.get(home)['ETag']
+        self.client.post(self._url('grocery-item-list', self.cabin), {'name': "Eggs"}, format='json')
+        response = self.client.get(home, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_events_carry_list(self):
+        """Published events name their list."""
+        broker = RecordingBroker()
+        with mock.patch.object(events, '_broker', broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self._url('grocery-item-list', self.cabin), {'name': "Eggs"}, format='json')
+        self.assertEqual(broker.published[0]['list'], self.cabin)
+
+
+class ListSubscriptionTests(TestCase):
+    """Event subscribers only receive their list's events."""
+
+    async def test_subscription_filters_by_list(self):
+        """A list subscriber skips other lists but gets list-less resyncs."""
+        broker = events.LocalBroker()
+        subscription = broker.subscribe(2)
+        broker.publish({'type': 'cleared', 'list': 1, 'revision': 3})
+        broker.publish({'type': 'cleared', 'list': 2, 'revision': 4})
+        broker.publish({'type': 'resync', 'revision': None})
+        self.assertEqual((await subscription.get())['revision'], 4)
+        self.assertEqual((await subscription.get())['type'], 'resync')
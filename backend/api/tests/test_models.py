@@ -9,7 +9,7 @@ class GroceryItemModelTests(TestCase):
     def test_create_item_with_defaults(self):
         """Item created with correct defaults for category, purchased, quantity."""
         item = GroceryItem.objects.create(name="Milk")
-        self.assertEqual(item.category, "Other")
+        self.assertEqual(item.category.name, "Other")
         self.assertEqual(item.purchased, False)
         self.assertEqual(item.quantity, 1)
 
@@ -0,0 +1,95 @@
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, GroceryItem
+from api.pagination import KeysetPagination
+from api.serializers import item_rows
+
+
+class KeysetPaginationTests(APITestCase):
+    """Tests for cursor pagination and filters on GET /api/grocery-items/"""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-list')
+        GroceryItem.objects.create(name="Milk", category=get_category("Dairy"))
+        GroceryItem.objects.create(name="Apples", category=get_category("Produce"))
+        GroceryItem.objects.create(name="Cheese", category=get_category("Dairy"), purchased=True)
+        GroceryItem.objects.create(name="Bread", category=get_category("Bakery"))
+        GroceryItem.objects.create(name="Mince", category=get_category("Meat"), purchased=True)
+
+    def _collect(self, params):
+        names = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names.extend(item['name'] for item in response.data['results'])
+            if response.data['next'] is None:
+                return names
+            response = self.client.get(response.data['next'])
+
+    def test_unpaginated_list_is_ordered(self):
+        """
+        GET without paging params returns a plain array in list order:
+        unpurchased first, grouped by category id (first use), then by id.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in response.data],
+            ["Milk", "Apples", "Bread", "Cheese", "Mince"],
+        )
+
+    def test_pages_cover_list_in_order(self):
+        """Following next links walks every item exactly once, in order."""
+        names = self._collect({'page_size': 2})
+        self.assertEqual(names, ["Milk", "Apples", "Bread", "Cheese", "Mince"])
+
+    def test_pages_follow_the_index(self):
+        """
+        The first page and later pages are read in index order, without a
+        sort of the list's rows.
+        """
+        if connection.vendor != 'sqlite':
+            self.skipTest('Checks the SQLite query plan.')
+        paginator = KeysetPagination()
+        items = item_rows(GroceryItem.objects.filter(list_id=DEFAULT_LIST_ID))
+        items = items.order_by(*paginator.ordering)
+        for queryset in (items, items.filter(paginator.seek(False, 1, 1))):
+            plan = queryset[:paginator.page_size + 1].explain()
+            self.assertIn('groceryitem_list_order_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_last_page_has_no_next(self):
+        """A page that reaches the end of the list has next=null."""
+        response = self.client.get(self.url, {'page_size': 10})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+    def test_page_size_is_capped(self):
+        """page_size larger than the maximum is clamped."""
+        response = self.client.get(self.url, {'page_size': 100000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        """A malformed cursor returns 404."""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_purchased(self):
+        """purchased filter limits results to matching items."""
+        names = self._collect({'page_size': 1, 'purchased': 'true'})
+        self.assertEqual(names, ["Cheese", "Mince"])
+
+    def test_filter_invalid_purchased(self):
+        """A non-boolean purchased filter returns 400."""
+        response = self.client.get(self.url, {'purchased': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('purchased', response.data)
+
+    def test_filter_category_and_name_prefix(self):
+        """category and name filters combine."""
+        response = self.client.get(self.url, {'category': 'Dairy', 'name': 'mi'})
+        self.assertEqual([item['name'] for item in response.data], ["Milk"])
@@ -0,0 +1,227 @@
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import categories, perf, summary
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, GroceryItem, GroceryList
+
+
+class ViewQueryCountTests(APITestCase):
+    """
+    Queries per request for every view in api.views, with a warm category
+    cache and existing summary counters as in a running server. Write counts
+    include the SAVEPOINT/RELEASE pair TestCase puts around transactions.
+    A change here is a change in cost.
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['idempotency'].clear()
+        self.addCleanup(categories.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            for category in ("Dairy", "Bakery", "Other"):
+                get_category(category)
+        self.milk = GroceryItem.objects.create(name="Milk", category=get_category("Dairy"))
+        GroceryItem.objects.create(name="Bread", category=get_category("Bakery"))
+        summary.rebuild(DEFAULT_LIST_ID)
+        self.cabin = GroceryList.objects.create(name="Cabin")
+        self.detail = reverse('grocery-item-detail', kwargs={'pk': self.milk.pk})
+
+    def test_grocery_list_list(self):
+        """GET is one query; POST inserts the list and its revision row."""
+        url = reverse('grocery-list-list')
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(4):
+            response = self.client.post(url, {'name': "Beach"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_grocery_list_detail(self):
+        """GET, PATCH and DELETE of a list."""
+        url = reverse('grocery-list-detail', kwargs={'list_id': self.cabin.pk})
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(2):
+            self.client.patch(url, {'name': "Lodge"}, format='json')
+        with self.assertNumQueries(10):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_grocery_item_list_get(self):
+        """A list GET reads the revision and the rows; a cached GET only the revision."""
+        url = reverse('grocery-item-list')
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(2):
+            self.client.get(url, {'page_size': 1})
+
+    def test_grocery_item_list_post(self):
+        """
+        A create checks the name first. An increment upsert is one statement;
+        a replace also reads the old row's counter fields.
+        """
+        url = reverse('grocery-item-list')
+        with self.assertNumQueries(8):
+            response = self.client.post(url, {'name': "Eggs", 'category': "Dairy"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(7):
+            self.client.post(f'{url}?on_conflict=increment', {'name': "Eggs"}, format='json')
+        with self.assertNumQueries(8):
+            self.client.post(
+                f'{url}?on_conflict=replace', {'name': "Eggs", 'quantity': 5}, format='json'
+            )
+
+    def test_grocery_item_list_delete(self):
+        """
+        Delete-all of a list within one batch is one DELETE per table plus
+        the cleared marker, after the lookup of the batch's bounds.
+        """
+        with self.assertNumQueries(9):
+            self.client.delete(reverse('grocery-item-list'))
+
+    def test_grocery_item_detail(self):
+        """GET, PATCH and DELETE of an item."""
+        with self.assertNumQueries(2):
+            self.client.get(self.detail)
+        with self.assertNumQueries(7):
+            self.client.patch(self.detail, {'quantity': 3}, format='json')
+        with self.assertNumQueries(10):
+            response = self.client.delete(self.detail)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_grocery_item_adjust(self):
+        """One or several adjustments are a single UPDATE ... RETURNING of the items."""
+        url = reverse('grocery-item-adjust', kwargs={'pk': self.milk.pk})
+        with self.assertNumQueries(7):
+            self.client.post(url, {'delta': 1}, format='json')
+        bread = GroceryItem.objects.get(name="Bread")
+        body = [{'id': self.milk.pk, 'delta': 1}, {'id': bread.pk, 'delta': 2}]
+        with self.assertNumQueries(8):
+            response = self.client.post(reverse('grocery-items-adjust'), body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_update_purchased(self):
+        """
+        update-purchased of a list within one batch is one UPDATE of the
+        items and one of the counters, after the lookup of the batch's bounds.
+        """
+        with self.assertNumQueries(7):
+            self.client.patch(reverse('bulk-update'), {'purchased': True}, format='json')
+
+    def test_grocery_item_export(self):
+        """The export streams the rows from one query after the revision check."""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('grocery-item-export'))
+            b''.join(response.streaming_content)
+
+    def test_grocery_item_batch(self):
+        """A batch creating, updating and deleting one item each."""
+        body = {
+            'create': [{'name': "Eggs"}],
+            'update': [{'id': self.milk.pk, 'quantity': 2}],
+            'delete': [GroceryItem.objects.get(name="Bread").pk],
+        }
+        with self.assertNumQueries(18):
+            response = self.client.post(reverse('grocery-item-batch'), body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_grocery_item_changes(self):
+        """Delta sync reads the revision, changed items and tombstones."""
+        with self.assertNumQueries(5):
+            self.client.get(reverse('grocery-item-changes'), {'since': 0})
+
+    def test_grocery_item_search(self):
+        """Search is the revision check plus one ranked query."""
+        with self.assertNumQueries(2):
+            self.client.get(reverse('grocery-item-search'), {'q': 'milk'})
+
+    def test_grocery_item_events(self):
+        """Opening the event stream does not touch the database."""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('grocery-item-events'))
+        response.close()
+
+    def test_grocery_item_summary(self):
+        """The summary reads the revision and the counter rows."""
+        with self.assertNumQueries(2):
+            self.client.get(reverse('grocery-item-summary'))
+
+    def test_stats_endpoints(self):
+        """cache-stats, pool-stats and metrics do not query the database."""
+        for name in ('list-cache-stats', 'db-pool-stats', 'perf-metrics'):
+            with self.subTest(name), self.assertNumQueries(0):
+                self.client.get(reverse(name))
+
+
+@override_settings(PERF_METRICS=True)
+class PerfMiddlewareTests(APITestCase):
+    """Tests for api.perf.PerfMiddleware and /api/grocery-items/metrics/"""
+
+    def setUp(self):
+        perf.reset()
+        self.addCleanup(perf.reset)
+        caches['default'].clear()
+        self.addCleanup(categories.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            get_category("Other")
+        self.url = reverse('grocery-item-list')
+
+    def _timings(self, response):
+        return dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+
+    def test_server_timing(self):
+        """Responses carry total, db (with the query count) and render timings."""
+        GroceryItem.objects.create(name="Milk")
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        timings = self._timings(response)
+        self.assertEqual(set(timings), {'total', 'db', 'render'})
+        self.assertIn('desc="2 queries"', timings['db'])
+
+    def test_streaming_response(self):
+        """Streaming responses get timings up to their headers."""
+        response = self.client.get(reverse('grocery-item-export'))
+        b''.join(response.streaming_content)
+        self.assertEqual(set(self._timings(response)), {'total', 'db'})
+
+    def test_metrics_exposition(self):
+        """Histograms are labelled by URL name and method."""
+        self.client.post(self.url, {'name': "Milk"}, format='json')
+        self.client.get(self.url)
+        self.client.get(self.url)
+        response = self.client.get(reverse('perf-metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], perf.CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertIn('# TYPE grocery_request_duration_seconds histogram', text)
+        labels = 'view="grocery-item-list",method="GET"'
+        self.assertIn(f'grocery_request_duration_seconds_count{{{labels}}} 2', text)
+        # The first GET ran two queries, the cached one only the revision check.
+        self.assertIn(f'grocery_request_db_queries_bucket{{{labels},le="1"}} 1', text)
+        self.assertIn(f'grocery_request_db_queries_bucket{{{labels},le="2"}} 2', text)
+        self.assertIn(f'grocery_request_db_queries_sum{{{labels}}} 3', text)
+        self.assertIn('view="grocery-item-list",method="POST"', text)
+
+    def test_unmatched_url(self):
+        """Requests that match no URL are counted together."""
+        self.client.get('/api/no-such-endpoint/')
+        self.assertIn('view="unmatched",method="GET"', perf.exposition())
+
+    @override_settings(PERF_METRICS=False)
+    def test_disabled(self):
+        """Without PERF_METRICS nothing is measured."""
+        response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(perf.exposition().count('_count'), 0)
+
+    async def test_asgi(self):
+        """Under ASGI, queries made in the sync view's thread are still counted."""
+        response = await self.async_client.get(reverse('grocery-item-summary'))
+        self.assertIn('desc="2 queries"', self._timings(response)['db'])
+        response = await self.async_client.get(reverse('async-grocery-item-list'))
+        self.assertIn('desc="2 queries"', self._timings(response)['db'])
+        self.assertIn('view="async-grocery-item-list"', perf.exposition())
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import dbpool
+
+
+def postgres_wrapper(**pool_options):
+    """A PostgreSQL connection wrapper with a pool that is never opened."""
+    return DatabaseWrapper({
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': 'grocery', 'USER': 'grocery', 'PASSWORD': '', 'HOST': '192.0.2.1', 'PORT': 5432,
+        'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True, 'AUTOCOMMIT': True,
+        'ATOMIC_REQUESTS': False, 'TIME_ZONE': None, 'TEST': {},
+        'OPTIONS': {'pool': pool_options},
+    }, alias='pool-stats-test')
+
+
+class PoolStatsTests(APITestCase):
+    """Tests for GET /api/grocery-items/pool-stats/."""
+
+    def setUp(self):
+        self.url = reverse('db-pool-stats')
+
+    def test_disabled_without_pool(self):
+        """Without a pool (SQLite here) the endpoint says so."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'enabled': False, 'vendor': 'sqlite'})
+
+    def test_reports_configured_pool(self):
+        """A configured pool reports its bounds before it is first opened."""
+        wrapper = postgres_wrapper(min_size=2, max_size=8)
+        self.addCleanup(wrapper._connection_pools.pop, wrapper.alias, None)
+        with mock.patch.object(dbpool, 'connections', {'default': wrapper}):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['enabled'])
+        self.assertFalse(response.data['open'])
+        self.assertEqual(response.data['min_size'], 2)
+        self.assertEqual(response.data['max_size'], 8)
+        self.assertEqual(response.data['in_use'], 0)
+        self.assertEqual(response.data['checkouts'], 0)
+
+    def test_derived_wait_and_utilization(self):
+        """Utilization and average wait are derived from the raw counters."""
+        pool = mock.Mock(closed=False)
+        pool.get_stats.return_value = {
+            'pool_min': 2, 'pool_max': 10, 'pool_size': 6, 'pool_available': 1,
+            'requests_waiting': 3, 'requests_num': 120, 'requests_queued': 4,
+            'requests_wait_ms': 200,
+        }
+        with mock.patch.object(dbpool, '_pool', return_value=pool):
+            data = dbpool.stats()
+        self.assertEqual(data['in_use'], 5)
+        self.assertEqual(data['utilization'], 0.5)
+        self.assertEqual(data['waiting'], 3)
+        self.assertEqual(data['checkouts'], 120)
+        self.assertEqual(data['wait_ms_avg'], 50)
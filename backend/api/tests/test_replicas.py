@@ -0,0 +1,137 @@
+from contextvars import Context
+from unittest import mock
+
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from api import replicas
+from api.models import GroceryItem
+from api.replicas import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter, read_alias
+
+REPLICAS = ['replica1', 'replica2']
+
+
+def in_new_context(func):
+    """Run func with fresh routing state, as a new request or thread would."""
+    return Context().run(func)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, REPLICA_RETRY_SECONDS=30)
+class ReplicaRouterTests(SimpleTestCase):
+    """Tests for api.replicas.ReplicaRouter and read_alias()."""
+
+    def setUp(self):
+        self.addCleanup(replicas._down_until.clear)
+        self.down = set()
+        patcher = mock.patch.object(replicas, '_connect', side_effect=self._connect)
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _connect(self, alias):
+        if alias in self.down:
+            raise OperationalError('connection refused')
+
+    def test_reads_use_one_replica(self):
+        """Reads go to a replica, the same one for the rest of the context."""
+        def reads():
+            return {read_alias() for _ in range(5)}
+        aliases = in_new_context(reads)
+        self.assertEqual(len(aliases), 1)
+        self.assertTrue(aliases <= set(REPLICAS))
+
+    def test_writes_go_to_primary_and_stick(self):
+        """After a write, reads in the same context use the primary."""
+        router = ReplicaRouter()
+
+        def write_then_read():
+            self.assertIn(router.db_for_read(GroceryItem), REPLICAS)
+            self.assertEqual(router.db_for_write(GroceryItem), 'default')
+            return router.db_for_read(GroceryItem)
+        self.assertEqual(in_new_context(write_then_read), 'default')
+        self.assertIn(in_new_context(read_alias), REPLICAS)
+
+    def test_unreachable_replica_is_skipped(self):
+        """A failing replica is skipped, and not retried until the back-off ends."""
+        self.down = {'replica1'}
+        # Try the replicas in settings order, so replica1 is tried first.
+        with (
+            mock.patch.object(replicas.random, 'shuffle'),
+            self.assertLogs('api.replicas', 'WARNING'),
+        ):
+            for _ in range(5):
+                self.assertEqual(in_new_context(read_alias), 'replica2')
+        self.assertEqual(
+            [call.args[0] for call in self.connect.call_args_list].count('replica1'), 1
+        )
+
+    def test_all_replicas_down(self):
+        """With no replica reachable, reads fall back to the primary."""
+        self.down = set(REPLICAS)
+        with self.assertLogs('api.replicas', 'WARNING') as logs:
+            self.assertEqual(in_new_context(read_alias), 'default')
+        self.assertEqual(len(logs.records), 2)
+
+    def test_migrations_only_on_primary(self):
+        """The replicas get their schema from the primary, not from migrate."""
+        router = ReplicaRouter()
+        self.assertTrue(router.allow_migrate('default', 'api'))
+        self.assertFalse(router.allow_migrate('replica1', 'api'))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaTransactionTests(TestCase):
+    """Reads inside a transaction on the primary."""
+
+    def test_reads_in_transaction_use_primary(self):
+        """The write paths read their rows where they write them."""
+        with mock.patch.object(replicas, '_connect'):
+            self.assertEqual(in_new_context(read_alias), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, REPLICA_STICKY_SECONDS=5)
+class ReplicaMiddlewareTests(SimpleTestCase):
+    """Tests for the request scoping and the read-your-writes cookie."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        patcher = mock.patch.object(replicas, '_connect')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _call(self, request, write=False):
+        seen = {}
+
+        def view(request):
+            if write:
+                ReplicaRouter().db_for_write(GroceryItem)
+            seen['alias'] = read_alias()
+            return HttpResponse()
+        response = in_new_context(lambda: ReplicaMiddleware(view)(request))
+        return seen['alias'], response
+
+    def test_get_reads_from_replica(self):
+        """A GET from a client without the cookie reads from a replica."""
+        alias, response = self._call(self.factory.get('/api/grocery-items/'))
+        self.assertIn(alias, REPLICAS)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_write_sets_sticky_cookie(self):
+        """A request that wrote pins its client to the primary for a while."""
+        alias, response = self._call(self.factory.post('/api/grocery-items/'), write=True)
+        self.assertEqual(alias, 'default')
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 5)
+        request = self.factory.get('/api/grocery-items/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self._call(request)[0], 'default')
+
+    def test_unsafe_requests_use_primary(self):
+        """Everything an unsafe request reads comes from the primary."""
+        alias, response = self._call(self.factory.delete('/api/grocery-items/'))
+        self.assertEqual(alias, 'default')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_inactive_without_replicas(self):
+        """Without replicas the middleware removes itself."""
+        with self.settings(DATABASE_REPLICAS=[]):
+            with self.assertRaises(replicas.MiddlewareNotUsed):
+                ReplicaMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,114 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import search
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, GroceryItem
+
+
+class SearchEndpointTests(APITestCase):
+    """Tests for GET /api/grocery-items/search/."""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-search')
+        GroceryItem.objects.create(name="Oat Milk", category=get_category("Dairy"))
+        GroceryItem.objects.create(name="Milk", category=get_category("Dairy"))
+        GroceryItem.objects.create(name="Milk Chocolate", category=get_category("Snacks"))
+        GroceryItem.objects.create(name="Cheddar", category=get_category("Dairy"))
+        GroceryItem.objects.create(name="Bread", category=get_category("Bakery"))
+
+    def _names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['results']]
+
+    def test_ranks_exact_then_prefix_then_substring(self):
+        """An exact name match ranks first, then prefixes, then other matches."""
+        self.assertEqual(self._names(q='milk'), ["Milk", "Milk Chocolate", "Oat Milk"])
+
+    def test_matches_category(self):
+        """Items match on their category as well as their name."""
+        self.assertEqual(sorted(self._names(q='dairy')), ["Cheddar", "Milk", "Oat Milk"])
+
+    def test_short_query_matches_prefixes(self):
+        """Queries shorter than a trigram match name and category prefixes."""
+        self.assertEqual(self._names(q='Br'), ["Bread"])
+        self.assertEqual(self._names(q='sn'), ["Milk Chocolate"])
+        self.assertEqual(self._names(q='il'), [])
+
+    def test_wildcards_are_literal(self):
+        """LIKE wildcards in the query are matched literally."""
+        self.assertEqual(self._names(q='mi%k'), [])
+        self.assertEqual(self._names(q='___'), [])
+
+    def test_results_have_item_fields(self):
+        """Results use the same item representation as the list endpoint."""
+        response = self.client.get(self.url, {'q': 'bread'})
+        self.assertEqual(
+            response.data['results'][0],
+            {'id': GroceryItem.objects.get(name="Bread").id, 'name': "Bread",
+             'category': "Bakery", 'quantity': 1, 'purchased': False, 'version': 1},
+        )
+
+    def test_pagination(self):
+        """Pages follow the ranking and link to the next page."""
+        response = self.client.get(self.url, {'q': 'milk', 'page_size': 2})
+        self.assertEqual([i['name'] for i in response.data['results']], ["Milk", "Milk Chocolate"])
+        self.assertIn('page=2', response.data['next'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([i['name'] for i in response.data['results']], ["Oat Milk"])
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_page(self):
+        """A page outside the allowed range is a 404."""
+        response = self.client.get(self.url, {'q': 'milk', 'page': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.url, {'q': 'milk', 'page': 0})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_missing_query(self):
+        """q is required."""
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_writes(self):
+        """Renames, bulk updates and deletes are reflected in results."""
+        GroceryItem.objects.filter(name="Bread").update(name="Sourdough Loaf")
+        GroceryItem.objects.filter(name="Cheddar").delete()
+        self.assertEqual(self._names(q='bread'), [])
+        self.assertEqual(self._names(q='sourdough'), ["Sourdough Loaf"])
+        self.assertNotIn("Cheddar", self._names(q='dairy'))
+
+
+class SqliteSearchIndexTests(TestCase):
+    """Tests for the FTS5 index kept by api.search on SQLite."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+
+    def test_orm_fallback_ranks_the_same(self):
+        """The ORM search used on other databases gives the same ranking."""
+        for name, category in [("Oat Milk", "Dairy"), ("Milk", "Dairy"),
+                               ("Milk Chocolate", "Snacks"), ("Buttermilk", "Dairy"),
+                               ("Bread", "Bakery")]:
+            GroceryItem.objects.create(name=name, category=get_category(category))
+        for query in ('milk', 'dairy', 'Br', 'xyz'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    search._search_orm(DEFAULT_LIST_ID, query, 0, 10),
+                    search.search_items(DEFAULT_LIST_ID, query, 0, 10),
+                )
+
+    def test_missing_triggers_are_reinstalled(self):
+        """Dropped triggers are recreated and the index rebuilt from the table."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {search.FTS_TABLE}_ai')
+        GroceryItem.objects.create(name="Kefir")
+        search.install_sqlite_index(connection)
+        self.assertEqual([i['name'] for i in search.search_items(DEFAULT_LIST_ID, 'kefir', 0, 10)], ["Kefir"])
+        GroceryItem.objects.create(name="Kefir Grains")
+        self.assertEqual(len(search.search_items(DEFAULT_LIST_ID, 'kefir', 0, 10)), 2)
@@ -0,0 +1,23 @@
+from django.test import TestCase
+from api.categories import get_category
+from api.models import GroceryItem
+from api.serializers import GroceryItemSerializer, item_rows, serialize_item
+
+
+class ReadFastPathTests(TestCase):
+    """The .values() read path must match GroceryItemSerializer output."""
+
+    def setUp(self):
+        GroceryItem.objects.create(name="Milk", category=get_category("Dairy"), quantity=2)
+        GroceryItem.objects.create(name="Bread", purchased=True)
+
+    def test_item_rows_match_serializer(self):
+        """item_rows produces the same dicts as the ModelSerializer."""
+        items = GroceryItem.objects.order_by('id')
+        expected = GroceryItemSerializer(items, many=True).data
+        self.assertEqual(list(item_rows(items)), [dict(row) for row in expected])
+
+    def test_serialize_item_matches_serializer(self):
+        """serialize_item produces the same dict as the ModelSerializer."""
+        item = GroceryItem.objects.get(name="Milk")
+        self.assertEqual(serialize_item(item), dict(GroceryItemSerializer(item).data))
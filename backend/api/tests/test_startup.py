@@ -0,0 +1,95 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from backend import dbprobe
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Records (and refuses) any connection attempted while settings load.
+GUARDED_SETUP = """
+import socket
+import psycopg
+attempts = []
+def refuse(*args, **kwargs):
+    attempts.append(args)
+    raise ConnectionRefusedError
+socket.create_connection = refuse
+socket.socket.connect = refuse
+psycopg.connect = refuse
+import django
+django.setup()
+from django.conf import settings
+print(settings.DATABASES['default']['ENGINE'], len(attempts))
+"""
+
+
+class StartupTests(SimpleTestCase):
+    """django.setup() must not touch the database."""
+
+    def _setup(self, **env):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='backend.settings', **env)
+        result = subprocess.run(
+            [sys.executable, '-c', GUARDED_SETUP],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout.split()
+
+    def test_postgres_url_is_used_without_connecting(self):
+        """A DATABASE_URL selects PostgreSQL without a probe connection."""
+        engine, attempts = self._setup(
+            DATABASE_URL='postgres://u:p@192.0.2.1:5432/grocery', DATABASE_FALLBACK='False'
+        )
+        self.assertEqual(engine, 'django.db.backends.postgresql')
+        self.assertEqual(attempts, '0')
+
+    def test_empty_url_selects_sqlite(self):
+        """Without DATABASE_URL, settings select SQLite."""
+        engine, attempts = self._setup(DATABASE_URL='')
+        self.assertEqual(engine, 'django.db.backends.sqlite3')
+        self.assertEqual(attempts, '0')
+
+    def test_fallback_uses_probe_result(self):
+        """DATABASE_FALLBACK falls back to SQLite when the probe fails."""
+        engine, attempts = self._setup(
+            DATABASE_URL='postgres://u:p@192.0.2.1:5432/grocery',
+            DATABASE_FALLBACK='True',
+            DATABASE_PROBE_TTL='-1',
+        )
+        self.assertEqual(engine, 'django.db.backends.sqlite3')
+        self.assertEqual(attempts, '1')
+
+
+class DatabaseProbeTests(SimpleTestCase):
+    """Tests for the cached DATABASE_FALLBACK probe."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(tempfile, 'gettempdir', return_value=tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_probe_result_is_cached(self):
+        """A second check within the TTL reuses the first answer."""
+        config = {'HOST': 'db.invalid', 'PORT': 5432}
+        with mock.patch.object(socket, 'create_connection', side_effect=OSError) as connect:
+            self.assertFalse(dbprobe.is_reachable(config))
+            self.assertFalse(dbprobe.is_reachable(config))
+        self.assertEqual(connect.call_count, 1)
+
+    def test_expired_result_probes_again(self):
+        """A cached answer older than the TTL is not trusted."""
+        config = {'HOST': 'db.invalid', 'PORT': 5432}
+        with mock.patch.object(socket, 'create_connection', side_effect=OSError):
+            dbprobe.is_reachable(config)
+        with mock.patch.object(socket, 'create_connection') as connect:
+            self.assertTrue(dbprobe.is_reachable(config, ttl=-1))
+        connect.assert_called_once_with(('db.invalid', 5432), timeout=dbprobe.DEFAULT_TIMEOUT)
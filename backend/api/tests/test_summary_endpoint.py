@@ -0,0 +1,126 @@
+from io import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import categories
+from api.admin import GroceryItemAdmin
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, CategorySummary, GroceryItem, ListRevision
+
+
+class SummaryEndpointTests(APITestCase):
+    """Tests for GET /api/grocery-items/summary/ and its counters."""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-summary')
+        self.list_url = reverse('grocery-item-list')
+        self.milk = self._create(name="Milk", category="Dairy", quantity=2)
+        self.cheese = self._create(name="Cheese", category="Dairy", quantity=1, purchased=True)
+        self.bread = self._create(name="Bread", category="Bakery", quantity=3)
+
+    def _create(self, **data):
+        response = self.client.post(self.list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def _summary(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def _by_category(self):
+        return {row['category']: row for row in self._summary()['categories']}
+
+    def assertMatchesItems(self):
+        """The counters agree with a GROUP BY over the items."""
+        expected = {}
+        for item in GroceryItem.objects.select_related('category'):
+            row = expected.setdefault(item.category.name, {
+                'category': item.category.name, 'items': 0, 'quantity': 0,
+                'purchased': 0, 'remaining': 0,
+            })
+            row['items'] += 1
+            row['quantity'] += item.quantity
+            row['purchased' if item.purchased else 'remaining'] += 1
+        self.assertEqual(self._by_category(), expected)
+
+    def test_summary_per_category_and_totals(self):
+        """Each category reports items, quantity, purchased and remaining."""
+        data = self._summary()
+        self.assertEqual(data['categories'], [
+            {'category': "Bakery", 'items': 1, 'quantity': 3, 'purchased': 0, 'remaining': 1},
+            {'category': "Dairy", 'items': 2, 'quantity': 3, 'purchased': 1, 'remaining': 1},
+        ])
+        self.assertEqual(data['totals'], {'items': 3, 'quantity': 6, 'purchased': 1, 'remaining': 2})
+
+    def test_summary_does_not_scan_items(self):
+        """The summary is read from the counter table alone."""
+        # Warm the category name cache, which fills on commit.
+        self.addCleanup(categories.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(self.url)
+        with self.assertNumQueries(2):  # the ETag lookup and the counters
+            self.client.get(self.url)
+
+    def test_update_moves_counts_between_categories(self):
+        """Changing category, quantity and purchased adjusts both categories."""
+        url = reverse('grocery-item-detail', kwargs={'pk': self.milk['id']})
+        self.client.patch(url, {'category': "Bakery", 'quantity': 5, 'purchased': True}, format='json')
+        self.assertMatchesItems()
+        self.client.put(url, {'name': "Milk", 'category': "Dairy"}, format='json')
+        self.assertMatchesItems()
+
+    def test_delete_removes_counts(self):
+        """Deleting the last item of a category drops the category."""
+        self.client.delete(reverse('grocery-item-detail', kwargs={'pk': self.bread['id']}))
+        self.assertNotIn("Bakery", self._by_category())
+        self.assertFalse(CategorySummary.objects.filter(category__name="Bakery").exists())
+        self.assertMatchesItems()
+
+    def test_bulk_update_and_delete_all(self):
+        """Bulk purchased updates and delete-all keep the counters right."""
+        self.client.post(reverse('bulk-update'), {'purchased': True}, format='json')
+        self.assertMatchesItems()
+        self.client.post(reverse('bulk-update'), {'purchased': False}, format='json')
+        self.assertMatchesItems()
+        self.client.delete(self.list_url)
+        self.assertEqual(self._summary()['categories'], [])
+
+    def test_batch_operations(self):
+        """Batch creates, updates and deletes are counted."""
+        response = self.client.post(reverse('grocery-item-batch'), {
+            'create': [{'name': "Eggs", 'category': "Dairy", 'quantity': 12}],
+            'update': [{'id': self.bread['id'], 'category': "Dairy", 'purchased': True}],
+            'delete': [self.cheese['id']],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertMatchesItems()
+
+    def test_admin_writes(self):
+        """Admin saves and deletes are counted."""
+        admin = GroceryItemAdmin(GroceryItem, AdminSite())
+        item = GroceryItem.objects.get(pk=self.milk['id'])
+        item.quantity = 10
+        admin.save_model(None, item, None, change=True)
+        self.assertMatchesItems()
+        admin.delete_queryset(None, GroceryItem.objects.filter(category__name="Dairy"))
+        self.assertMatchesItems()
+
+    def test_repair_summary_command(self):
+        """repair_summary recomputes counters after out-of-band writes."""
+        GroceryItem.objects.create(name="Butter", category=get_category("Dairy"))
+        GroceryItem.objects.filter(name="Bread").update(category=get_category("Pantry"))
+        out = StringIO()
+        call_command('repair_summary', stdout=out)
+        self.assertIn('3 categories', out.getvalue())
+        self.assertMatchesItems()
+        revision = ListRevision.current(DEFAULT_LIST_ID).revision
+        out = StringIO()
+        call_command('repair_summary', stdout=out)
+        self.assertIn('consistent', out.getvalue())
+        # Nothing was repaired, so the list's ETag stays valid.
+        self.assertEqual(ListRevision.current(DEFAULT_LIST_ID).revision, revision)
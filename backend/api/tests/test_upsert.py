@@ -0,0 +1,110 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import categories, summary
+from api.categories import get_category
+from api.models import DEFAULT_LIST_ID, GroceryItem, GroceryList, ListRevision
+
+
+class UpsertTests(APITestCase):
+    """Tests for POST /api/grocery-items/?on_conflict=increment|replace"""
+
+    def setUp(self):
+        self.url = reverse('grocery-item-list')
+        self.addCleanup(categories.clear)
+        self.milk = GroceryItem.objects.create(
+            name="Milk", category=get_category("Dairy"), quantity=2, purchased=True
+        )
+
+    def _post(self, on_conflict, data, url=None):
+        return self.client.post(
+            f'{url or self.url}?on_conflict={on_conflict}', data, format='json'
+        )
+
+    def test_increment_existing(self):
+        """increment adds the posted quantity and keeps the other fields."""
+        response = self._post('increment', {'name': "Milk", 'quantity': 3, 'category': "Frozen"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.milk.pk)
+        self.assertEqual(response.data['quantity'], 5)
+        self.assertEqual(response.data['category'], "Dairy")
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.quantity, 5)
+        self.assertTrue(self.milk.purchased)
+        self.assertEqual(GroceryItem.objects.count(), 1)
+
+    def test_increment_default_quantity(self):
+        """Without a quantity, increment adds one."""
+        response = self._post('increment', {'name': "Milk"})
+        self.assertEqual(response.data['quantity'], 3)
+
+    def test_replace_existing(self):
+        """replace overwrites the posted fields only."""
+        response = self._post('replace', {'name': "Milk", 'quantity': 1, 'category': "Frozen"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.quantity, 1)
+        self.assertEqual(self.milk.category.name, "Frozen")
+        self.assertTrue(self.milk.purchased)
+
+    def test_new_name_is_created(self):
+        """Both modes create a missing item and return 201."""
+        for mode, name in (('increment', "Bread"), ('replace', "Eggs")):
+            response = self._post(mode, {'name': name, 'quantity': 4})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            item = GroceryItem.objects.get(name=name)
+            self.assertEqual(response.data['id'], item.pk)
+            self.assertEqual(item.quantity, 4)
+            self.assertEqual(item.category.name, "Other")
+
+    def test_single_write_statement(self):
+        """An increment neither reads the item nor updates it separately."""
+        with CaptureQueriesContext(connection) as queries:
+            self._post('increment', {'name': "Milk"})
+        inserts = [q['sql'] for q in queries if 'INSERT INTO "api_groceryitem"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn('ON CONFLICT', inserts[0])
+        self.assertIn('RETURNING', inserts[0])
+        reads = [q for q in queries if 'FROM "api_groceryitem"' in q['sql']]
+        self.assertEqual(reads, [])
+        updates = [q for q in queries if 'UPDATE "api_groceryitem"' in q['sql']]
+        self.assertEqual(updates, [])
+
+    def test_revision_and_summary(self):
+        """The upsert bumps the revision and keeps the summary counters right."""
+        before = ListRevision.current(DEFAULT_LIST_ID).revision
+        summary_url = reverse('grocery-item-summary')
+        self._post('replace', {'name': "Milk", 'purchased': False, 'category': "Frozen"})
+        self._post('increment', {'name': "Bread", 'quantity': 2})
+        self.assertEqual(ListRevision.current(DEFAULT_LIST_ID).revision, before + 2)
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.revision, before + 1)
+        totals = self.client.get(summary_url).data['totals']
+        self.assertEqual(totals, {'items': 2, 'quantity': 4, 'purchased': 0, 'remaining': 2})
+
+    def test_increment_summary(self):
+        """An increment of an existing item adds to its category's quantity."""
+        summary.rebuild(DEFAULT_LIST_ID)
+        self._post('increment', {'name': "Milk", 'quantity': 3})
+        [dairy] = self.client.get(reverse('grocery-item-summary')).data['categories']
+        self.assertEqual((dairy['items'], dairy['quantity'], dairy['purchased']), (1, 5, 1))
+
+    def test_scoped_to_list(self):
+        """An upsert in another list creates that list's own item."""
+        cabin = GroceryList.objects.create(name="Cabin").pk
+        url = reverse('grocery-item-list', kwargs={'list_id': cabin})
+        response = self._post('increment', {'name': "Milk"}, url=url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.quantity, 2)
+
+    def test_validation(self):
+        """Field rules still apply, and unknown modes return 400."""
+        response = self._post('increment', {'name': "Milk", 'quantity': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', response.data)
+        response = self._post('merge', {'name': "Milk"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
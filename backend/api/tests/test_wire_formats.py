@@ -0,0 +1,150 @@
+import gzip
+
+import brotli
+import msgpack
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.categories import get_category
+from api.models import GroceryItem
+from api.compression import accepted_codings
+from api.renderers import to_columns
+
+COLUMNAR = 'application/vnd.grocery.columnar+json'
+MSGPACK = 'application/msgpack'
+
+
+class ListWireFormatTests(APITestCase):
+    """Tests for the compact encodings of GET /api/grocery-items/"""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('grocery-item-list')
+        dairy = get_category("Dairy")
+        for name in ("Milk", "Cheese", "Yogurt"):
+            GroceryItem.objects.create(name=name, category=dairy)
+        GroceryItem.objects.create(name="Bread", category=get_category("Bakery"), quantity=2)
+        self.rows = self.client.get(self.url).json()
+
+    def test_columnar(self):
+        """Columns hold the JSON rows' values; categories are stored once."""
+        response = self.client.get(self.url, HTTP_ACCEPT=COLUMNAR)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], COLUMNAR)
+        data = response.json()
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(data['name'], [row['name'] for row in self.rows])
+        self.assertEqual(
+            [data['categories'][index] for index in data['category']],
+            [row['category'] for row in self.rows],
+        )
+        self.assertEqual(len(data['categories']), 2)
+
+    def test_columnar_page(self):
+        """Paginated responses keep "next" and put the columns in "results"."""
+        response = self.client.get(self.url, {'page_size': 2}, HTTP_ACCEPT=COLUMNAR)
+        data = response.json()
+        self.assertIsNotNone(data['next'])
+        self.assertEqual(data['results']['id'], [row['id'] for row in self.rows[:2]])
+
+    def test_msgpack(self):
+        """MessagePack carries the same data as the JSON response."""
+        response = self.client.get(self.url, HTTP_ACCEPT=MSGPACK)
+        self.assertEqual(response['Content-Type'], MSGPACK)
+        self.assertEqual(msgpack.unpackb(response.content), self.rows)
+        self.assertIn('Accept', response['Vary'])
+
+    def test_cached_per_format(self):
+        """Cached responses are kept apart by media type."""
+        self.client.get(self.url, HTTP_ACCEPT=MSGPACK)
+        with self.assertNumQueries(1):  # the ETag lookup only
+            response = self.client.get(self.url, HTTP_ACCEPT=MSGPACK)
+        self.assertEqual(msgpack.unpackb(response.content), self.rows)
+        response = self.client.get(self.url, HTTP_ACCEPT=COLUMNAR)
+        self.assertEqual(response.json()['count'], 4)
+
+    def test_etag_per_format(self):
+        """Each format has its own ETag, so one does not revalidate another."""
+        etags = {
+            accept: self.client.get(self.url, HTTP_ACCEPT=accept)['ETag']
+            for accept in ('application/json', COLUMNAR, MSGPACK)
+        }
+        self.assertEqual(len(set(etags.values())), 3)
+        response = self.client.get(
+            self.url, HTTP_ACCEPT=MSGPACK, HTTP_IF_NONE_MATCH=etags['application/json']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url, HTTP_ACCEPT=MSGPACK, HTTP_IF_NONE_MATCH=etags[MSGPACK])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_other_bodies_keep_their_shape(self):
+        """A created item is a plain object in the columnar format too."""
+        response = self.client.post(
+            self.url, {'name': "Eggs"}, format='json', HTTP_ACCEPT=COLUMNAR
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['name'], "Eggs")
+
+    def test_to_columns_empty(self):
+        """An empty list has empty columns."""
+        self.assertEqual(to_columns([])['id'], [])
+
+
+class CompressionTests(APITestCase):
+    """Tests for Accept-Encoding negotiation (api.compression)."""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('grocery-item-list')
+        GroceryItem.objects.bulk_create(GroceryItem(name=f"Item {n}") for n in range(20))
+        self.body = self.client.get(self.url).content
+
+    def test_brotli_preferred(self):
+        """Clients accepting br get brotli, with a weak ETag and Vary."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.body)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip(self):
+        """Clients accepting only gzip get gzip."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_not_accepted(self):
+        """Without Accept-Encoding the body is sent as is."""
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_q_values(self):
+        """The higher q-value wins, and q=0 rules a coding out."""
+        cases = {
+            'br;q=0.5, gzip': 'gzip',
+            'br;q=0, gzip': 'gzip',
+            'gzip;q=0, br': 'br',
+            'br;q=0, gzip;q=0': None,
+            '*;q=0': None,
+        }
+        for header, coding in cases.items():
+            with self.subTest(header):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(response.get('Content-Encoding'), coding)
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_accepted_codings(self):
+        """Accept-Encoding parsing, including "*" and malformed q-values."""
+        self.assertEqual(accepted_codings('gzip, deflate, br'), ['br', 'gzip'])
+        self.assertEqual(accepted_codings('GZIP;q=0.8, BR;q=0.8'), ['br', 'gzip'])
+        self.assertEqual(accepted_codings('*'), ['br', 'gzip'])
+        self.assertEqual(accepted_codings('br;q=0, *;q=0.1'), ['gzip'])
+        self.assertEqual(accepted_codings('br;q=x, identity'), [])
+        self.assertEqual(accepted_codings(''), [])
+
+    def test_weak_etag_revalidates(self):
+        """The weakened ETag of a compressed response still gets 304."""
+        etag = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br')['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -1,9 +1,32 @@
-from django.urls import path
+from django.urls import include, path
 from . import views
+from .models import DEFAULT_LIST_ID
 
 
+# Item endpoints for one list. Mounted per list under lists/<list_id>/items/
+# and, for the default list, under grocery-items/; the views take list_id.
+item_patterns = [
+    path('', views.grocery_item_list, name='grocery-item-list'),
+    path('adjust/', views.grocery_items_adjust, name='grocery-items-adjust'),
+    path('batch/', views.grocery_item_batch, name='grocery-item-batch'),
+    path('changes/', views.grocery_item_changes, name='grocery-item-changes'),
+    path('events/', views.grocery_item_events, name='grocery-item-events'),
+    path('export/', views.grocery_item_export, name='grocery-item-export'),
+    path('import/', views.grocery_item_import, name='grocery-item-import'),
+    path('jobs/<str:job_id>/', views.grocery_item_job, name='grocery-item-job'),
+    path('search/', views.grocery_item_search, name='grocery-item-search'),
+    path('summary/', views.grocery_item_summary, name='grocery-item-summary'),
+    path('update-purchased/', views.bulk_update_purchased, name='bulk-update'),
+    path('<int:pk>/', views.grocery_item_detail, name='grocery-item-detail'),
+    path('<int:pk>/adjust/', views.grocery_item_adjust, name='grocery-item-adjust'),
+]
+
 urlpatterns = [
-    path('grocery-items/', views.grocery_item_list, name='grocery-item-list'),
-    path('grocery-items/update-purchased/', views.bulk_update_purchased, name='bulk-update'),
-    path('grocery-items/<int:pk>/', views.grocery_item_detail, name='grocery-item-detail'),
-]
\ No newline at end of file
+    path('grocery-items/cache-stats/', views.list_cache_stats, name='list-cache-stats'),
+    path('grocery-items/pool-stats/', views.db_pool_stats, name='db-pool-stats'),
+    path('grocery-items/metrics/', views.perf_metrics, name='perf-metrics'),
+    path('grocery-items/', include(item_patterns), {'list_id': DEFAULT_LIST_ID}),
+    path('lists/', views.grocery_list_list, name='grocery-list-list'),
+    path('lists/<int:list_id>/', views.grocery_list_detail, name='grocery-list-detail'),
+    path('lists/<int:list_id>/items/', include(item_patterns)),
+]
@@ -1,70 +1,431 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import condition, require_GET
+from django.views.decorators.vary import vary_on_headers
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
-from .models import GroceryItem
-from .serializers import GroceryItemSerializer
+from . import adjust, cache, dbpool, events, importer, jobs, perf, summary
+from .batch import apply_batch
+from .conditional import (
+    if_match_version, item_etag, item_last_modified, item_version_etag, list_etag,
+    list_last_modified,
+)
+from .export import stream_json_array, stream_ndjson
+from .filters import TRUE_VALUES, filter_items
+from .idempotency import idempotent
+from .models import GroceryItem, GroceryList
+from .mutations import (
+    ON_CONFLICT_MODES, VersionConflict, create_item, create_list, delete_all_items,
+    delete_item, delete_list, purchased_value, set_all_purchased, update_item, upsert_item,
+)
+from .pagination import KeysetPagination, RankedPagination
+from .renderers import ColumnarJSONRenderer, MessagePackRenderer
+from .search import search_items
+from .serializers import GroceryListSerializer, item_rows, serialize_item
+from .sync import changes_since
 
 
-@api_view(['GET', 'POST', 'DELETE'])
-def grocery_item_list(request):
+# Item views take the list they operate on as list_id: from the URL under
+# /api/lists/<list_id>/items/, and DEFAULT_LIST_ID under /api/grocery-items/
+# (see api.urls).
+
+@api_view(['GET', 'POST'])
+@idempotent
+def grocery_list_list(request):
+    """
+    List all grocery lists, or create a new one.
+    Body: {"name": "Home"}
+    """
+    if request.method == 'GET':
+        lists = GroceryList.objects.order_by('id')
+        return Response(GroceryListSerializer(lists, many=True).data)
+
+    elif request.method == 'POST':
+        data, errors = create_list(request.data)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+@idempotent
+def grocery_list_detail(request, list_id):
     """
-    List all or delete grocery items, or create/add a new grocery item.
+    Retrieve, rename or delete a grocery list. Deleting a list deletes its
+    items; the default list cannot be deleted.
     """
+    try:
+        grocery_list = GroceryList.objects.get(pk=list_id)
+    except GroceryList.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
     if request.method == 'GET':
-        items = GroceryItem.objects.all()
-        serializer = GroceryItemSerializer(items, many=True)
+        return Response(GroceryListSerializer(grocery_list).data)
+
+    elif request.method == 'PATCH':
+        serializer = GroceryListSerializer(grocery_list, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
         return Response(serializer.data)
 
+    elif request.method == 'DELETE':
+        error = delete_list(grocery_list)
+        if error:
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET', 'POST', 'DELETE'])
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, ColumnarJSONRenderer, MessagePackRenderer])
+@idempotent
+@vary_on_headers('Accept')
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+def grocery_item_list(request, list_id):
+    """
+    List all or delete a list's grocery items, or create/add a new grocery item.
+
+    POST with ?on_conflict=increment adds the posted quantity to an existing
+    item of the same name; ?on_conflict=replace overwrites its posted
+    fields. Both return 200 for an existing item and 201 for a new one.
+
+    GET accepts the filters in api.filters. Passing ?page_size= or ?cursor=
+    switches to keyset pagination and returns {"next": ..., "results": [...]};
+    otherwise the full list is returned as a plain array. GET responses
+    carry ETag/Last-Modified and honour If-None-Match/If-Modified-Since.
+    Accept: application/vnd.grocery.columnar+json or application/msgpack
+    selects a compact encoding (see api.renderers).
+
+    DELETE with ?background=1 returns 202 and deletes in a background job.
+    """
+    if request.method == 'GET':
+        cached = cache.get_cached_response(request, list_id)
+        if cached is not None:
+            return cached
+        items = filter_items(GroceryItem.objects.filter(list_id=list_id), request.query_params)
+        paginator = KeysetPagination()
+        if _wants_page(request, paginator):
+            page = paginator.paginate_queryset(item_rows(items), request)
+            response = paginator.get_paginated_response(page)
+        else:
+            items = items.order_by(*paginator.ordering)
+            response = Response(list(item_rows(items)))
+        return cache.cache_response(request, list_id, response)
+
     elif request.method == 'POST':
-        serializer = GroceryItemSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        on_conflict = request.query_params.get('on_conflict')
+        if on_conflict is None:
+            data, errors = create_item(list_id, request.data)
+            created = True
+        elif on_conflict in ON_CONFLICT_MODES:
+            data, created, errors = upsert_item(list_id, request.data, on_conflict)
+        else:
+            return Response(
+                {'error': f"on_conflict must be one of: {', '.join(ON_CONFLICT_MODES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
     
     elif request.method == 'DELETE':
-        count = GroceryItem.objects.all().delete()
-        return Response({'deleted': count[0]}, status=status.HTTP_200_OK)
+        if _wants_background(request):
+            return _start_job('delete-all', list_id, delete_all_items, list_id)
+        count = delete_all_items(list_id)
+        return Response({'deleted': count}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET', 'PATCH', 'DELETE'])
-def grocery_item_detail(request, pk):
+@idempotent
+def grocery_item_detail(request, list_id, pk):
     """
-    Retrieve, update or delete a grocery item.
+    Retrieve, update or delete a grocery item of the list.
+
+    PATCH is one conditional UPDATE without a lookup first. With If-Match:
+    <the item's ETag>, or the item's "version" in the body, it only applies
+    if the item was not changed since; otherwise the response is 409 with
+    the current item.
     """
+    if request.method == 'PATCH':
+        return _update_item(request, list_id, pk)
+    return _item_detail(request, list_id=list_id, pk=pk)
+
+
+@condition(etag_func=item_etag, last_modified_func=item_last_modified)
+def _item_detail(request, list_id, pk):
     try:
-        item = GroceryItem.objects.get(pk=pk)
+        item = GroceryItem.objects.get(list_id=list_id, pk=pk)
     except GroceryItem.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        serializer = GroceryItemSerializer(item)
-        return Response(serializer.data)
-
-    elif request.method == 'PATCH':
-        serializer = GroceryItemSerializer(item, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serialize_item(item))
 
     elif request.method == 'DELETE':
-        item.delete()
+        delete_item(item)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def _update_item(request, list_id, pk):
+    try:
+        version = if_match_version(request, pk)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        data, errors = update_item(list_id, pk, request.data, version)
+    except GroceryItem.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    except VersionConflict as exc:
+        return Response(
+            {'error': str(exc), 'item': exc.item}, status=status.HTTP_409_CONFLICT
+        )
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, headers={'ETag': item_version_etag(pk, data['version'])})
+
+
+@api_view(['POST'])
+@idempotent
+def grocery_item_adjust(request, list_id, pk):
+    """
+    Add to or subtract from an item's quantity in one UPDATE, without the
+    client reading it first. Body: {"delta": -1}. A change that would take
+    the quantity below 1 returns 400 and writes nothing.
+    """
+    try:
+        data, errors = adjust.adjust_item(list_id, pk, request.data)
+    except GroceryItem.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, headers={'ETag': item_version_etag(pk, data['version'])})
+
+
+@api_view(['POST'])
+@idempotent
+def grocery_items_adjust(request, list_id):
+    """
+    Adjust the quantities of several items of the list in one UPDATE.
+    Body: [{"id": 1, "delta": 2}, {"id": 5, "delta": -1}]. Either every
+    adjustment applies or none does; errors have one entry per adjustment.
+    """
+    data, errors = adjust.adjust_items(list_id, request.data)
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, status=status.HTTP_200_OK)
+
+
 @api_view(['PATCH'])
-def bulk_update_purchased(request):
+@idempotent
+def bulk_update_purchased(request, list_id):
     """
-    Bulk update purchased status for all items.
+    Bulk update purchased status for all items of the list.
     Body: {"purchased": true} or {"purchased": false}
+    Returns the number of items changed; ?background=1 returns 202 and
+    updates them in a background job.
+    """
+    purchased, errors = purchased_value(request.data)
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+    if _wants_background(request):
+        return _start_job('update-purchased', list_id, set_all_purchased, list_id, purchased)
+    updated_count = set_all_purchased(list_id, purchased)
+    return Response({'updated': updated_count}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def grocery_item_job(request, list_id, job_id):
     """
-    purchased = request.data.get('purchased')
-    if purchased is None:
+    Progress of a background delete-all or update-purchased: "state" is
+    running, done or failed, and "processed" counts the items written so far.
+    """
+    job = jobs.get(job_id)
+    if job is None or job['list_id'] != list_id:
+        return Response({'error': 'No such job.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job)
+
+
+@api_view(['GET'])
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+def grocery_item_export(request, list_id):
+    """
+    Stream every item of the list without building the list in memory.
+    Accepts the same filters as the list endpoint.
+    Query: ?ndjson=1 for newline-delimited JSON instead of a JSON array.
+    """
+    items = filter_items(GroceryItem.objects.filter(list_id=list_id), request.query_params)
+    items = items.order_by(*KeysetPagination.ordering)
+    if request.query_params.get('ndjson', '').lower() in TRUE_VALUES:
+        return StreamingHttpResponse(
+            stream_ndjson(items), content_type='application/x-ndjson'
+        )
+    return StreamingHttpResponse(
+        stream_json_array(items), content_type='application/json'
+    )
+
+
+@api_view(['POST'])
+@idempotent
+def grocery_item_batch(request, list_id):
+    """
+    Create, partially update and delete many items in one transaction.
+    Body: {"create": [{...}], "update": [{"id": 1, ...}], "delete": [1, 2]}
+    """
+    results, errors = apply_batch(list_id, request.data)
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(results, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def grocery_item_import(request, list_id):
+    """
+    Import items from a CSV (Content-Type: text/csv, with a header row) or
+    NDJSON (application/x-ndjson) body, read line by line rather than into
+    memory. Rows follow the create rules; invalid ones are reported by line
+    and skipped. Query: ?batch_size= rows per transaction (default 1000).
+    Not covered by Idempotency-Key, which would need the whole body.
+    """
+    format = importer.CONTENT_TYPES.get(request.content_type.split(';')[0].strip())
+    if format is None:
         return Response(
-            {'error': 'purchased field is required'}, 
+            {'error': f"Content-Type must be one of: {', '.join(importer.CONTENT_TYPES)}."},
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+    batch_size = request.query_params.get('batch_size', str(importer.IMPORT_BATCH_SIZE))
+    if not batch_size.isdigit() or not 1 <= int(batch_size) <= importer.MAX_IMPORT_BATCH_SIZE:
+        return Response(
+            {'error': f'batch_size must be between 1 and {importer.MAX_IMPORT_BATCH_SIZE}'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not GroceryList.objects.filter(pk=list_id).exists():
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    report = importer.import_items(list_id, request.stream or (), format, int(batch_size))
+    return Response(report, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+def grocery_item_changes(request, list_id):
+    """
+    Items of the list created, updated or deleted after a revision.
+    Query: ?since=<revision> (use the returned revision for the next call).
+    """
+    since = request.query_params.get('since', '')
+    if not since.isdigit():
+        return Response(
+            {'error': 'since must be a non-negative integer'},
             status=status.HTTP_400_BAD_REQUEST
         )
-    
-    updated_count = GroceryItem.objects.all().update(purchased=purchased)
-    return Response({'updated': updated_count}, status=status.HTTP_200_OK)
\ No newline at end of file
+    return Response(changes_since(list_id, int(since)))
+
+
+@api_view(['GET'])
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+def grocery_item_search(request, list_id):
+    """
+    Search item names and categories: ?q=milk. Results are ranked (exact
+    name, then name prefix, then other matches by relevance) and paged with
+    ?page= and ?page_size=, as {"next": ..., "results": [...]}.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+    paginator = RankedPagination()
+    offset, limit = paginator.get_window(request)
+    page = paginator.paginate_rows(search_items(list_id, query, offset, limit))
+    return paginator.get_paginated_response(page)
+
+
+@require_GET
+async def grocery_item_events(request, list_id):
+    """
+    Server-Sent Events stream of the list's changes (created, updated,
+    bulk_updated, deleted, cleared, resync). Each event's id is the list
+    revision; on reconnect the browser sends it back as Last-Event-ID and
+    the stream starts with a resync event so the client can catch up from
+    the list's changes/ endpoint.
+
+    Only served under ASGI (backend.asgi). A WSGI server would read the
+    endless stream to completion before sending anything, holding a worker
+    forever, so it gets 501 instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'The event stream is only served by the ASGI application.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    if not await GroceryList.objects.filter(pk=list_id).aexists():
+        return JsonResponse({'error': 'No such grocery list.'}, status=status.HTTP_404_NOT_FOUND)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    stream = events.EventStream(
+        events.get_broker(),
+        list_id,
+        resume_from=int(last_event_id) if last_event_id.isdigit() else None,
+    )
+    response = StreamingHttpResponse(
+        stream,
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    response._resource_closers.append(stream.close)
+    return response
+
+
+@api_view(['GET'])
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+def grocery_item_summary(request, list_id):
+    """
+    Per-category item count, total quantity and purchased/remaining counts,
+    plus overall totals. Served from counters that every write keeps up to
+    date (see api.summary).
+    """
+    return Response(summary.summary(list_id))
+
+
+@api_view(['GET'])
+def list_cache_stats(request):
+    """
+    Hit and miss counters for the list response cache.
+    """
+    return Response(cache.stats())
+
+
+@api_view(['GET'])
+def db_pool_stats(request):
+    """
+    Database connection pool utilization for the worker serving the request.
+    """
+    return Response(dbpool.stats())
+
+
+@require_GET
+def perf_metrics(request):
+    """
+    Per-view request, database and render histograms in the Prometheus text
+    format, for the worker serving the request. Empty unless PERF_METRICS
+    is enabled.
+    """
+    return HttpResponse(perf.exposition(), content_type=perf.CONTENT_TYPE)
+
+
+def _wants_background(request):
+    return request.query_params.get('background', '').lower() in TRUE_VALUES
+
+
+def _start_job(operation, list_id, func, *args):
+    if not GroceryList.objects.filter(pk=list_id).exists():
+        raise Http404('No such grocery list.')
+    job = jobs.start(operation, list_id, func, *args)
+    location = reverse('grocery-item-job', kwargs={'list_id': list_id, 'job_id': job['id']})
+    return Response(job, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+
+def _wants_page(request, paginator):
+    params = request.query_params
+    return (paginator.page_size_query_param in params
+            or paginator.cursor_query_param in params)
@@ -0,0 +1,60 @@
+"""
+Opt-in reachability check for DATABASE_FALLBACK.
+
+Settings only call this when DATABASE_FALLBACK is enabled. The check is a
+plain TCP connect to the database host with a short timeout, not a login.
+Its result is cached in a small file in the temp directory, so the manage.py
+commands and gunicorn workers started within DATABASE_PROBE_TTL seconds of
+each other reuse one answer instead of each probing again.
+"""
+import hashlib
+import os
+import socket
+import tempfile
+import time
+
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_TTL = 300
+
+
+def _cache_path(host, port):
+    key = hashlib.sha1(f'{host}:{port}'.encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f'grocery-dbprobe-{key}')
+
+
+def _read_cached(path, ttl):
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path) as f:
+            return f.read().strip() == '1'
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cached(path, reachable):
+    # Write then rename so a concurrent reader never sees a partial file.
+    tmp = f'{path}.{os.getpid()}'
+    try:
+        with open(tmp, 'w') as f:
+            f.write('1' if reachable else '0')
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def is_reachable(db_config, timeout=DEFAULT_TIMEOUT, ttl=DEFAULT_TTL):
+    """Whether the database server in `db_config` accepts TCP connections."""
+    host = db_config.get('HOST') or 'localhost'
+    port = int(db_config.get('PORT') or 5432)
+    path = _cache_path(host, port)
+    cached = _read_cached(path, ttl)
+    if cached is not None:
+        return cached
+    try:
+        socket.create_connection((host, port), timeout=timeout).close()
+        reachable = True
+    except OSError:
+        reachable = False
+    _write_cached(path, reachable)
+    return reachable
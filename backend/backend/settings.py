@@ -13,7 +13,6 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 import environ
-import psycopg
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -57,6 +56,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Inactive unless PERF_METRICS is set; first so it times everything else.
+    'api.perf.PerfMiddleware',
+    # Inactive unless RESPONSE_COMPRESSION is set; early so it sees final bodies.
+    'api.compression.CompressionMiddleware',
+    # Inactive without DATABASE_REPLICA_URLS; scopes replica routing per request.
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,6 +71,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-view timings, query counts and response sizes (api.perf): adds
+# Server-Timing headers and serves histograms at
+# /api/grocery-items/metrics/. Cheap enough to leave on in production.
+PERF_METRICS = env.bool('PERF_METRICS', default=False)
+
+# Brotli/gzip response compression negotiated with Accept-Encoding
+# (api.compression). Turn off if a proxy in front already compresses and
+# the CPU is better spent there.
+RESPONSE_COMPRESSION = env.bool('RESPONSE_COMPRESSION', default=True)
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -88,38 +103,119 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-# Uses DATABASE_URL env var for PostgreSQL, falls back to SQLite if not set or connection fails.
+# Uses DATABASE_URL for PostgreSQL and SQLite when it is empty. The choice is
+# made from the environment alone: importing settings never connects to the
+# database, so manage.py commands, test runs and worker boots do not wait on
+# it. Set DATABASE_FALLBACK=True to fall back to SQLite when the PostgreSQL
+# server is unreachable; that check is cached between processes (see
+# backend/dbprobe.py).
 
 SQLITE_FALLBACK = f"sqlite:///{BASE_DIR / 'db.sqlite3'}"
 
 DATABASE_URL = env('DATABASE_URL', default='')
 
-if DATABASE_URL:
-    # Test PostgreSQL connection and fall back to SQLite if it fails
-    try:
-        db_config = env.db_url_config(DATABASE_URL)
-        conn = psycopg.connect(
-            host=db_config.get('HOST', 'localhost'),
-            port=db_config.get('PORT', 5432),
-            user=db_config.get('USER', ''),
-            password=db_config.get('PASSWORD', ''),
-            dbname=db_config.get('NAME', ''),
-            connect_timeout=5,
-        )
-        conn.close()
-        DATABASES = {
-            'default': env.db_url_config(DATABASE_URL) | {
-                'CONN_MAX_AGE': 600,
-                'CONN_HEALTH_CHECKS': True,
-            }
-        }
-    except Exception as e:
+DATABASE_FALLBACK = env.bool('DATABASE_FALLBACK', default=False)
+
+if DATABASE_URL and DATABASE_FALLBACK:
+    from .dbprobe import is_reachable
+
+    if not is_reachable(
+        env.db_url_config(DATABASE_URL),
+        timeout=env.float('DATABASE_PROBE_TIMEOUT', default=1.0),
+        ttl=env.int('DATABASE_PROBE_TTL', default=300),
+    ):
         import warnings
-        warnings.warn(f"PostgreSQL connection failed ({e}), falling back to SQLite.")
-        DATABASES = {'default': env.db_url_config(SQLITE_FALLBACK)}
+        warnings.warn("PostgreSQL is unreachable, falling back to SQLite.")
+        DATABASE_URL = ''
+
+# PostgreSQL connections come from a psycopg_pool pool per process, bounded
+# by DATABASE_POOL_MAX_SIZE, so keep workers x max size below the server's
+# max_connections. DATABASE_POOL=False goes back to one persistent connection
+# per thread. Utilization is served at /api/grocery-items/pool-stats/.
+
+DATABASE_POOL = env.bool('DATABASE_POOL', default=True)
+
+
+def database_config(url):
+    config = env.db_url_config(url) | {
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+    if DATABASE_POOL and config['ENGINE'] == 'django.db.backends.postgresql':
+        # Pooled connections go back to the pool after each request, which
+        # Django requires CONN_MAX_AGE=0 for.
+        config['CONN_MAX_AGE'] = 0
+        config.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+            # Seconds a request waits for a free connection before failing.
+            'timeout': env.float('DATABASE_POOL_TIMEOUT', default=10),
+            'max_idle': env.float('DATABASE_POOL_MAX_IDLE', default=300),
+            'max_lifetime': env.float('DATABASE_POOL_MAX_LIFETIME', default=3600),
+        }
+    return config
+
+
+if DATABASE_URL:
+    DATABASES = {'default': database_config(DATABASE_URL)}
 else:
     DATABASES = {'default': env.db_url_config(SQLITE_FALLBACK)}
 
+# Read replicas (api.replicas): comma-separated database URLs, registered as
+# replica1, replica2, ... GET requests read from them unless the client
+# wrote within REPLICA_STICKY_SECONDS (keep it above the usual replication
+# lag); a replica that refuses connections is retried after
+# REPLICA_RETRY_SECONDS. Tests run every alias against the primary's test
+# database.
+DATABASE_REPLICA_URLS = env.list('DATABASE_REPLICA_URLS', default=[])
+DATABASE_REPLICAS = [f'replica{number}' for number in range(1, len(DATABASE_REPLICA_URLS) + 1)]
+DATABASES.update(
+    (alias, database_config(url) | {'TEST': {'MIRROR': 'default'}})
+    for alias, url in zip(DATABASE_REPLICAS, DATABASE_REPLICA_URLS)
+)
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter'] if DATABASE_REPLICAS else []
+REPLICA_STICKY_SECONDS = env.int('REPLICA_STICKY_SECONDS', default=5)
+REPLICA_RETRY_SECONDS = env.int('REPLICA_RETRY_SECONDS', default=30)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Uses CACHE_URL, e.g. locmemcache:// (default, per-process),
+# filecache:///var/tmp/grocery-cache or pymemcache://127.0.0.1:11211 to share
+# cached list responses between gunicorn workers.
+
+CACHE_URL = env('CACHE_URL', default='') or 'locmemcache://'
+
+CACHES = {'default': env.cache_url_config(CACHE_URL)}
+
+# Seconds a rendered list response stays cached; writes invalidate it sooner.
+LIST_CACHE_TIMEOUT = env.int('LIST_CACHE_TIMEOUT', default=300)
+
+# Responses stored for Idempotency-Key retries (api.idempotency) live in
+# their own cache so list responses cannot evict them. Records expire after
+# IDEMPOTENCY_TTL seconds; local-memory and file caches also hold at most
+# IDEMPOTENCY_MAX_KEYS of them. Use a shared backend with several workers.
+IDEMPOTENCY_CACHE_URL = env('IDEMPOTENCY_CACHE_URL', default='') or 'locmemcache://grocery-idempotency'
+IDEMPOTENCY_TTL = env.int('IDEMPOTENCY_TTL', default=24 * 60 * 60)
+IDEMPOTENCY_MAX_KEYS = env.int('IDEMPOTENCY_MAX_KEYS', default=10000)
+
+CACHES['idempotency'] = env.cache_url_config(IDEMPOTENCY_CACHE_URL)
+CACHES['idempotency']['TIMEOUT'] = IDEMPOTENCY_TTL
+if CACHES['idempotency']['BACKEND'].endswith(('LocMemCache', 'FileBasedCache')):
+    CACHES['idempotency'].setdefault('OPTIONS', {})['MAX_ENTRIES'] = IDEMPOTENCY_MAX_KEYS
+
+# Rows per transaction for delete-all and update-purchased, which commit
+# large lists in batches rather than in one long transaction.
+BULK_BATCH_SIZE = env.int('BULK_BATCH_SIZE', default=10000)
+
+
+# Push events
+# api.events.LocalBroker fans out within one process. With several workers,
+# use api.events.PostgresBroker (LISTEN/NOTIFY) so every worker's SSE
+# subscribers receive every change.
+
+EVENTS_BACKEND = env('EVENTS_BACKEND', default='') or 'api.events.LocalBroker'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -19,5 +19,6 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/', include('api.async_urls')),
     path('api/', include('api.urls')),
 ]
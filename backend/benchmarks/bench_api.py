@@ -0,0 +1,200 @@
+"""
+Load-test the item endpoints through real servers and save throughput,
+latency percentiles and server memory to a JSON file for comparison.
+
+    python -m benchmarks.bench_api [--database sqlite|postgres]
+        [--items 1000 100000 1000000] [--servers wsgi asgi]
+        [--scenarios list detail create bulk-update delete-all]
+        [--concurrency 16] [--duration 10] [--workers 3] [--delay-ms 0]
+        [--output results.json]
+
+For every item count and server the default list is reseeded, the server
+is started with --workers processes and each scenario is driven for
+--duration seconds by --concurrency clients:
+
+    list         GET a page of 100 items
+    detail       GET one item
+    create       POST a new item
+    bulk-update  PATCH update-purchased, alternating true and false
+    delete-all   DELETE every item, once, on the freshly seeded list
+
+"wsgi" is gunicorn with sync workers serving /api/, "asgi" is uvicorn
+serving the async views under /api/async/. --database postgres uses the
+server in DATABASE_URL and a throwaway test_<name> database; sqlite uses a
+temporary file. Every result row carries its item count, server and
+scenario, so files from two commits can be compared with
+`python -m benchmarks.compare old.json new.json`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from benchmarks import loadgen
+from benchmarks.common import seed_items, test_database
+
+TARGETS = {
+    'wsgi': '/api',
+    'asgi': '/api/async',
+}
+SCENARIOS = ('list', 'detail', 'create', 'bulk-update', 'delete-all')
+SETTINGS_MODULE = 'benchmarks.slow_db_settings'
+
+
+def request_factory(scenario, prefix, ids, tag):
+    """make_request(i) for loadgen.drive()."""
+    items = f'{prefix}/grocery-items/'
+
+    def make_request(i):
+        if scenario == 'list':
+            return 'GET', f'{items}?page_size=100', b''
+        if scenario == 'detail':
+            return 'GET', f'{items}{ids[i % len(ids)]}/', b''
+        if scenario == 'create':
+            return 'POST', items, json.dumps({'name': f'bench-{tag}-{i}'}).encode()
+        if scenario == 'bulk-update':
+            body = json.dumps({'purchased': i % 2 == 0}).encode()
+            return 'PATCH', f'{items}update-purchased/', body
+        raise ValueError(f'Unknown scenario: {scenario}')
+
+    return make_request
+
+
+def seed(items):
+    """Reseed the default list and return up to 1000 of its item ids."""
+    from django.db import connection
+    from api import summary
+    from api.models import DEFAULT_LIST_ID, GroceryItem
+    seed_items(items)
+    summary.rebuild(DEFAULT_LIST_ID)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE api_groceryitem')
+    ids = list(GroceryItem.objects.values_list('id', flat=True)[:1000])
+    # Servers must not wait on the seeding connection (SQLite locks).
+    connection.close()
+    return ids
+
+
+async def delete_all(port, prefix, server_pid):
+    started = time.perf_counter()
+    status, _ = await loadgen.request(port, 'DELETE', f'{prefix}/grocery-items/')
+    stats = loadgen.summarize([time.perf_counter() - started], int(status != 200), 0)
+    rss = loadgen.process_tree_rss(server_pid)
+    if rss is not None:
+        stats['server_rss_mb'] = round(rss / 2**20, 1)
+    return stats
+
+
+def run_server(kind, items, args, env):
+    """Seed, start one server and run every scenario against it."""
+    prefix = TARGETS[kind]
+    ids = seed(items)
+    port = loadgen.free_port()
+    rows = []
+    with loadgen.server(kind, port, env, workers=args.workers) as process:
+        warm_up = request_factory('list', prefix, ids, kind)
+        asyncio.run(loadgen.drive(port, warm_up, args.workers * 2, 1))
+        for scenario in args.scenarios:
+            if scenario == 'delete-all':
+                stats = asyncio.run(delete_all(port, prefix, process.pid))
+            else:
+                make_request = request_factory(scenario, prefix, ids, f'{kind}-{items}')
+                stats = asyncio.run(loadgen.drive(
+                    port, make_request, args.concurrency, args.duration, server_pid=process.pid,
+                ))
+            rows.append({'items': items, 'server': kind, 'scenario': scenario, **stats})
+            print(json.dumps(rows[-1]), file=sys.stderr)
+    return rows
+
+
+@contextmanager
+def database(kind):
+    """Point this process at a throwaway database; yields the servers' env."""
+    env = {'DJANGO_SETTINGS_MODULE': SETTINGS_MODULE}
+    os.environ.update(env)
+    if kind == 'sqlite':
+        with tempfile.TemporaryDirectory() as tmp:
+            env['BENCH_DB_PATH'] = os.environ['BENCH_DB_PATH'] = os.path.join(tmp, 'bench.sqlite3')
+            import django
+            from django.core.management import call_command
+            django.setup()
+            call_command('migrate', verbosity=0)
+            yield env
+    else:
+        import django
+        django.setup()
+        with test_database() as connection:
+            env['BENCH_DB_NAME'] = connection.settings_dict['NAME']
+            yield env
+
+
+def metadata(args):
+    import django
+
+    def git(*command):
+        try:
+            return subprocess.run(
+                ['git', *command], capture_output=True, text=True, check=True,
+                cwd=loadgen.BACKEND_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git('status', '--porcelain')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'database': args.database,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'workers': args.workers,
+        'delay_ms': args.delay_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database', choices=('sqlite', 'postgres'), default='sqlite')
+    parser.add_argument('--items', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--servers', nargs='+', choices=tuple(TARGETS), default=list(TARGETS))
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--delay-ms', type=float, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+    if args.database == 'postgres' and not os.environ.get('DATABASE_URL'):
+        parser.error('--database postgres needs DATABASE_URL')
+    # delete-all empties the list, so it always runs last.
+    args.scenarios = sorted(set(args.scenarios), key=SCENARIOS.index)
+
+    with database(args.database) as env:
+        env['BENCH_DB_DELAY_MS'] = str(args.delay_ms)
+        results = {'meta': metadata(args), 'results': []}
+        for items in args.items:
+            for kind in args.servers:
+                results['results'].extend(run_server(kind, items, args, env))
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
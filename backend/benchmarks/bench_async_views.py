@@ -0,0 +1,83 @@
+"""
+Compare the sync DRF views under gunicorn (WSGI, sync workers) with the
+async views under uvicorn (ASGI) against a deliberately slow database.
+
+    python -m benchmarks.bench_async_views [--items 1000] [--delay-ms 20]
+        [--concurrency 64] [--duration 10] [--workers 3]
+
+Both servers get the same number of worker processes and the same SQLite
+file; every query is delayed by --delay-ms. The workload alternates between
+a list page and a detail GET.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from benchmarks import loadgen
+from benchmarks.common import seed_items
+
+TARGETS = {
+    'wsgi': '/api',
+    'asgi': '/api/async',
+}
+
+
+def prepare_database(path, items):
+    os.environ['BENCH_DB_PATH'] = path
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.slow_db_settings'
+    import django
+    from django.core.management import call_command
+    django.setup()
+    call_command('migrate', verbosity=0)
+    seed_items(items)
+    from api.models import GroceryItem
+    return list(GroceryItem.objects.values_list('id', flat=True)[:1000])
+
+
+def run_target(kind, ids, args, env):
+    prefix = TARGETS[kind]
+
+    def make_request(i):
+        if i % 2:
+            return 'GET', f'{prefix}/grocery-items/{ids[i % len(ids)]}/', b''
+        return 'GET', f'{prefix}/grocery-items/?page_size=50', b''
+
+    port = loadgen.free_port()
+    with loadgen.server(kind, port, env, workers=args.workers):
+        # Warm up every worker's connection before measuring.
+        asyncio.run(loadgen.drive(port, make_request, args.workers * 2, 1))
+        return asyncio.run(loadgen.drive(port, make_request, args.concurrency, args.duration))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--delay-ms', type=float, default=20)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        ids = prepare_database(path, args.items)
+        env = {
+            'BENCH_DB_PATH': path,
+            'BENCH_DB_DELAY_MS': str(args.delay_ms),
+            'DJANGO_SETTINGS_MODULE': 'benchmarks.slow_db_settings',
+        }
+        results = {
+            'items': args.items,
+            'delay_ms': args.delay_ms,
+            'concurrency': args.concurrency,
+            'workers': args.workers,
+        }
+        for kind in TARGETS:
+            results[kind] = run_target(kind, ids, args, env)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
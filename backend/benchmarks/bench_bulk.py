@@ -0,0 +1,78 @@
+"""
+Time update-purchased and delete-all of a large list at several batch sizes.
+
+    python -m benchmarks.bench_bulk [--items 1000000] [--batch-sizes 1000 10000 100000] [--memory]
+
+Each batch size runs api.mutations.set_all_purchased(True) (two thirds of
+the seeded items change) and then delete_all_items() on a freshly seeded
+list. "single" is one batch for the whole list, the behaviour before writes
+were batched. Reports the total time, the number of batches, the longest
+batch (how long the list stays locked at once) and, with --memory, the
+peak Python memory traced during the run (tracing slows the run down, so
+compare timings from runs without it).
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.common import seed_items, setup_django, test_database
+
+
+def timed(func, list_id, *args, batch_size, memory):
+    commits = []
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    processed = func(list_id, *args, batch_size=batch_size,
+                     progress=lambda total: commits.append(time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    batches = [end - begin for begin, end in zip([start] + commits, commits)]
+    result = {
+        'processed': processed,
+        'total_ms': round(elapsed * 1000, 2),
+        'batches': len(batches),
+        'max_batch_ms': round(max(batches) * 1000, 2),
+    }
+    if memory:
+        result['peak_memory_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return result
+
+
+def run(items, batch_sizes, memory):
+    from django.db import connection
+    from api import summary
+    from api.models import DEFAULT_LIST_ID
+    from api.mutations import delete_all_items, set_all_purchased
+
+    results = {'items': items, 'vendor': connection.vendor, 'runs': {}}
+    for label, batch_size in [('single', items + 1)] + [(str(size), size) for size in batch_sizes]:
+        seed_items(items)
+        summary.rebuild(DEFAULT_LIST_ID)
+        results['runs'][label] = {
+            'update_purchased': timed(
+                set_all_purchased, DEFAULT_LIST_ID, True, batch_size=batch_size, memory=memory
+            ),
+            'delete_all': timed(
+                delete_all_items, DEFAULT_LIST_ID, batch_size=batch_size, memory=memory
+            ),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--memory', action='store_true', help='trace peak Python memory')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        results = run(args.items, args.batch_sizes, args.memory)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Time /api/grocery-items/search/ queries against a large list.
+
+    python -m benchmarks.bench_search [--items 1000000] [--repeat 20]
+
+Items get word-based names ("Organic Oat Milk 123456") so queries hit a
+realistic number of rows. Reports the median time of api.search.search_items
+for the first page (20 rows) of each query on the configured database
+(set DATABASE_URL to run it on PostgreSQL). On PostgreSQL it also reports
+the query plan of the name-prefix lookup that queries shorter than a
+trigram rely on.
+"""
+import argparse
+import json
+
+from benchmarks.common import (
+    CATEGORIES, SEED_BATCH_SIZE, measure, setup_django, summarize, test_database,
+)
+
+ADJECTIVES = (
+    'Organic', 'Fresh', 'Frozen', 'Smoked', 'Whole', 'Sliced', 'Low Fat',
+    'Spicy', 'Sweet', 'Roasted', 'Wild', 'Greek', 'Baby', 'Red', 'Green',
+)
+NOUNS = (
+    'Milk', 'Oat Milk', 'Cheddar', 'Yogurt', 'Bread', 'Bagels', 'Salmon',
+    'Chicken', 'Beef Mince', 'Apples', 'Bananas', 'Spinach', 'Tomatoes',
+    'Pasta', 'Rice', 'Olive Oil', 'Coffee', 'Tea', 'Almonds', 'Butter',
+)
+QUERIES = ('Milk', 'oat milk', 'chedd', 'salmon 12345', 'Pantry', 'xyzzy', 'Sw')
+
+
+def seed_named_items(count):
+    from api.categories import get_category
+    from api.models import GroceryItem
+    GroceryItem.objects.all().delete()
+    categories = [get_category(name) for name in CATEGORIES]
+    for start in range(0, count, SEED_BATCH_SIZE):
+        stop = min(start + SEED_BATCH_SIZE, count)
+        GroceryItem.objects.bulk_create(
+            GroceryItem(
+                name=f'{ADJECTIVES[n % len(ADJECTIVES)]} {NOUNS[n // 7 % len(NOUNS)]} {n}',
+                category=categories[n % len(categories)],
+            )
+            for n in range(start, stop)
+        )
+
+
+def run(items, repeat):
+    from django.db import connection
+    from api.models import DEFAULT_LIST_ID
+    from api.models import GroceryItem
+    from api.search import MIN_SUBSTRING_QUERY_LENGTH, search_items
+
+    seed_named_items(items)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE api_groceryitem')
+    results = {'items': items, 'vendor': connection.vendor, 'queries': {}}
+    for query in QUERIES:
+        found = len(search_items(DEFAULT_LIST_ID, query, 0, 21))
+        stats = summarize(measure(lambda: search_items(DEFAULT_LIST_ID, query, 0, 21), repeat))
+        results['queries'][query] = dict(stats, first_page=min(found, 20))
+        # SQLite searches through FTS5 and its own lower(name) range instead.
+        if connection.vendor == 'postgresql' and len(query) < MIN_SUBSTRING_QUERY_LENGTH:
+            prefix = GroceryItem.objects.filter(list_id=DEFAULT_LIST_ID, name__istartswith=query)
+            results['queries'][query]['prefix_plan'] = prefix.values_list('id')[:1000].explain()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        results = run(args.items, args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare GroceryItemSerializer(many=True) with the .values() read path.
+
+    python -m benchmarks.bench_serializers [--sizes 1000 10000 100000] [--repeat 5]
+"""
+import argparse
+import json
+
+from benchmarks.common import measure, seed_items, setup_django, summarize, test_database
+
+
+def run(sizes, repeat):
+    from api.models import GroceryItem
+    from api.serializers import GroceryItemSerializer, item_rows
+
+    results = []
+    for size in sizes:
+        seed_items(size)
+        items = GroceryItem.objects.order_by('purchased', 'category', 'id')
+
+        def model_serializer():
+            return GroceryItemSerializer(items.all(), many=True).data
+
+        def values_path():
+            return list(item_rows(items.all()))
+
+        serializer_stats = summarize(measure(model_serializer, repeat))
+        values_stats = summarize(measure(values_path, repeat))
+        results.append({
+            'items': size,
+            'model_serializer': serializer_stats,
+            'values': values_stats,
+            'speedup': round(serializer_stats['median_ms'] / values_stats['median_ms'], 2),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        results = run(args.sizes, args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
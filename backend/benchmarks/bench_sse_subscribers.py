@@ -0,0 +1,142 @@
+"""
+Hold many idle SSE connections open against the ASGI app in one process.
+
+    python -m benchmarks.bench_sse_subscribers [--connections 5000] [--timeout 60]
+
+Connections are driven in-process through backend.asgi's application, so the
+numbers cover Django's ASGI handler, the view and the broker but not a
+server's socket handling. Reports the peak-RSS growth per idle subscriber
+and how long a single published event takes to reach every connection.
+Runs against a throwaway test database. Exits non-zero if the connections
+are not all open, or have not all received the event, within --timeout
+seconds.
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+from benchmarks.common import setup_django, test_database
+
+EVENTS_PATH = '/api/grocery-items/events/'
+
+
+class Connection:
+    """A minimal ASGI client for one long-lived GET."""
+
+    def __init__(self, app, index):
+        self.app = app
+        self.index = index
+        self.connected = asyncio.Event()
+        self.received = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self.status = None
+        self._request_sent = False
+
+    def scope(self):
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': EVENTS_PATH,
+            'raw_path': EVENTS_PATH.encode(),
+            'query_string': b'',
+            'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 10000 + self.index),
+            'server': ('localhost', 80),
+        }
+
+    async def receive(self):
+        if not self._request_sent:
+            self._request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        body = message.get('body', b'')
+        if b': connected' in body:
+            self.connected.set()
+        elif b'event: cleared' in body:
+            self.received.set()
+
+    async def run(self):
+        await self.app(self.scope(), self.receive, self.send)
+
+
+def peak_rss_kib():
+    # ru_maxrss is in KiB on Linux (bytes on macOS).
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def wait_all(clients, event, timeout, what):
+    """Wait for `event` on every client; SystemExit after `timeout` seconds."""
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(getattr(client, event).wait() for client in clients)), timeout
+        )
+    except TimeoutError:
+        done = sum(getattr(client, event).is_set() for client in clients)
+        statuses = sorted({client.status for client in clients if client.status not in (None, 200)})
+        raise SystemExit(
+            f'{done} of {len(clients)} connections {what} within {timeout}s'
+            + (f'; responses with status {statuses}' if statuses else '')
+        )
+
+
+async def run(connections, timeout):
+    from django.core.asgi import get_asgi_application
+    from api import events
+
+    app = get_asgi_application()
+    broker = events.get_broker()
+
+    baseline = peak_rss_kib()
+
+    clients = [Connection(app, index) for index in range(connections)]
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(client.run()) for client in clients]
+    await wait_all(clients, 'connected', timeout, 'opened')
+    connect_seconds = time.perf_counter() - started
+
+    current = peak_rss_kib()
+
+    started = time.perf_counter()
+    await asyncio.to_thread(broker.publish, {'type': 'cleared', 'revision': 1})
+    await wait_all(clients, 'received', timeout, 'received the event')
+    fanout_seconds = time.perf_counter() - started
+
+    subscribers = broker.subscriber_count
+    for client in clients:
+        client.disconnect.set()
+    await asyncio.wait(tasks, timeout=30)
+
+    return {
+        'connections': connections,
+        'subscribers': subscribers,
+        'connect_seconds': round(connect_seconds, 3),
+        'rss_kib_per_subscriber': round((current - baseline) / connections, 1),
+        'fanout_ms': round(fanout_seconds * 1000, 2),
+        'subscribers_after_disconnect': broker.subscriber_count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        results = asyncio.run(run(args.connections, args.timeout))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare payload size and encode time of the list response formats.
+
+    python -m benchmarks.bench_wire [--sizes 10000 100000] [--repeat 5]
+
+For each list size, renders the full item list with DRF's JSONRenderer,
+the columnar JSON layout and MessagePack (api.renderers), then compresses
+each body with gzip (as GZipMiddleware does) and brotli at the quality
+api.compression uses. Reports sizes in bytes and median times.
+"""
+import argparse
+import gzip
+import json
+
+import brotli
+
+from benchmarks.common import measure, seed_items, setup_django, summarize, test_database
+
+
+def encodings(body, brotli_quality):
+    return {
+        'gzip': lambda: gzip.compress(body, compresslevel=6, mtime=0),
+        'br': lambda: brotli.compress(body, quality=brotli_quality),
+    }
+
+
+def run(sizes, repeat):
+    from rest_framework.renderers import JSONRenderer
+    from api.compression import BROTLI_QUALITY
+    from api.models import DEFAULT_LIST_ID, GroceryItem
+    from api.pagination import KeysetPagination
+    from api.renderers import ColumnarJSONRenderer, MessagePackRenderer
+    from api.serializers import item_rows
+
+    renderers = {
+        'json': JSONRenderer(),
+        'columnar': ColumnarJSONRenderer(),
+        'msgpack': MessagePackRenderer(),
+    }
+    results = {'sizes': {}}
+    for size in sizes:
+        seed_items(size)
+        rows = list(item_rows(
+            GroceryItem.objects.filter(list_id=DEFAULT_LIST_ID).order_by(*KeysetPagination.ordering)
+        ))
+        formats = {}
+        for name, renderer in renderers.items():
+            body = renderer.render(rows)
+            entry = dict(summarize(measure(lambda: renderer.render(rows), repeat)), bytes=len(body))
+            for encoding, compress in encodings(body, BROTLI_QUALITY).items():
+                entry[encoding] = dict(
+                    summarize(measure(compress, repeat)), bytes=len(compress())
+                )
+            formats[name] = entry
+        results['sizes'][size] = formats
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        results = run(args.sizes, args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
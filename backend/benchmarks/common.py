@@ -0,0 +1,70 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway test database created from the configured
+settings (in-memory for SQLite, test_<name> for Postgres), so they never touch
+real data. Run them from the backend directory, e.g.
+
+    python -m benchmarks.bench_serializers
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+SEED_BATCH_SIZE = 5000
+CATEGORIES = ('Produce', 'Dairy', 'Meat', 'Pantry', 'Bakery', 'Other')
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create the test database for the duration of the block."""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed_items(count):
+    """Replace the item table with `count` generated items."""
+    from api.categories import get_category
+    from api.models import GroceryItem
+    GroceryItem.objects.all()._raw_delete(GroceryItem.objects.db)
+    categories = [get_category(name) for name in CATEGORIES]
+    for start in range(0, count, SEED_BATCH_SIZE):
+        stop = min(start + SEED_BATCH_SIZE, count)
+        GroceryItem.objects.bulk_create(
+            GroceryItem(
+                name=f'item-{n:08d}',
+                category=categories[n % len(categories)],
+                quantity=n % 12 + 1,
+                purchased=n % 3 == 0,
+            )
+            for n in range(start, stop)
+        )
+
+
+def measure(func, repeat=5):
+    """Run func `repeat` times and return the timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    return {
+        'min_ms': round(min(timings) * 1000, 2),
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+    }
@@ -0,0 +1,76 @@
+"""
+Compare two bench_api result files, e.g. from the parent commit and HEAD.
+
+    python -m benchmarks.compare old.json new.json [--threshold 10]
+
+Prints throughput, p50/p95/p99 latency and server memory per (items,
+server, scenario) with the relative change, and exits with status 1 when
+any latency or memory figure grew, or throughput fell, by more than
+--threshold percent.
+"""
+import argparse
+import json
+import sys
+
+# metric -> True when larger is better
+METRICS = {
+    'rps': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'server_rss_mb': False,
+}
+
+
+def load(path):
+    with open(path) as results:
+        data = json.load(results)
+    rows = {(row['items'], row['server'], row['scenario']): row for row in data['results']}
+    return data['meta'], rows
+
+
+def change(old, new):
+    if not old:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(old_rows, new_rows, threshold):
+    """Yield (key, metric, old, new, percent change, regressed)."""
+    for key in sorted(old_rows.keys() & new_rows.keys()):
+        old, new = old_rows[key], new_rows[key]
+        for metric, higher_is_better in METRICS.items():
+            if metric not in old or metric not in new:
+                continue
+            if metric == 'rps' and not old[metric]:
+                continue  # one-shot scenarios have no throughput
+            percent = change(old[metric], new[metric])
+            worse = percent is not None and (-percent if higher_is_better else percent) > threshold
+            yield key, metric, old[metric], new[metric], percent, worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='percent change counted as a regression')
+    args = parser.parse_args()
+
+    old_meta, old_rows = load(args.old)
+    new_meta, new_rows = load(args.new)
+    print(f"old: {old_meta.get('commit')} ({old_meta.get('database')})")
+    print(f"new: {new_meta.get('commit')} ({new_meta.get('database')})")
+    regressions = 0
+    for (items, server, scenario), metric, old, new, percent, worse in compare(
+        old_rows, new_rows, args.threshold
+    ):
+        shown = 'n/a' if percent is None else f'{percent:+.1f}%'
+        flag = '  REGRESSION' if worse else ''
+        print(f'{items:>8} {server:<5} {scenario:<12} {metric:<14} {old:>10} -> {new:>10} {shown:>8}{flag}')
+        regressions += worse
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
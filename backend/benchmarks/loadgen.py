@@ -0,0 +1,179 @@
+"""
+A small asyncio HTTP/1.1 load generator and server launcher for the
+benchmark scripts, so they need nothing beyond the backend's requirements.
+
+Every request uses a fresh connection (gunicorn's sync workers do not keep
+connections alive), which keeps WSGI and ASGI servers comparable.
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def server(kind, port, env, workers=3):
+    """Run gunicorn (kind='wsgi') or uvicorn (kind='asgi') until the block exits."""
+    if kind == 'wsgi':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'backend.wsgi:application',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+            '--log-level', 'warning',
+        ]
+    elif kind == 'asgi':
+        command = [
+            sys.executable, '-m', 'uvicorn', 'backend.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+            '--log-level', 'warning', '--no-access-log',
+        ]
+    else:
+        raise ValueError(f'Unknown server kind: {kind}')
+
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **env})
+    try:
+        wait_for_port(port)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+
+async def request(port, method, path, body=b'', headers=None):
+    """Send one request on a new connection. Returns (status, body)."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        lines = [f'{method} {path} HTTP/1.1', 'Host: localhost', 'Connection: close']
+        for name, value in (headers or {}).items():
+            lines.append(f'{name}: {value}')
+        if body:
+            lines.append('Content-Type: application/json')
+            lines.append(f'Content-Length: {len(body)}')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1]) if head else 0
+    return status, payload
+
+
+def process_tree_rss(pid):
+    """
+    Resident memory in bytes of process `pid` and its direct children (the
+    server's workers), read from /proc. Returns None where /proc is missing.
+    """
+    try:
+        entries = [entry for entry in os.listdir('/proc') if entry.isdigit()]
+    except FileNotFoundError:
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for entry in entries:
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # The command name may contain spaces; fields resume after ')'.
+                ppid = int(stat.read().rsplit(')', 1)[1].split()[1])
+            if int(entry) != pid and ppid != pid:
+                continue
+            with open(f'/proc/{entry}/statm') as statm:
+                total += int(statm.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+async def sample_rss(pid, peak, interval=0.25):
+    """Record the largest process_tree_rss(pid) in peak[0] until cancelled."""
+    while True:
+        rss = process_tree_rss(pid)
+        if rss is not None:
+            peak[0] = max(peak[0] or 0, rss)
+        await asyncio.sleep(interval)
+
+
+async def drive(port, make_request, concurrency, duration, server_pid=None):
+    """
+    Run `concurrency` clients issuing make_request(i) -> (method, path, body)
+    back to back for `duration` seconds. Returns a stats dict; with
+    `server_pid`, it includes the server's peak resident memory.
+    """
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(offset):
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(i)
+            started = time.perf_counter()
+            try:
+                status, _ = await request(port, method, path, body)
+            except OSError:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            if not 200 <= status < 400:
+                errors += 1
+            i += concurrency
+
+    peak = [None]
+    sampler = asyncio.create_task(sample_rss(server_pid, peak)) if server_pid else None
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client(n) for n in range(concurrency)))
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+    elapsed = time.perf_counter() - started
+    stats = summarize(latencies, errors, elapsed)
+    if peak[0] is not None:
+        stats['server_rss_mb'] = round(peak[0] / 2**20, 1)
+    return stats
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 2) if ordered else 0.0,
+    }
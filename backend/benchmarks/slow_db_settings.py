@@ -0,0 +1,41 @@
+"""
+Settings for benchmark servers: a SQLite file from BENCH_DB_PATH or, without
+it, the PostgreSQL server from DATABASE_URL with the database named by
+BENCH_DB_NAME; and an artificial per-query delay of BENCH_DB_DELAY_MS
+milliseconds, added with a connection execute_wrapper to stand in for a
+remote or loaded database.
+"""
+import os
+import time
+
+from django.db.backends.signals import connection_created
+
+from backend.settings import *  # noqa: F401,F403
+
+if os.environ.get('BENCH_DB_PATH'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ['BENCH_DB_PATH'],
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+elif os.environ.get('BENCH_DB_NAME'):
+    DATABASES['default']['NAME'] = os.environ['BENCH_DB_NAME']  # noqa: F405
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+DB_DELAY_SECONDS = float(os.environ.get('BENCH_DB_DELAY_MS', '0')) / 1000
+
+
+def _delay(execute, sql, params, many, context):
+    time.sleep(DB_DELAY_SECONDS)
+    return execute(sql, params, many, context)
+
+
+def _install_delay(sender, connection, **kwargs):
+    if DB_DELAY_SECONDS and _delay not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_delay)
+
+
+connection_created.connect(_install_delay)